@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+框架基准测试：针对本地桩服务测量框架自身的吞吐量和开销
+
+测量项：
+    - e2e: 每秒执行用例数、每个用例的框架开销（扣除同一请求直接用requests发送的耗时）
+    - load: 每1万行用例的加载耗时（CSV/XLS/XLSX/JSON，缺少xlwt时跳过XLS）
+    - micro: 变量替换、变量提取的单次耗时
+    - memory: 每个用例的内存峰值和驻留增长（tracemalloc）
+
+用法：
+    python -m benchmarks.run_benchmarks                          # 运行并与基线比较
+    python -m benchmarks.run_benchmarks --save-baseline          # 保存为新的基线
+    python -m benchmarks.run_benchmarks --threshold 0.3          # 劣化超过30%判定为回归
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+import pytest
+import requests
+
+from config.config import Config
+from core.assert_handler import AssertHandler
+from core.data_handler import DataHandler as GlobalDataHandler
+from core.request_handler import RequestHandler
+from core.test_executor import TestExecutor
+from utils.logger import logger
+from utils.stub_server import StubRoute, StubServer
+from utils.test_case_reader import DataHandler
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(Config().reports_dir, 'benchmarks', 'latest.json')
+
+# 用例文件的列，与 data/json_data 中的用例一致
+_COLUMNS = ['case_id', 'case_name', 'method', 'url', 'headers', 'params', 'body',
+            'expected_status', 'expected_content', 'json_path', 'expected_json_value',
+            'extract_key', 'save_var_name', 'validate', 'enabled']
+
+_LIST_CONTENT = json.dumps({
+    "success": True, "message": "查询成功",
+    "data": [{"id": i, "name": "张三", "phone": "13800138000", "province": "北京市", "city": "北京市",
+              "district": "朝阳区", "detail": "某某街道123号", "is_default": i == 1} for i in range(1, 21)]
+}, ensure_ascii=False)
+
+
+def _workload_rows() -> List[dict]:
+    """基准用例：登录提取token，再带token查询地址列表并做内容、JSON值和validate断言"""
+    login = {
+        'case_id': '1', 'case_name': '登录', 'method': 'POST', 'url': '/api/login',
+        'headers': '{"Content-Type": "application/json"}', 'params': '',
+        'body': '{"username": "main", "password": "123456"}',
+        'expected_status': '200', 'expected_content': '', 'json_path': '', 'expected_json_value': '',
+        'extract_key': 'token=token', 'save_var_name': '', 'validate': '', 'enabled': '1',
+    }
+    address_list = {
+        'case_id': '2', 'case_name': '地址列表', 'method': 'POST', 'url': '/api/address/list',
+        'headers': '{"Content-Type": "application/json"}', 'params': '',
+        'body': '{"username": "main", "token": "{{token}}"}',
+        'expected_status': '200', 'expected_content': _LIST_CONTENT,
+        'json_path': 'data[0].id', 'expected_json_value': '1',
+        'extract_key': 'address_id=data[0].id', 'save_var_name': '',
+        'validate': 'json.success == true; len(json.data) == 20', 'enabled': '1',
+    }
+    return [login, address_list]
+
+
+def _write_rows(rows: List[dict], file_path: str):
+    """把用例行写入指定格式的文件"""
+    if file_path.endswith('.json'):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False)
+    elif file_path.endswith('.csv'):
+        pd.DataFrame(rows, columns=_COLUMNS).to_csv(file_path, index=False)
+    elif file_path.endswith('.xlsx'):
+        pd.DataFrame(rows, columns=_COLUMNS).to_excel(file_path, index=False, engine='openpyxl')
+    elif file_path.endswith('.xls'):
+        # pandas 2.0 起不再支持写入xls，直接使用xlwt
+        import xlwt
+        workbook = xlwt.Workbook()
+        sheet = workbook.add_sheet('cases')
+        for col, name in enumerate(_COLUMNS):
+            sheet.write(0, col, name)
+        for row_index, row in enumerate(rows, start=1):
+            for col, name in enumerate(_COLUMNS):
+                sheet.write(row_index, col, row[name])
+        workbook.save(file_path)
+
+
+def _best_of(func: Callable[[], None], repeat: int) -> float:
+    """多次运行取最短耗时，降低调度抖动对结果的影响"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _metric(value: float, unit: str, better: str) -> dict:
+    return {'value': round(value, 6), 'unit': unit, 'better': better}
+
+
+class BenchmarkRunner:
+    """基准测试执行器"""
+
+    def __init__(self, iterations: int = 200, rows: int = 10000, repeat: int = 3):
+        """
+        Args:
+            iterations (int): 端到端测试中用例链的执行轮数
+            rows (int): 加载测试的用例行数
+            repeat (int): 每项测试的重复次数，取最好成绩
+        """
+        self.iterations = iterations
+        self.rows = rows
+        self.repeat = repeat
+        self.metrics: Dict[str, dict] = {}
+        self.skipped: Dict[str, str] = {}
+        self._tmp_dir = tempfile.mkdtemp(prefix='api_bench_')
+        workload_file = os.path.join(self._tmp_dir, 'workload.json')
+        _write_rows(_workload_rows(), workload_file)
+        self.cases = DataHandler().read_test_cases(workload_file)
+
+    def run(self) -> Dict[str, dict]:
+        server = StubServer(routes=[StubRoute.from_case(case, seed=0) for case in self.cases]).start()
+        try:
+            self._bench_e2e(server.url)
+            self._bench_memory(server.url)
+        finally:
+            server.stop()
+        self._bench_load()
+        self._bench_micro()
+        return self.metrics
+
+    def _new_executor(self, base_url: str) -> TestExecutor:
+        request_handler = RequestHandler(base_url=base_url, timeout=10, retries=0)
+        return TestExecutor(request_handler, GlobalDataHandler(), AssertHandler())
+
+    def _run_cases(self, executor: TestExecutor, iterations: int):
+        for _ in range(iterations):
+            for case in self.cases:
+                try:
+                    executor.execute_test_case(case)
+                except pytest.fail.Exception as e:
+                    raise RuntimeError(f"基准用例执行失败，结果无效: {case['case_id']} - {e}")
+
+    def _bench_e2e(self, base_url: str):
+        executor = self._new_executor(base_url)
+        # 预热：建立连接、填充编译缓存
+        self._run_cases(executor, 5)
+        total = self.iterations * len(self.cases)
+        elapsed = _best_of(lambda: self._run_cases(executor, self.iterations), self.repeat)
+        executor.request_handler.close()
+
+        # 同样的请求直接用requests发送，作为网络和桩服务耗时的基准
+        session = requests.Session()
+        token = executor.data_handler.get_variable('token')
+        payloads = [(case['url'], json.loads(case['body'].replace('{{token}}', token))) for case in self.cases]
+
+        def raw():
+            for _ in range(self.iterations):
+                for url, payload in payloads:
+                    session.post(base_url + url, json=payload, timeout=10).content
+        raw()
+        raw_elapsed = _best_of(raw, self.repeat)
+        session.close()
+
+        self.metrics['e2e.cases_per_sec'] = _metric(total / elapsed, 'cases/s', 'higher')
+        self.metrics['e2e.framework_overhead_per_case'] = _metric(
+            max(elapsed - raw_elapsed, 0) / total * 1000, 'ms', 'lower')
+        self.metrics['e2e.raw_request_per_case'] = _metric(raw_elapsed / total * 1000, 'ms', 'lower')
+
+    def _bench_memory(self, base_url: str):
+        executor = self._new_executor(base_url)
+        self._run_cases(executor, 5)
+        iterations = max(self.iterations // 4, 10)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            self._run_cases(executor, iterations)
+            gc.collect()
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            executor.request_handler.close()
+        total = iterations * len(self.cases)
+        self.metrics['memory.peak_per_case'] = _metric((peak - before) / 1024, 'KiB', 'lower')
+        self.metrics['memory.retained_per_case'] = _metric(max(after - before, 0) / total, 'B', 'lower')
+
+    def _bench_load(self):
+        template = _workload_rows()
+        rows = []
+        for index in range(self.rows):
+            row = dict(template[index % len(template)])
+            row['case_id'] = str(index + 1)
+            rows.append(row)
+
+        reader = DataHandler()
+        for ext in ('csv', 'xls', 'xlsx', 'json'):
+            file_path = os.path.join(self._tmp_dir, f'load_{self.rows}.{ext}')
+            try:
+                _write_rows(rows, file_path)
+            except ImportError as e:
+                self.skipped[f'load.{ext}'] = f"缺少依赖: {e}"
+                logger.warning(f"跳过 {ext} 加载测试: {e}")
+                continue
+            loaded = []
+            elapsed = _best_of(lambda: loaded.append(len(reader.read_test_cases(file_path))), self.repeat)
+            if loaded[-1] != self.rows:
+                raise RuntimeError(f"{ext} 文件只加载了 {loaded[-1]}/{self.rows} 行")
+            self.metrics[f'load.{ext}.per_10k_rows'] = _metric(elapsed * 10000 / self.rows, 's', 'lower')
+
+    def _bench_micro(self):
+        data_handler = GlobalDataHandler()
+        for name in ('token', 'username', 'address_id'):
+            data_handler.set_variable(name, f'value-of-{name}')
+        text = self.cases[1]['body'] + ' ${username} {{address_id}} ${token}'
+        loops = 20000
+        elapsed = _best_of(lambda: [data_handler.replace_variables(text) for _ in range(loops)], self.repeat)
+        self.metrics['micro.replace_variables'] = _metric(elapsed / loops * 1e6, 'us', 'lower')
+
+        generated = '{"id": "${__uuid()}", "no": ${__rand_int(1,100)}, "name": "${__unique_name(addr)}"}'
+        elapsed = _best_of(lambda: [data_handler.replace_variables(generated) for _ in range(loops)], self.repeat)
+        self.metrics['micro.template_functions'] = _metric(elapsed / loops * 1e6, 'us', 'lower')
+        elapsed = _best_of(lambda: data_handler.replace_variables_batch(generated, loops), self.repeat)
+        self.metrics['micro.template_functions_batch'] = _metric(elapsed / loops * 1e6, 'us', 'lower')
+
+        document = json.loads(_LIST_CONTENT)
+        extract_key = 'first=data[0].id; last=data[19].name; message=message'
+        elapsed = _best_of(lambda: [data_handler.extract_value(document, extract_key) for _ in range(loops)],
+                           self.repeat)
+        self.metrics['micro.extract_value'] = _metric(elapsed / loops * 1e6, 'us', 'lower')
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """
+    与基线比较，返回超过阈值的劣化项
+
+    Args:
+        current (dict): 本次结果
+        baseline (dict): 基线结果
+        threshold (float): 允许的劣化比例，如 0.2 表示 20%
+
+    Returns:
+        list: 回归描述列表，没有回归时为空列表
+    """
+    regressions = []
+    for name, metric in current.items():
+        base = baseline.get(name)
+        if not base or not base['value']:
+            continue
+        change = (metric['value'] - base['value']) / base['value']
+        worse = change < -threshold if metric['better'] == 'higher' else change > threshold
+        if worse:
+            regressions.append(f"{name}: {base['value']} -> {metric['value']} {metric['unit']} ({change:+.1%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口，存在回归时返回1"""
+    parser = argparse.ArgumentParser(description="框架基准测试（针对本地桩服务）")
+    parser.add_argument("--iterations", type=int, default=200, help="端到端测试的用例链执行轮数")
+    parser.add_argument("--rows", type=int, default=10000, help="加载测试的用例行数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测试的重复次数，取最好成绩")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="结果输出文件")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定为回归的劣化比例")
+    parser.add_argument("--log-level", default="WARNING", help="基准测试期间的日志级别，避免日志输出影响结果")
+    args = parser.parse_args(argv)
+
+    logger.setLevel(getattr(logging, args.log_level.upper()))
+    runner = BenchmarkRunner(iterations=args.iterations, rows=args.rows, repeat=args.repeat)
+    metrics = runner.run()
+
+    result = {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'iterations': args.iterations, 'rows': args.rows, 'repeat': args.repeat},
+        'metrics': metrics,
+        'skipped': runner.skipped,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    for name, metric in metrics.items():
+        print(f"{name:<40} {metric['value']:>14.4f} {metric['unit']}")
+    for name, reason in runner.skipped.items():
+        print(f"{name:<40} 跳过（{reason}）")
+    print(f"结果已保存: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("未找到基线文件，跳过回归比较（使用 --save-baseline 保存基线）")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(metrics, baseline.get('metrics', {}), args.threshold)
+    if regressions:
+        print(f"发现 {len(regressions)} 项超过 {args.threshold:.0%} 的性能回归:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("与基线相比没有性能回归")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -81,6 +81,209 @@ class Config:
         print(f"Using default timeout from [environment]: {timeout}")  # 调试信息
         return timeout
 
+    def get_connect_timeout(self):
+        """获取建连超时时间（秒），0 表示与timeout相同"""
+        return self._get_env_option('connect_timeout', fallback=0.0, getter='getfloat')
+
+    def _get_env_option(self, option, fallback=None, getter='get'):
+        """
+        按指定环境的优先级读取配置项，未找到时回退到[environment]部分
+
+        Args:
+            option (str): 配置项名称
+            fallback: 所有环境都未配置时的默认值
+            getter (str): configparser读取方法名（get/getint/getfloat/getboolean）
+
+        Returns:
+            配置项的值
+        """
+        read = getattr(self.env_config, getter)
+        for env in self.current_envs:
+            if self.env_config.has_section(env) and self.env_config.has_option(env, option):
+                return read(env, option)
+        return read('environment', option, fallback=fallback)
+
+    def get_default_encoding(self):
+        """获取响应未声明charset时使用的默认字符集"""
+        return self._get_env_option('encoding', fallback='utf-8')
+
+    def get_detect_encoding(self):
+        """获取是否启用字符集探测（仅作为默认字符集解码失败时的兜底）"""
+        return self._get_env_option('detect_encoding', fallback=False, getter='getboolean')
+
+    def get_pool_options(self):
+        """
+        获取连接池配置，可在各环境部分单独覆盖
+
+        Returns:
+            dict: 可直接传给RequestHandler的连接池参数
+        """
+        return {
+            'pool_connections': self._get_env_option('pool_connections', fallback=10, getter='getint'),
+            'pool_maxsize': self._get_env_option('pool_maxsize', fallback=10, getter='getint'),
+            'pool_block': self._get_env_option('pool_block', fallback=False, getter='getboolean'),
+            'keep_alive': self._get_env_option('keep_alive', fallback=True, getter='getboolean'),
+            'idle_timeout': self._get_env_option('idle_timeout', fallback=0.0, getter='getfloat'),
+            'warmup_connections': self._get_env_option('warmup_connections', fallback=0, getter='getint'),
+        }
+
+    def get_record_timings(self):
+        """获取是否记录DNS、建连、TLS、首字节和下载的分阶段耗时"""
+        return self._get_env_option('record_timings', fallback=False, getter='getboolean')
+
+    def get_stream_options(self):
+        """
+        获取流式读取响应体的配置
+
+        Returns:
+            dict: 可直接传给RequestHandler的流式读取参数
+        """
+        return {
+            'stream_prefix_bytes': self._get_env_option('stream_prefix_bytes', fallback=65536, getter='getint'),
+            'stream_chunk_size': self._get_env_option('stream_chunk_size', fallback=65536, getter='getint'),
+        }
+
+    def get_flow_control_options(self):
+        """
+        获取按主机限速和自适应并发控制的配置，可在各环境部分单独覆盖
+
+        Returns:
+            dict: 可直接传给RequestHandler的流控参数
+        """
+        return {
+            'rate_limit': self._get_env_option('rate_limit', fallback=0.0, getter='getfloat'),
+            'rate_burst': self._get_env_option('rate_burst', fallback=1, getter='getint'),
+            'adaptive_concurrency': self._get_env_option('adaptive_concurrency', fallback=False,
+                                                         getter='getboolean'),
+            'concurrency_initial': self._get_env_option('concurrency_initial', fallback=4, getter='getint'),
+            'concurrency_min': self._get_env_option('concurrency_min', fallback=1, getter='getint'),
+            'concurrency_max': self._get_env_option('concurrency_max', fallback=64, getter='getint'),
+            'latency_target_ms': self._get_env_option('latency_target_ms', fallback=0.0, getter='getfloat'),
+        }
+
+    def get_retry_options(self):
+        """
+        获取重试配置，可在各环境部分单独覆盖
+
+        Returns:
+            dict: 可直接传给RequestHandler的重试参数
+        """
+        return {
+            'retries': self._get_env_option('retries', fallback=3, getter='getint'),
+            'retry_base_delay': self._get_env_option('retry_base_delay', fallback=0.5, getter='getfloat'),
+            'retry_max_delay': self._get_env_option('retry_max_delay', fallback=30.0, getter='getfloat'),
+            'retry_budget_ratio': self._get_env_option('retry_budget_ratio', fallback=0.2, getter='getfloat'),
+            'retry_budget_min': self._get_env_option('retry_budget_min', fallback=10, getter='getint'),
+        }
+
+    def get_circuit_breaker_options(self):
+        """
+        获取按主机熔断的配置，可在各环境部分单独覆盖
+
+        Returns:
+            dict: 可直接传给RequestHandler的熔断参数
+        """
+        return {
+            'circuit_failure_threshold': self._get_env_option('circuit_failure_threshold', fallback=5,
+                                                              getter='getint'),
+            'circuit_recovery_timeout': self._get_env_option('circuit_recovery_timeout', fallback=10.0,
+                                                             getter='getfloat'),
+        }
+
+    def get_response_cache_options(self):
+        """
+        获取GET/HEAD响应缓存的配置，可在各环境部分单独覆盖
+
+        Returns:
+            dict: 可直接传给RequestHandler的缓存参数
+        """
+        headers = self._get_env_option('response_cache_headers', fallback='')
+        return {
+            'response_cache': self._get_env_option('response_cache', fallback=False, getter='getboolean'),
+            'response_cache_ttl': self._get_env_option('response_cache_ttl', fallback=60.0, getter='getfloat'),
+            'response_cache_size': self._get_env_option('response_cache_size', fallback=256, getter='getint'),
+            'response_cache_headers': [h.strip() for h in headers.split(',') if h.strip()] or None,
+        }
+
+    def get_auth_options(self):
+        """
+        获取登录凭证缓存的配置（[auth]部分）
+
+        Returns:
+            dict: enabled、cache_file、ttl、login_url、variables、user_field、refresh_case
+        """
+        cache_file = self.env_config.get('auth', 'cache_file', fallback='data/credentials/credential_cache.json')
+        variables = self.env_config.get('auth', 'variables', fallback='token')
+        return {
+            'enabled': self.env_config.getboolean('auth', 'credential_cache', fallback=False),
+            'cache_file': cache_file if os.path.isabs(cache_file) else os.path.join(self.base_dir, cache_file),
+            'ttl': self.env_config.getfloat('auth', 'ttl', fallback=3600.0),
+            'login_url': self.env_config.get('auth', 'login_url', fallback='/api/login'),
+            'variables': [v.strip() for v in variables.split(',') if v.strip()],
+            'user_field': self.env_config.get('auth', 'user_field', fallback='username'),
+            'refresh_case': self.env_config.get('auth', 'refresh_case', fallback=''),
+        }
+
+    def get_user_pool_options(self):
+        """
+        获取预登录用户池的配置（[user_pool]部分）
+
+        Returns:
+            dict: enabled、users_file、login_case、login_concurrency、ttl、refresh_margin
+        """
+        users_file = self.env_config.get('user_pool', 'users_file', fallback='data/users/users.csv')
+        return {
+            'enabled': self.env_config.getboolean('user_pool', 'enabled', fallback=False),
+            'users_file': users_file if os.path.isabs(users_file) else os.path.join(self.base_dir, users_file),
+            'login_case': self.env_config.get('user_pool', 'login_case', fallback=''),
+            'login_concurrency': self.env_config.getint('user_pool', 'login_concurrency', fallback=8),
+            'ttl': self.env_config.getfloat('user_pool', 'ttl', fallback=3600.0),
+            'refresh_margin': self.env_config.getfloat('user_pool', 'refresh_margin', fallback=300.0),
+        }
+
+    def get_snapshot_options(self):
+        """
+        获取快照测试的配置（[snapshot]部分）
+
+        Returns:
+            dict: dir（快照目录的绝对路径）、ignore_paths（比较前忽略的易变字段路径列表）
+        """
+        snapshot_dir = self.env_config.get('snapshot', 'dir', fallback='data/snapshots')
+        ignore_paths = self.env_config.get('snapshot', 'ignore_paths', fallback='$..created_at; $..updated_at')
+        return {
+            'dir': snapshot_dir if os.path.isabs(snapshot_dir) else os.path.join(self.base_dir, snapshot_dir),
+            'ignore_paths': [path.strip() for path in ignore_paths.split(';') if path.strip()],
+        }
+
+    def get_result_store_options(self):
+        """
+        获取结构化结果库的配置（[results]部分）
+
+        Returns:
+            dict: enabled、db_file（数据库文件的绝对路径）、batch_size、flush_interval
+        """
+        db_file = self.env_config.get('results', 'db_file', fallback='reports/results.sqlite3')
+        return {
+            'enabled': self.env_config.getboolean('results', 'enabled', fallback=False),
+            'db_file': db_file if os.path.isabs(db_file) else os.path.join(self.base_dir, db_file),
+            'batch_size': self.env_config.getint('results', 'batch_size', fallback=200),
+            'flush_interval': self.env_config.getfloat('results', 'flush_interval', fallback=1.0),
+        }
+
+    def get_write_back_options(self):
+        """
+        获取结果写回的配置（[write_back]部分）
+
+        Returns:
+            dict: enabled、inline_limit（直接写入单元格的响应体最大字符数）、body_dir（大响应体目录的绝对路径）
+        """
+        body_dir = self.env_config.get('write_back', 'body_dir', fallback='reports/responses')
+        return {
+            'enabled': self.env_config.getboolean('write_back', 'enabled', fallback=False),
+            'inline_limit': self.env_config.getint('write_back', 'inline_limit', fallback=1000),
+            'body_dir': body_dir if os.path.isabs(body_dir) else os.path.join(self.base_dir, body_dir),
+        }
+
     def get_log_level(self):
         """获取日志级别"""
         return self.env_config.get('logging', 'level', fallback='INFO')
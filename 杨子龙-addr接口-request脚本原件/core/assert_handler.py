@@ -7,7 +7,14 @@
 # @Software: PyCharm
 import json
 import re
-from typing import Any, Dict
+from typing import Any, Optional
+
+from core.json_diff import JsonMismatchError, diff_json, truncate_text
+from core.json_matcher import JsonMatcher
+from core.json_path import MISSING, compile_path, resolve_path
+from core.request_handler import get_response_text, get_response_json
+from core.schema_validator import SchemaOptions, compile_schema
+from utils.common_utils import CommonUtils
 from utils.logger import logger
 
 
@@ -68,16 +75,18 @@ class AssertHandler:
                 raise ValueError("响应对象为空")
 
             try:
-                response_json = response.json() if hasattr(response, 'json') else json.loads(response)
+                response_json = get_response_json(response)
                 logger.debug(f"响应JSON: {response_json}")
                 
-                # 使用jsonpath提取值
-                matches = jsonpath.jsonpath(response_json, json_path)
-                if not matches:
+                # 使用编译缓存的JSON路径取值
+                actual_value = resolve_path(response_json, compile_path(json_path))
+                if actual_value is MISSING:
                     raise ValueError(f"JSON路径 '{json_path}' 未找到匹配项")
-                
-                actual_value = matches[0]
                 logger.debug(f"实际值: {actual_value}")
+
+                # 用例表格中的期望值都是字符串，按实际值的类型转换后再比较
+                if isinstance(expected_value, str) and not isinstance(actual_value, str):
+                    expected_value = CommonUtils.convert_str_to_type(expected_value)
                 
                 assert actual_value == expected_value, f"期望值: {expected_value}, 实际值: {actual_value}. {message}"
                 logger.info(f"断言成功: JSON路径 '{json_path}' 的值 {actual_value} == {expected_value}")
@@ -94,29 +103,52 @@ class AssertHandler:
             raise e
 
     @staticmethod
-    def assert_content_contains(response, expected_content: str, message: str = "") -> bool:
-        """断言响应内容包含指定文本，增强对JSON格式内容的处理"""
-        logger.debug(f"执行内容包含断言: 期望内容='{expected_content}'")
+    def assert_content_contains(response, expected_content: str, message: str = "",
+                                expected_json: Any = None) -> bool:
+        """
+        断言响应内容包含指定文本，增强对JSON格式内容的处理
+
+        期望内容为JSON对象/数组且响应也是JSON时，按结构化子集匹配（与键顺序无关），
+        否则按普通文本包含判断。JSON不匹配时只报告差异列表（JsonMismatchError），不输出完整响应
+
+        Args:
+            response: 响应对象
+            expected_content (str): 期望内容
+            message (str): 附加的失败信息
+            expected_json: 加载用例时预解析好的期望JSON，未提供时现场解析
+        """
+        logger.debug(f"执行内容包含断言: 期望内容='{truncate_text(str(expected_content))}'")
         try:
             if response is None:
                 raise ValueError("响应对象为空")
 
-            actual_content = response.text if hasattr(response, 'text') else str(response)
-            logger.debug(f"实际内容: {actual_content}")
+            if expected_json is None:
+                expected_json = JsonMatcher.parse_expected(expected_content)
+
+            if expected_json is not None:
+                try:
+                    actual_json = get_response_json(response)
+                except (ValueError, TypeError):
+                    stream_info = getattr(response, 'stream_info', None)
+                    if stream_info and stream_info['truncated']:
+                        # 响应体被截断时只剩前缀，退回文本比较会丢失改用 full 的提示
+                        raise
+                    logger.debug("响应不是JSON格式，按普通文本比较")
+                else:
+                    logger.debug("检测到JSON格式内容，进行结构化子集匹配")
+                    # 先用遇到差异即返回的匹配判断，只有失败时才做完整的差异比较
+                    if JsonMatcher.find_mismatch(expected_json, actual_json):
+                        diff = diff_json(expected_json, actual_json, subset=True)
+                        raise JsonMismatchError(f"响应JSON与期望内容不匹配，{diff.format()}\n{message}".rstrip(), diff)
+                    logger.info("断言成功: 响应JSON包含期望的结构和值")
+                    return True
 
-            # 如果期望内容和实际内容都是JSON格式，进行标准化比较
-            if AssertHandler._is_json_string(expected_content) and AssertHandler._is_json_string(actual_content):
-                logger.debug("检测到JSON格式内容，进行标准化比较")
-                expected_normalized = AssertHandler._normalize_json_string(expected_content)
-                actual_normalized = AssertHandler._normalize_json_string(actual_content)
-                
-                assert expected_normalized in actual_normalized, f"标准化后的期望内容 '{expected_normalized}' 未找到. {message}"
-                logger.info(f"断言成功: 响应内容包含标准化后的 '{expected_normalized}'")
-            else:
-                # 普通文本比较
-                assert expected_content in actual_content, f"期望内容 '{expected_content}' 未找到. {message}"
-                logger.info(f"断言成功: 响应内容包含 '{expected_content}'")
-            
+            # 普通文本比较
+            actual_content = get_response_text(response)
+            logger.debug(f"实际内容: {truncate_text(actual_content, 1000)}")
+            assert expected_content in actual_content, \
+                f"期望内容 '{truncate_text(str(expected_content))}' 未找到（响应共 {len(actual_content)} 个字符）. {message}"
+            logger.info(f"断言成功: 响应内容包含 '{truncate_text(str(expected_content))}'")
             return True
 
         except AssertionError as e:
@@ -126,30 +158,6 @@ class AssertHandler:
             logger.error(f"内容包含断言异常: {str(e)}")
             raise e
 
-    @staticmethod
-    def _is_json_string(text: str) -> bool:
-        """判断字符串是否为JSON格式"""
-        try:
-            json.loads(text)
-            return True
-        except (json.JSONDecodeError, TypeError):
-            return False
-
-    @staticmethod
-    def _normalize_json_string(json_str: str) -> str:
-        """标准化JSON字符串，移除多余空格和换行符"""
-        try:
-            # 解析JSON字符串
-            parsed_json = json.loads(json_str)
-            # 重新序列化为紧凑格式
-            normalized = json.dumps(parsed_json, separators=(',', ':'), ensure_ascii=False)
-            logger.debug(f"标准化JSON字符串: {normalized}")
-            return normalized
-        except (json.JSONDecodeError, TypeError) as e:
-            logger.warning(f"JSON标准化失败: {e}, 返回原始字符串")
-            # 如果标准化失败，移除多余空格和换行符
-            return re.sub(r'\s+', ' ', json_str.strip())
-
     @staticmethod
     def assert_regex(response, expected_pattern: str, message: str = "") -> bool:
         """断言响应内容匹配正则表达式"""
@@ -158,7 +166,7 @@ class AssertHandler:
             if not response:
                 raise ValueError("响应对象为空")
 
-            actual_content = response.text if hasattr(response, 'text') else str(response)
+            actual_content = get_response_text(response)
             logger.debug(f"实际内容: {actual_content}")
 
             assert re.search(expected_pattern, actual_content), f"正则表达式 '{expected_pattern}' 未匹配. {message}"
@@ -173,40 +181,33 @@ class AssertHandler:
             raise e
 
     @staticmethod
-    def assert_json_structure(response, expected_structure: Dict, message: str = "") -> bool:
-        """断言JSON结构符合预期"""
+    def assert_json_structure(response, expected_structure: Any, message: str = "",
+                              options: Optional[SchemaOptions] = None) -> bool:
+        """
+        断言JSON结构符合预期
+
+        示例结构按内容缓存编译结果，数组默认校验全部元素，可通过options切换为抽样校验或限制深度
+
+        Args:
+            response: 响应对象
+            expected_structure: 示例结构（可由 core.schema_validator.infer_schema 从记录的响应推断）
+            message (str): 附加的失败信息
+            options (SchemaOptions): 校验参数
+        """
         logger.debug(f"执行JSON结构断言: 期望结构={expected_structure}")
         try:
-            if not response:
+            if response is None:
                 raise ValueError("响应对象为空")
 
             try:
-                response_json = response.json() if hasattr(response, 'json') else json.loads(response)
-                logger.debug(f"响应JSON: {response_json}")
-            except json.JSONDecodeError:
+                response_json = get_response_json(response)
+            except (ValueError, TypeError):
                 raise ValueError("响应不是有效的JSON格式")
 
-            def check_structure(actual, expected):
-                if isinstance(expected, dict):
-                    if not isinstance(actual, dict):
-                        return False
-                    for key, value in expected.items():
-                        if key not in actual:
-                            return False
-                        if not check_structure(actual[key], value):
-                            return False
-                    return True
-                elif isinstance(expected, list):
-                    if not isinstance(actual, list):
-                        return False
-                    if len(expected) > 0 and len(actual) > 0:
-                        return check_structure(actual[0], expected[0])
-                    return True
-                else:
-                    return isinstance(actual, type(expected))
-
-            assert check_structure(response_json,
-                                   expected_structure), f"实际结构: {response_json}, 期望结构: {expected_structure}. {message}"
+            mismatch = compile_schema(expected_structure).find_mismatch(response_json, options)
+            if mismatch:
+                pointer, reason = mismatch
+                raise AssertionError(f"JSON结构不符合: 路径 '{pointer or '/'}' {reason}. {message}")
             logger.info("断言成功: JSON结构符合预期")
             return True
 
@@ -0,0 +1,135 @@
+from typing import Any, Callable, List, Tuple
+
+from core.json_diff import truncate_text
+from core.json_path import compile_path
+from core.validators import compile_expression, split_expressions
+from utils.logger import logger
+
+
+class AssertionCheck:
+    """断言计划中的单个检查项"""
+
+    def __init__(self, name: str, description: str, func: Callable[[Any, Any], Any]):
+        self.name = name
+        self.description = description
+        self.func = func
+
+    def __repr__(self):
+        return f"AssertionCheck({self.name}: {self.description})"
+
+
+class AssertionPlan:
+    """
+    用例断言计划
+
+    加载用例时把 expected_status、expected_content、json_path/expected_json_value
+    和 validate 列编译为检查项列表，执行时针对同一个ResponseView依次运行，
+    收集全部失败后一次性报告
+    """
+
+    def __init__(self, checks: List[AssertionCheck]):
+        self.checks = checks
+
+    def __repr__(self):
+        return f"AssertionPlan({[check.name for check in self.checks]})"
+
+    def __len__(self):
+        return len(self.checks)
+
+    @classmethod
+    def compile(cls, case: dict) -> 'AssertionPlan':
+        """
+        把用例中的断言字段编译为断言计划
+
+        Args:
+            case (dict): 测试用例数据
+
+        Returns:
+            AssertionPlan: 断言计划
+        """
+        checks = []
+
+        expected_status = str(case.get('expected_status', '')).strip()
+        if expected_status:
+            if expected_status.isdigit():
+                status = int(expected_status)
+                checks.append(AssertionCheck(
+                    '状态码断言', f"期望 {status}",
+                    lambda view, handler: handler.assert_status_code(view, status)))
+            else:
+                checks.append(AssertionCheck(
+                    '状态码断言', f"期望包含 {expected_status}",
+                    lambda view, handler: handler.assert_content_contains(view.status_code, expected_status)))
+
+        expected_content = case.get('expected_content', '')
+        if expected_content:
+            expected_json = case.get('expected_content_json')
+            checks.append(AssertionCheck(
+                '内容断言', f"期望包含 '{truncate_text(expected_content)}'",
+                lambda view, handler: handler.assert_content_contains(
+                    view, expected_content, expected_json=expected_json)))
+
+        json_path = case.get('json_path', '')
+        expected_json_value = case.get('expected_json_value', '')
+        if json_path and expected_json_value:
+            # 预编译路径，执行时直接命中缓存
+            compile_path(json_path)
+            checks.append(AssertionCheck(
+                'JSON值断言', f"路径 {json_path}, 期望值 {expected_json_value}",
+                lambda view, handler: handler.assert_json_value(view, json_path, expected_json_value)))
+
+        validate = case.get('validate', '')
+        if validate:
+            checks.extend(cls._compile_validate(validate))
+
+        return cls(checks)
+
+    @staticmethod
+    def _compile_validate(validate: str) -> List[AssertionCheck]:
+        """
+        编译 validate 列，每条表达式对应一个检查项（语法见 core/validators.py）
+
+        Args:
+            validate (str): validate 列内容
+
+        Returns:
+            list: 检查项列表
+        """
+        checks = []
+        for expression in split_expressions(validate):
+            try:
+                validator = compile_expression(expression)
+            except ValueError as e:
+                # 语法错误不影响整个文件的加载，而是让该用例在执行时报告失败
+                logger.error(f"validate表达式编译失败: {str(e)}")
+                error = str(e)
+
+                def validator(view, error=error):
+                    raise ValueError(error)
+            checks.append(AssertionCheck(
+                'validate断言', expression,
+                lambda view, handler, v=validator: v(view)))
+        return checks
+
+    def run(self, view, assert_handler) -> List[Tuple[AssertionCheck, str, Any]]:
+        """
+        针对同一个响应视图执行全部检查项
+
+        Args:
+            view (ResponseView): 响应视图
+            assert_handler (AssertHandler): 断言处理器
+
+        Returns:
+            list: 失败的 (检查项, 失败原因, JSON差异) 列表，JSON差异只有JSON比较失败时才有，否则为None；
+                  全部通过时为空列表
+        """
+        failures = []
+        for check in self.checks:
+            logger.info(f"执行{check.name}: {check.description}")
+            try:
+                check.func(view, assert_handler)
+            except AssertionError as e:
+                failures.append((check, f"{check.name}失败: {str(e)}", getattr(e, 'diff', None)))
+            except Exception as e:
+                failures.append((check, f"{check.name}异常: {str(e)}", None))
+        return failures
@@ -0,0 +1,308 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from utils.common_utils import CommonUtils
+from utils.logger import logger
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+# 记录时去掉的响应头：响应体已解压保存，重放时不能再按这些头处理
+_DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 录制流式响应时，响应体超过该大小后暂存到磁盘临时文件
+_SPOOL_MAX_SIZE = 1024 * 1024
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """重放模式下磁带中没有对应请求的记录"""
+
+
+def normalize_url(url: str) -> str:
+    """规范化URL：协议和主机小写、去掉默认端口和锚点、查询参数排序"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    netloc = host
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+def request_key(method: str, url: str, body) -> str:
+    """
+    生成磁带索引键：请求方法 + 规范化URL + 请求体哈希
+
+    Args:
+        method (str): 请求方法
+        url (str): 完整URL
+        body (bytes|str|None): 请求体
+
+    Returns:
+        str: 索引键
+    """
+    if body is None:
+        body = b''
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    elif not isinstance(body, bytes):
+        # 文件等流式请求体无法哈希，只按方法和URL区分
+        body = b''
+    body_hash = hashlib.sha1(body).hexdigest()
+    return f"{method.upper()} {normalize_url(url)} {body_hash}"
+
+
+def strip_host(key: str) -> str:
+    """
+    去掉索引键中的协议、主机和端口，只保留请求方法 + 路径和查询参数 + 请求体哈希
+
+    Args:
+        key (str): request_key() 生成的索引键
+
+    Returns:
+        str: 与 base_url 无关的匹配键
+    """
+    method, rest = key.split(' ', 1)
+    url, body_hash = rest.rsplit(' ', 1)
+    parts = urlsplit(url)
+    return f"{method} {urlunsplit(('', '', parts.path or '/', parts.query, ''))} {body_hash}"
+
+
+class Cassette:
+    """
+    请求/响应磁带
+
+    数据文件由连续的记录组成，每条记录是一行JSON头（状态码、响应头等）加原始响应体；
+    索引文件（同名加 .idx）保存 索引键 -> [(偏移, 长度), ...]。
+    重放时数据文件以mmap方式只读映射，按索引直接切片读取记录。
+    同一请求记录了多次时，重放按记录顺序依次返回，之后一直返回最后一条。
+
+    索引键总是包含完整URL；重放默认按 strip_host() 忽略协议、主机和端口匹配，
+    在一个环境录制的磁带可以在其他 base_url（如本地桩服务）下重放，match_host=True 时按完整URL匹配
+    """
+
+    def __init__(self, path: str, mode: str, match_host: bool = False):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"不支持的磁带模式: {mode}")
+        self.path = path
+        self.mode = mode
+        self.match_host = match_host
+        self.index_path = path + '.idx'
+        self._lock = threading.Lock()
+        self._index: Dict[str, List[List[int]]] = {}
+        # 重放时的匹配键 -> 记录位置（按记录顺序）
+        self._lookup_index: Dict[str, List[List[int]]] = {}
+        self._replay_positions: Dict[str, int] = {}
+        self._file = None
+        self._mmap = None
+
+        if mode == MODE_RECORD:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, 'wb')
+            logger.info(f"磁带录制模式，写入: {path}")
+        else:
+            self._open_for_replay()
+            logger.info(f"磁带重放模式，读取: {path}，共 {len(self._index)} 个请求")
+
+    def _open_for_replay(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"磁带文件不存在: {self.path}")
+        self._file = open(self.path, 'rb')
+        if os.path.getsize(self.path) > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+        else:
+            self._index = self._rebuild_index()
+        for key, entries in self._index.items():
+            self._lookup_index.setdefault(self.match_key(key), []).extend(entries)
+        if not self.match_host:
+            # 不同主机的同一请求合并后仍按记录顺序返回
+            for entries in self._lookup_index.values():
+                entries.sort()
+
+    def match_key(self, key: str) -> str:
+        """把索引键转换为重放时的匹配键"""
+        return key if self.match_host else strip_host(key)
+
+    def _rebuild_index(self) -> Dict[str, List[List[int]]]:
+        """索引文件丢失时顺序扫描数据文件重建索引"""
+        logger.warning(f"磁带索引文件不存在，扫描数据文件重建: {self.index_path}")
+        index = {}
+        offset = 0
+        size = len(self._mmap) if self._mmap is not None else 0
+        while offset < size:
+            line_end = self._mmap.find(b'\n', offset)
+            header = json.loads(self._mmap[offset:line_end].decode('utf-8'))
+            length = line_end + 1 - offset + header['body_length']
+            index.setdefault(header['key'], []).append([offset, length])
+            offset += length
+        return index
+
+    @staticmethod
+    def _record_header(key: str, request: requests.PreparedRequest, response: requests.Response,
+                       body_length: int) -> bytes:
+        headers = [[k, v] for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS]
+        header = {
+            'key': key,
+            'method': request.method,
+            'url': request.url,
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'headers': headers,
+            'body_length': body_length,
+        }
+        return json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def record(self, key: str, request: requests.PreparedRequest, response: requests.Response):
+        """追加一条请求/响应记录"""
+        body = response.content or b''
+        data = self._record_header(key, request, response, len(body)) + body
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(data)
+            self._index.setdefault(key, []).append([offset, len(data)])
+        logger.debug(f"磁带记录: {key}")
+
+    def record_stream(self, key: str, request: requests.PreparedRequest, response: requests.Response,
+                      body_file) -> None:
+        """追加一条流式响应的记录，响应体从已写完的临时文件复制，不整体读入内存"""
+        body_length = body_file.tell()
+        body_file.seek(0)
+        header = self._record_header(key, request, response, body_length)
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(header)
+            shutil.copyfileobj(body_file, self._file)
+            self._index.setdefault(key, []).append([offset, len(header) + body_length])
+        logger.debug(f"磁带记录（流式）: {key}")
+
+    def keys(self) -> List[str]:
+        """返回磁带中记录的全部索引键"""
+        return list(self._index)
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """
+        按索引键读取记录（按 match_host 决定是否比较主机）
+
+        Returns:
+            dict: 记录头，响应体在 'body' 字段；未记录时返回None
+        """
+        key = self.match_key(key)
+        entries = self._lookup_index.get(key)
+        if not entries or self._mmap is None:
+            return None
+        with self._lock:
+            position = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = min(position + 1, len(entries) - 1)
+        offset, length = entries[position]
+        line_end = self._mmap.find(b'\n', offset, offset + length)
+        header = json.loads(self._mmap[offset:line_end].decode('utf-8'))
+        header['body'] = self._mmap[line_end + 1:offset + length]
+        return header
+
+    def close(self):
+        """关闭磁带，录制模式下落盘索引文件"""
+        with self._lock:
+            if self.mode == MODE_RECORD and self._file is not None and not self._file.closed:
+                self._file.close()
+                CommonUtils.write_atomic(self.index_path, json.dumps(self._index, ensure_ascii=False))
+                logger.info(f"磁带录制完成: {self.path}，共 {len(self._index)} 个请求")
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if self._file is not None and not self._file.closed:
+                self._file.close()
+
+
+class StreamRecorder:
+    """
+    流式响应的录制器
+
+    读取方每读到一块响应体就调用 write()，读完后调用 finish() 写入磁带；
+    响应体暂存在 SpooledTemporaryFile 中，超过1MB后转存磁盘，录制时内存占用同样有上限
+    """
+
+    def __init__(self, cassette: Cassette, key: str, request: requests.PreparedRequest,
+                 response: requests.Response):
+        self.cassette = cassette
+        self.key = key
+        self.request = request
+        self.response = response
+        self._spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+
+    def write(self, chunk: bytes):
+        self._spool.write(chunk)
+
+    def finish(self):
+        if self._spool.closed:
+            return
+        try:
+            self.cassette.record_stream(self.key, self.request, self.response, self._spool)
+        finally:
+            self._spool.close()
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    磁带传输适配器
+
+    包装真实的传输适配器：录制模式下转发请求并记录响应，重放模式下完全不访问网络
+    """
+
+    def __init__(self, cassette: Cassette, inner: BaseAdapter):
+        super().__init__()
+        self.cassette = cassette
+        self.inner = inner
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_key(request.method, request.url, request.body)
+
+        if self.cassette.mode == MODE_REPLAY:
+            record = self.cassette.lookup(key)
+            if record is None:
+                raise CassetteMissError(f"磁带中没有该请求的记录: {key}", request=request)
+            return self._build_response(request, record)
+
+        response = self.inner.send(request, stream=stream, timeout=timeout, verify=verify,
+                                   cert=cert, proxies=proxies)
+        if stream:
+            # 流式响应不在这里读取响应体，由读取方边读边写入录制器（见 RequestHandler._consume_stream）
+            response.cassette_recorder = StreamRecorder(self.cassette, key, request, response)
+        else:
+            self.cassette.record(key, request, response)
+        return response
+
+    def _build_response(self, request, record: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = record['status_code']
+        response.reason = record['reason']
+        response.headers = CaseInsensitiveDict(record['headers'])
+        body = bytes(record['body'])
+        response._content = body
+        # 响应体已在内存中：标记为已读取，iter_content() 按切片返回，close() 不再访问连接
+        response._content_consumed = True
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        self.inner.close()
@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from core.cassette import CassetteMissError
+from utils.logger import logger
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """熔断器打开期间直接拒绝请求"""
+
+
+def is_connection_failure(error: BaseException) -> bool:
+    """是否为说明主机不可达的失败（建连失败、连接中断或超时），收到任何HTTP响应都不算"""
+    if isinstance(error, (CircuitOpenError, CassetteMissError)):
+        return False
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class CircuitBreaker:
+    """
+    单个主机的熔断器（线程安全）
+
+    连续 failure_threshold 次连接失败后打开，打开期间的请求立即失败；
+    经过 recovery_timeout 秒后进入半开状态，只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, host: str, failure_threshold: int = 5, recovery_timeout: float = 10.0):
+        """
+        Args:
+            host (str): 主机（host:port）
+            failure_threshold (int): 打开熔断器所需的连续连接失败次数
+            recovery_timeout (float): 打开后多少秒进行一次探测
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """
+        发送请求前检查熔断状态
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或半开状态下已有探测请求在进行
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return
+            if self.state == STATE_OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self.state = STATE_HALF_OPEN
+                self._probing = False
+            if self.state == STATE_HALF_OPEN and not self._probing:
+                self._probing = True
+                logger.info(f"熔断器半开，发送探测请求: {self.host}")
+                return
+            self.rejected += 1
+            remaining = max(self.recovery_timeout - (time.monotonic() - self._opened_at), 0.0)
+            message = (f"主机 {self.host} 连续 {self.failures} 次连接失败，熔断器已打开，请求直接失败"
+                       f"（{remaining:.1f}秒后探测恢复）；最近一次错误: {self.last_error}")
+        raise CircuitOpenError(message)
+
+    def record_success(self):
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                logger.info(f"探测请求成功，熔断器关闭: {self.host}")
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, error: BaseException):
+        with self._lock:
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            if self.state == STATE_HALF_OPEN or (self.state == STATE_CLOSED
+                                                 and self.failures >= self.failure_threshold):
+                if self.state == STATE_CLOSED:
+                    self.opened += 1
+                self.state = STATE_OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+                logger.error(f"主机 {self.host} 连续 {self.failures} 次连接失败，熔断器打开，"
+                             f"{self.recovery_timeout}秒后探测恢复；最近一次错误: {self.last_error}")
+
+    def cancel_probe(self):
+        """请求因与连接无关的原因失败（如URL不合法），不能说明主机状态，允许下一个请求继续探测"""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'opened': self.opened,
+                    'rejected': self.rejected, 'last_error': self.last_error}
+
+
+class CircuitBreakerRegistry:
+    """按主机区分的熔断器集合，failure_threshold 为0时不启用"""
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def get(self, url: str) -> Optional[CircuitBreaker]:
+        """返回URL所属主机的熔断器，未启用时返回None"""
+        if not self.enabled:
+            return None
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(host, self.failure_threshold, self.recovery_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.host: breaker.snapshot() for breaker in breakers}
@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from utils.common_utils import CommonUtils
+from utils.logger import logger
+
+
+class CredentialCache:
+    """
+    登录凭证缓存：把登录用例提取的认证变量（如token）按"环境 + 用户"持久化到磁盘
+
+    缓存未过期时登录用例直接恢复变量，不再发送登录请求；跨用例、跨执行复用。
+    使用缓存凭证的请求返回401时，清除该用户的缓存并重新执行刷新用例（最近一次的登录用例，
+    或 refresh_case 配置的用例）
+    """
+
+    def __init__(self, path: str, env: str, ttl: float = 3600, login_url: str = '/api/login',
+                 variables: Iterable[str] = ('token',), user_field: str = 'username',
+                 refresh_case: Optional[dict] = None):
+        """
+        Args:
+            path (str): 缓存文件路径
+            env (str): 环境标识（通常为base_url），不同环境的凭证互不影响
+            ttl (float): 凭证有效期（秒）
+            login_url (str): 登录接口路径，URL路径与之相同的用例视为登录用例
+            variables (iterable): 需要缓存的认证变量名
+            user_field (str): 登录请求体中表示用户的字段
+            refresh_case (dict): 本次执行中还没有遇到登录用例时，401后用于刷新凭证的用例
+        """
+        self.path = path
+        self.env = env
+        self.ttl = ttl
+        self.login_path = urlsplit(login_url).path.rstrip('/') or '/'
+        self.variables = tuple(v.strip() for v in variables if v.strip())
+        self.user_field = user_field
+        self.default_refresh_case = refresh_case
+        # 当前生效的凭证属于哪个用户、是否来自缓存
+        self.active_user: Optional[str] = None
+        self.active_from_cache = False
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'refreshed': 0}
+        self._login_cases: Dict[str, dict] = {}
+        self._placeholder = re.compile(
+            r'(?:\$\{|\{\{)\s*(' + '|'.join(re.escape(v) for v in self.variables) + r')\s*(?:\}\}|\})'
+        ) if self.variables else None
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取凭证缓存失败，忽略缓存: {self.path}: {e}")
+            return {}
+        now = time.time()
+        return {key: entry for key, entry in entries.items() if entry.get('expires_at', 0) > now}
+
+    def _save(self):
+        CommonUtils.write_atomic(self.path, json.dumps(self._entries, ensure_ascii=False, indent=2))
+
+    def _key(self, user: str) -> str:
+        return f"{self.env}|{user}"
+
+    def is_login_case(self, url: str) -> bool:
+        """URL路径与登录接口相同的用例视为登录用例"""
+        return (urlsplit(url).path.rstrip('/') or '/') == self.login_path
+
+    @staticmethod
+    def extracted_names(case: dict) -> List[str]:
+        """用例提取的全部变量名（extract_key 中的 变量名=路径 以及 save_var_name）"""
+        names = []
+        for item in str(case.get('extract_key') or '').split(';'):
+            name = item.split('=', 1)[0].strip()
+            if name and name not in names:
+                names.append(name)
+        save_var_name = str(case.get('save_var_name') or '').strip()
+        if save_var_name and save_var_name not in names:
+            names.append(save_var_name)
+        return names
+
+    def extracts_credentials(self, case: dict) -> bool:
+        """用例是否提取需要缓存的认证变量（登录失败之类的反向用例不提取，不能跳过）"""
+        return bool(set(self.extracted_names(case)).intersection(self.variables))
+
+    def user_of(self, body: Any) -> str:
+        """从登录请求体中取用户标识"""
+        if isinstance(body, dict):
+            return str(body.get(self.user_field, ''))
+        return ''
+
+    def references_credentials(self, case: dict) -> bool:
+        """用例的请求中是否引用了缓存的认证变量"""
+        if self._placeholder is None:
+            return False
+        return any(self._placeholder.search(str(case.get(field) or ''))
+                   for field in ('url', 'headers', 'params', 'body'))
+
+    def get(self, user: str) -> Optional[Dict[str, str]]:
+        """
+        读取未过期的凭证
+
+        Returns:
+            dict: 认证变量，未缓存或已过期时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(user))
+            if entry is None or entry['expires_at'] <= time.time():
+                self.stats['misses'] += 1
+                return None
+            self.stats['hits'] += 1
+            return dict(entry['variables'])
+
+    def put(self, user: str, values: Dict[str, str]):
+        """
+        保存登录用例提取的变量
+
+        除认证变量外，登录用例提取的其他变量（如用户ID）也一并缓存，命中缓存跳过登录请求时全部恢复
+
+        Args:
+            user (str): 用户标识
+            values (dict): 登录用例提取的变量，没有提取到任何认证变量时不缓存
+        """
+        values = {name: value for name, value in values.items() if value}
+        if not any(name in values for name in self.variables):
+            return
+        with self._lock:
+            self._entries[self._key(user)] = {
+                'variables': values,
+                'created_at': time.time(),
+                'expires_at': time.time() + self.ttl,
+            }
+            self.stats['stored'] += 1
+            self._save()
+        logger.info(f"登录凭证已缓存: 环境={self.env}, 用户={user}, 有效期={self.ttl}秒")
+
+    def invalidate(self, user: str):
+        """清除指定用户的凭证"""
+        with self._lock:
+            if self._entries.pop(self._key(user), None) is not None:
+                self._save()
+
+    def remember_login_case(self, user: str, case: dict):
+        """记录用户对应的登录用例，401时用于刷新凭证"""
+        self._login_cases[user] = case
+
+    def refresh_case(self, user: str) -> Optional[dict]:
+        """返回刷新凭证用的用例"""
+        return self._login_cases.get(user) or self.default_refresh_case
@@ -1,27 +1,60 @@
+import logging
 import re
+from functools import lru_cache
 
+from core.template_functions import compile_template
+from core.variable_store import SCOPE_ITERATION, VariableContext, new_chain_context
 from utils.logger import logger
 
+_PATH_PART = re.compile(r'[^.\[\]]+|\[\d+\]')
+
+
+@lru_cache(maxsize=1024)
+def _path_tokens(extract_key):
+    """把提取路径拆分为路径片段元组（与 _extract_single_value 的解析规则一致）"""
+    return tuple(int(part[1:-1]) if part.startswith('[') else part for part in _PATH_PART.findall(extract_key))
+
 
 class DataHandler:
     """
     数据处理工具类
+
+    变量保存在分层的变量上下文中（全局 -> 环境 -> 调用链 -> 迭代），默认每个DataHandler持有一条独立的调用链
     """
 
-    def __init__(self):
-        self.variables = {}
+    def __init__(self, context: VariableContext = None):
+        self.context = context if context is not None else new_chain_context()
+
+    @property
+    def variables(self):
+        """所有可见变量的快照（修改快照不会影响变量）"""
+        return self.context.snapshot()
+
+    def child(self, scope=SCOPE_ITERATION):
+        """
+        创建子上下文的DataHandler，子上下文中写入的变量不影响当前上下文
+
+        Args:
+            scope (str): 子上下文的作用域，默认为单次迭代
+
+        Returns:
+            DataHandler: 共享父级变量的新处理器
+        """
+        return DataHandler(self.context.child(scope))
 
-    def set_variable(self, key, value):
+    def set_variable(self, key, value, scope=None):
         """
         设置变量
 
         Args:
             key (str): 变量名
             value (str): 变量值
+            scope (str): 写入的作用域，默认为当前上下文
         """
-        self.variables[key] = value
+        self.context.set(key, value, scope)
         logger.info(f"设置变量: {key} = {value}")
-        logger.debug(f"当前所有变量: {self.variables}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"当前所有变量: {self.context.snapshot()}")
 
     def get_variable(self, key):
         """
@@ -33,7 +66,7 @@ class DataHandler:
         Returns:
             str: 变量值
         """
-        value = self.variables.get(key, '')
+        value = self.context.get(key, '')
         logger.debug(f"获取变量: {key} = {value}")
         return value
 
@@ -41,6 +74,9 @@ class DataHandler:
         """
         替换文本中的变量占位符，支持${variable_name}和{{variable_name}}两种格式，兼容全角字符
 
+        占位符也可以调用内置模板函数，如 ${__uuid()}、${__now(ms)}、${__rand_int(1,100)}，
+        函数在模板编译时解析为可调用对象（见 core/template_functions.py）
+
         Args:
             text (str): 包含变量占位符的文本
 
@@ -55,36 +91,29 @@ class DataHandler:
         # 处理全角字符转换为半角字符
         text = text.replace('｛', '{').replace('｝', '}')
 
-        # 匹配 ${variable_name} 格式的变量占位符
-        pattern1 = r'\$\{([^}]+)\}'
-        matches1 = re.findall(pattern1, text)
-
-        # 匹配 {{variable_name}} 格式的变量占位符
-        pattern2 = r'\{\{([^}]+)\}\}'
-        matches2 = re.findall(pattern2, text)
-
-        result = text
-        # 处理 ${variable_name} 格式
-        for match in matches1:
-            variable_value = self.get_variable(match)
-            if variable_value:
-                result = result.replace('${' + match + '}', variable_value)
-                logger.debug(f"替换变量 {match} 为 {variable_value}")
-            else:
-                logger.warning(f"变量 {match} 未找到")
-
-        # 处理 {{variable_name}} 格式
-        for match in matches2:
-            variable_value = self.get_variable(match)
-            if variable_value:
-                result = result.replace('{{' + match + '}}', variable_value)
-                logger.debug(f"替换变量 {match} 为 {variable_value}")
-            else:
-                logger.warning(f"变量 {match} 未找到")
+        result, missing = compile_template(text).render(self.get_variable)
+        for name in missing:
+            logger.warning(f"变量 {name} 未找到")
 
         logger.debug(f"替换变量后的文本: {result}")
         return result
 
+    def replace_variables_batch(self, text, count):
+        """
+        一次生成count份替换结果，用于批量构造迭代数据；uuid、rand_int等函数按批向量化生成
+
+        Args:
+            text (str): 包含变量占位符的文本
+            count (int): 生成份数
+
+        Returns:
+            list: count个替换后的文本
+        """
+        if not isinstance(text, str):
+            return [text] * count
+        text = text.replace('｛', '{').replace('｝', '}')
+        return compile_template(text).render_batch(self.get_variable, count)
+
     def extract_value(self, response_data, extract_key):
         """
         从响应数据中提取值，支持多值提取（用分号分隔）
@@ -109,6 +138,46 @@ class DataHandler:
             # 单值提取保持原有逻辑
             return self._extract_single_value(response_data, extract_key)
 
+    def extract_from_response(self, view, extract_key):
+        """
+        与 extract_value 相同，但直接从响应视图提取
+
+        JSON路径通过 view.extract 在响应文本上增量提取，找到所有路径即停止，不解析完整响应；
+        断言已经解析过完整JSON时直接复用，正则提取仍基于完整解析的JSON
+
+        Args:
+            view (ResponseView): 响应视图
+            extract_key (str): 提取键，语法同 extract_value
+
+        Returns:
+            str | dict: 单值提取返回str，多值提取返回 {变量名: 值}
+        """
+        if 'regex:' in extract_key:
+            return self.extract_value(view.json(), extract_key)
+
+        if ';' in extract_key:
+            targets = {}
+            for key in (k.strip() for k in extract_key.split(';')):
+                if '=' in key:
+                    alias, actual_key = key.split('=', 1)
+                    targets[alias.strip()] = actual_key.strip()
+                else:
+                    targets[key] = key
+        else:
+            targets = {None: extract_key}
+
+        paths = {name: _path_tokens(key) for name, key in targets.items() if key}
+        values = view.extract(set(paths.values()))
+        results = {}
+        for name, key in targets.items():
+            path = paths.get(name)
+            if path is None or path not in values:
+                results[name] = ''
+                continue
+            results[name] = str(values[path])
+            logger.info(f"JSON路径提取成功: {key} -> {results[name]}")
+        return results[None] if None in results else results
+
     def _extract_single_value(self, response_data, extract_key):
         """
         从响应数据中提取值
@@ -183,9 +252,9 @@ class DataHandler:
 
     def clear_global_vars(self):
         """
-        清空全局变量
+        清空当前上下文的变量（外层的全局/环境变量不受影响）
         """
-        self.variables.clear()
+        self.context.clear()
         logger.debug("清空全局变量")
 
     def get_all_variables(self):
@@ -193,7 +262,8 @@ class DataHandler:
         获取所有变量
 
         Returns:
-            dict: 所有变量
+            dict: 所有可见变量的快照
         """
-        logger.debug(f"获取所有变量: {self.variables}")
-        return self.variables
+        variables = self.context.snapshot()
+        logger.debug(f"获取所有变量: {variables}")
+        return variables
@@ -0,0 +1,246 @@
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from utils.logger import logger
+
+
+class TokenBucket:
+    """
+    令牌桶限速器（线程安全）
+
+    令牌按 rate 个/秒的速度补充，最多积累 burst 个；取不到令牌时预约下一个令牌并在锁外等待，
+    多个线程同时等待时按预约顺序依次放行
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate (float): 每秒允许的请求数
+            burst (int): 允许的突发请求数
+        """
+        if rate <= 0:
+            raise ValueError(f"限速必须大于0: {rate}")
+        self.rate = float(rate)
+        self.burst = max(int(burst), 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        取一个令牌，必要时阻塞等待
+
+        Returns:
+            float: 等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD自适应并发窗口（线程安全）
+
+    请求正常完成时窗口加性增长（每完成一个窗口的请求约加1），出现过载信号（429/5xx、
+    连接失败或延迟超过目标值）时窗口乘性收缩；同一个往返时间内只收缩一次，
+    避免一批并发请求同时失败把窗口直接压到最小值
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 64, backoff: float = 0.5):
+        """
+        Args:
+            initial (int): 初始并发窗口
+            min_limit (int): 最小并发窗口
+            max_limit (int): 最大并发窗口
+            backoff (float): 过载时窗口的收缩比例
+        """
+        self.min_limit = max(int(min_limit), 1)
+        self.max_limit = max(int(max_limit), self.min_limit)
+        self.backoff = backoff
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._inflight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def acquire(self) -> float:
+        """
+        占用一个并发名额，窗口已满时阻塞等待
+
+        Returns:
+            float: 等待的秒数
+        """
+        start = time.monotonic()
+        with self._cond:
+            while self._inflight >= self.limit:
+                self._cond.wait()
+            self._inflight += 1
+        return time.monotonic() - start
+
+    def release(self, latency: float, overloaded: bool):
+        """
+        归还并发名额并根据本次请求的结果调整窗口
+
+        Args:
+            latency (float): 本次请求耗时（秒）
+            overloaded (bool): 是否出现过载信号
+        """
+        with self._cond:
+            self._inflight -= 1
+            now = time.monotonic()
+            if overloaded:
+                if now - self._last_decrease >= latency:
+                    old = self.limit
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._last_decrease = now
+                    if self.limit != old:
+                        logger.info(f"检测到过载，并发窗口收缩: {old} -> {self.limit}")
+            else:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+
+class FlowPermit:
+    """一次请求占用的流控许可，请求结束后必须调用release归还"""
+
+    def __init__(self, controller: 'FlowController', host: str, waited: float):
+        self.controller = controller
+        self.host = host
+        self.waited = waited
+        self._start = time.monotonic()
+        self._released = False
+
+    def release(self, status_code: Optional[int] = None, error: Optional[BaseException] = None):
+        """
+        归还许可
+
+        Args:
+            status_code (int): 响应状态码，请求异常时为None
+            error (Exception): 请求异常
+        """
+        if self._released:
+            return
+        self._released = True
+        self.controller.release(self, time.monotonic() - self._start, status_code, error)
+
+
+class FlowController:
+    """
+    按主机区分的流量控制：令牌桶限速 + 可选的AIMD自适应并发窗口
+
+    两者都未启用时acquire直接返回，不产生额外开销
+    """
+
+    def __init__(self, rate_limit: float = 0, rate_burst: int = 1, adaptive_concurrency: bool = False,
+                 concurrency_initial: int = 4, concurrency_min: int = 1, concurrency_max: int = 64,
+                 latency_target_ms: float = 0):
+        """
+        Args:
+            rate_limit (float): 每个主机每秒允许的请求数，0 表示不限速
+            rate_burst (int): 令牌桶容量，即允许的突发请求数
+            adaptive_concurrency (bool): 是否启用自适应并发窗口
+            concurrency_initial (int): 初始并发窗口
+            concurrency_min (int): 最小并发窗口
+            concurrency_max (int): 最大并发窗口
+            latency_target_ms (float): 请求耗时超过该值视为过载信号，0 表示只根据状态码和连接失败判断
+        """
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.adaptive_concurrency = adaptive_concurrency
+        self.concurrency_initial = concurrency_initial
+        self.concurrency_min = concurrency_min
+        self.concurrency_max = concurrency_max
+        self.latency_target = latency_target_ms / 1000.0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_limit > 0 or self.adaptive_concurrency
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def _get_host_state(self, host: str):
+        with self._lock:
+            if host not in self._stats:
+                if self.rate_limit > 0:
+                    self._buckets[host] = TokenBucket(self.rate_limit, self.rate_burst)
+                if self.adaptive_concurrency:
+                    self._limiters[host] = AdaptiveConcurrencyLimiter(
+                        self.concurrency_initial, self.concurrency_min, self.concurrency_max)
+                self._stats[host] = {'requests': 0, 'overloaded': 0, 'rate_wait_seconds': 0.0,
+                                     'concurrency_wait_seconds': 0.0}
+            return self._buckets.get(host), self._limiters.get(host), self._stats[host]
+
+    def acquire(self, url: str) -> Optional[FlowPermit]:
+        """
+        发送请求前取得许可：先按令牌桶限速，再等待并发窗口
+
+        Args:
+            url (str): 请求URL
+
+        Returns:
+            FlowPermit: 流控许可；未启用流控时返回None
+        """
+        if not self.enabled:
+            return None
+        host = self.host_key(url)
+        bucket, limiter, stats = self._get_host_state(host)
+        rate_wait = bucket.acquire() if bucket else 0.0
+        concurrency_wait = limiter.acquire() if limiter else 0.0
+        with self._lock:
+            stats['requests'] += 1
+            stats['rate_wait_seconds'] += rate_wait
+            stats['concurrency_wait_seconds'] += concurrency_wait
+        return FlowPermit(self, host, rate_wait + concurrency_wait)
+
+    def is_overloaded(self, latency: float, status_code: Optional[int], error: Optional[BaseException]) -> bool:
+        """判断一次请求的结果是否为过载信号"""
+        if error is not None:
+            return True
+        if status_code is not None and (status_code == 429 or status_code >= 500):
+            return True
+        return bool(self.latency_target) and latency > self.latency_target
+
+    def release(self, permit: FlowPermit, latency: float, status_code: Optional[int],
+                error: Optional[BaseException]):
+        overloaded = self.is_overloaded(latency, status_code, error)
+        limiter = self._limiters.get(permit.host)
+        if limiter:
+            limiter.release(latency, overloaded)
+        if overloaded:
+            with self._lock:
+                self._stats[permit.host]['overloaded'] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """返回每个主机的流控统计"""
+        with self._lock:
+            result = {}
+            for host, stats in self._stats.items():
+                entry = dict(stats)
+                entry['rate_wait_seconds'] = round(entry['rate_wait_seconds'], 3)
+                entry['concurrency_wait_seconds'] = round(entry['concurrency_wait_seconds'], 3)
+                if host in self._limiters:
+                    entry['concurrency_limit'] = self._limiters[host].limit
+                result[host] = entry
+            return result
@@ -0,0 +1,232 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.json_matcher import JsonMatcher
+
+# 最多记录的差异条数（之后只计数），以及最多比较的节点数（超过后停止比较）
+MAX_CHANGES = 200
+MAX_NODES = 1000000
+# 报告中每个值的最大显示长度
+VALUE_PREVIEW = 120
+# 失败信息中列出的差异条数
+REPORT_LINES = 20
+
+CHANGED = 'changed'
+ADDED = 'added'
+REMOVED = 'removed'
+
+_SYMBOLS = {CHANGED: '~', ADDED: '+', REMOVED: '-'}
+_MISSING = object()
+
+
+def _iter_tokens(value: Any, limit: int) -> Iterator[str]:
+    """按JSON格式逐段输出值，长字符串先截断，调用方拿够长度后即可停止"""
+    if isinstance(value, dict):
+        yield '{'
+        for index, (key, child) in enumerate(value.items()):
+            if index:
+                yield ', '
+            yield json.dumps(str(key)[:limit], ensure_ascii=False)
+            yield ': '
+            yield from _iter_tokens(child, limit)
+        yield '}'
+    elif isinstance(value, list):
+        yield '['
+        for index, child in enumerate(value):
+            if index:
+                yield ', '
+            yield from _iter_tokens(child, limit)
+        yield ']'
+    elif isinstance(value, str) and len(value) > limit:
+        yield json.dumps(value[:limit], ensure_ascii=False)
+    else:
+        yield json.dumps(value, ensure_ascii=False, default=str)
+
+
+def preview_value(value: Any, limit: int = VALUE_PREVIEW) -> str:
+    """
+    生成值的截断预览，耗时只与 limit 有关，不随值的大小增长
+
+    Args:
+        value: JSON值
+        limit (int): 最大显示长度
+
+    Returns:
+        str: JSON格式的预览，超长时以 … 结尾
+    """
+    pieces = []
+    size = 0
+    for token in _iter_tokens(value, limit):
+        pieces.append(token)
+        size += len(token)
+        if size > limit:
+            return ''.join(pieces)[:limit] + '…'
+    return ''.join(pieces)
+
+
+def truncate_text(text: str, limit: int = VALUE_PREVIEW) -> str:
+    """截断普通文本，超长时注明原长度"""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}…（共 {len(text)} 个字符）"
+
+
+class JsonChange:
+    """一处差异：op 为 changed/added/removed，expected/actual 为两侧的值（不存在的一侧为None）"""
+
+    __slots__ = ('op', 'pointer', 'expected', 'actual')
+
+    def __init__(self, op: str, pointer: str, expected: Any = None, actual: Any = None):
+        self.op = op
+        self.pointer = pointer
+        self.expected = expected
+        self.actual = actual
+
+    def __repr__(self):
+        return f"JsonChange({self.op} {self.pointer or '/'})"
+
+    def describe(self, limit: int = VALUE_PREVIEW) -> str:
+        pointer = self.pointer or '/'
+        if self.op == REMOVED:
+            return f"- {pointer}: 实际缺少，期望 {preview_value(self.expected, limit)}"
+        if self.op == ADDED:
+            return f"+ {pointer}: 实际多出 {preview_value(self.actual, limit)}"
+        return f"~ {pointer}: 期望 {preview_value(self.expected, limit)}，实际 {preview_value(self.actual, limit)}"
+
+    def to_dict(self, limit: int = VALUE_PREVIEW) -> Dict[str, str]:
+        result = {'op': self.op, 'path': self.pointer or '/'}
+        if self.op != ADDED:
+            result['expected'] = preview_value(self.expected, limit)
+        if self.op != REMOVED:
+            result['actual'] = preview_value(self.actual, limit)
+        return result
+
+
+class JsonDiff:
+    """
+    比较结果
+
+    changes 只保留前 max_changes 条，counts 统计全部差异；比较的节点数超过上限时 complete 为False
+    """
+
+    def __init__(self, max_changes: int):
+        self.changes: List[JsonChange] = []
+        self.counts = {CHANGED: 0, ADDED: 0, REMOVED: 0}
+        self.max_changes = max_changes
+        self.nodes = 0
+        self.complete = True
+
+    def __bool__(self):
+        return self.total > 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def _record(self, op: str, pointer: str, expected: Any = None, actual: Any = None):
+        self.counts[op] += 1
+        if len(self.changes) < self.max_changes:
+            self.changes.append(JsonChange(op, pointer, expected, actual))
+
+    def summary(self) -> str:
+        text = (f"共 {self.total} 处差异（变更 {self.counts[CHANGED]}，缺少 {self.counts[REMOVED]}，"
+                f"多出 {self.counts[ADDED]}）")
+        if not self.complete:
+            text += f"，文档过大，只比较了前 {self.nodes} 个节点"
+        return text
+
+    def format(self, max_lines: int = REPORT_LINES, limit: int = VALUE_PREVIEW) -> str:
+        """
+        格式化为多行文本：第一行为汇总，之后每行一处差异（~ 变更、- 缺少、+ 多出）
+
+        Args:
+            max_lines (int): 最多列出的差异条数
+            limit (int): 每个值的最大显示长度
+        """
+        lines = [self.summary()]
+        lines.extend(change.describe(limit) for change in self.changes[:max_lines])
+        hidden = self.total - min(len(self.changes), max_lines)
+        if hidden > 0:
+            lines.append(f"…另有 {hidden} 处差异未列出")
+        return '\n'.join(lines)
+
+    def to_dict(self, limit: int = VALUE_PREVIEW) -> Dict[str, Any]:
+        """用于Allure附件的结构化结果"""
+        return {
+            'total': self.total,
+            'counts': dict(self.counts),
+            'complete': self.complete,
+            'changes': [change.to_dict(limit) for change in self.changes],
+        }
+
+
+def _scalar_equal(expected: Any, actual: Any) -> bool:
+    # 布尔值与数字不互相等同（与 JsonMatcher 一致）
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return expected is actual
+    return expected == actual
+
+
+def diff_json(expected: Any, actual: Any, subset: bool = False,
+              max_changes: int = MAX_CHANGES, max_nodes: int = MAX_NODES) -> JsonDiff:
+    """
+    结构化比较两个JSON文档，列出所有差异的JSON Pointer
+
+    用显式栈逐个节点比较，每个节点只访问一次，耗时与文档大小成线性关系；
+    记录的差异条数和比较的节点数都有上限，超大文档的比较结果和报告大小都是有界的
+
+    Args:
+        expected: 期望文档
+        actual: 实际文档
+        subset (bool): 子集模式（与 JsonMatcher 规则一致）：实际对象/数组中多出的键和元素不算差异
+        max_changes (int): 最多记录的差异条数
+        max_nodes (int): 最多比较的节点数
+
+    Returns:
+        JsonDiff: 比较结果，没有差异时为假值
+    """
+    result = JsonDiff(max_changes)
+    escape = JsonMatcher.escape_pointer_token
+    stack = [('', expected, actual)]
+    while stack:
+        if result.nodes >= max_nodes:
+            result.complete = False
+            break
+        pointer, left, right = stack.pop()
+        result.nodes += 1
+        if left is right:
+            continue
+        if isinstance(left, dict) and isinstance(right, dict):
+            children = []
+            for key, value in left.items():
+                other = right.get(key, _MISSING)
+                child = f"{pointer}/{escape(key)}"
+                if other is _MISSING:
+                    result._record(REMOVED, child, expected=value)
+                else:
+                    children.append((child, value, other))
+            if not subset:
+                for key, value in right.items():
+                    if key not in left:
+                        result._record(ADDED, f"{pointer}/{escape(key)}", actual=value)
+            # 逆序入栈，按文档顺序报告
+            stack.extend(reversed(children))
+        elif isinstance(left, list) and isinstance(right, list):
+            common = min(len(left), len(right))
+            for index in range(len(right), len(left)):
+                result._record(REMOVED, f"{pointer}/{index}", expected=left[index])
+            if not subset:
+                for index in range(len(left), len(right)):
+                    result._record(ADDED, f"{pointer}/{index}", actual=right[index])
+            stack.extend((f"{pointer}/{index}", left[index], right[index]) for index in range(common - 1, -1, -1))
+        elif isinstance(left, (dict, list)) or isinstance(right, (dict, list)) or not _scalar_equal(left, right):
+            result._record(CHANGED, pointer, expected=left, actual=right)
+    return result
+
+
+class JsonMismatchError(AssertionError):
+    """JSON比较失败，diff 为结构化的差异结果（用于生成报告附件）"""
+
+    def __init__(self, message: str, diff: Optional[JsonDiff] = None):
+        super().__init__(message)
+        self.diff = diff
@@ -0,0 +1,82 @@
+import json
+from typing import Any, Optional, Tuple
+
+
+class JsonMatcher:
+    """判断期望JSON是否为实际JSON的子集，并给出第一个不匹配位置的JSON Pointer"""
+
+    @staticmethod
+    def parse_expected(text: str) -> Optional[Any]:
+        """
+        预解析期望内容，只有JSON对象或数组才参与结构化匹配
+
+        Args:
+            text (str): 期望内容文本
+
+        Returns:
+            dict/list: 解析后的期望文档；非JSON对象/数组时返回None
+        """
+        if not isinstance(text, str):
+            return None
+        stripped = text.strip()
+        if not stripped or stripped[0] not in '{[':
+            return None
+        try:
+            parsed = json.loads(stripped)
+        except (json.JSONDecodeError, TypeError):
+            return None
+        return parsed if isinstance(parsed, (dict, list)) else None
+
+    @staticmethod
+    def escape_pointer_token(token: Any) -> str:
+        """按RFC 6901转义JSON Pointer中的单个路径片段"""
+        return str(token).replace('~', '~0').replace('/', '~1')
+
+    @staticmethod
+    def find_mismatch(expected: Any, actual: Any, pointer: str = '') -> Optional[Tuple[str, str]]:
+        """
+        递归比较期望文档与实际文档，遇到第一个不匹配即返回
+
+        规则：
+            - 对象：期望中的每个键都必须存在于实际对象中，且值递归匹配，实际对象允许有多余的键
+            - 数组：按位置匹配，实际数组长度不能小于期望数组
+            - 标量：值相等，布尔值与数字不互相等同
+
+        Args:
+            expected: 期望的JSON文档
+            actual: 实际的JSON文档
+            pointer (str): 当前位置的JSON Pointer，根节点为空字符串
+
+        Returns:
+            tuple: (JSON Pointer, 不匹配原因)；完全匹配时返回None
+        """
+        if isinstance(expected, dict):
+            if not isinstance(actual, dict):
+                return pointer, f"期望为对象，实际为 {type(actual).__name__}"
+            for key, value in expected.items():
+                child = f"{pointer}/{JsonMatcher.escape_pointer_token(key)}"
+                if key not in actual:
+                    return child, "实际响应中缺少该字段"
+                mismatch = JsonMatcher.find_mismatch(value, actual[key], child)
+                if mismatch:
+                    return mismatch
+            return None
+
+        if isinstance(expected, list):
+            if not isinstance(actual, list):
+                return pointer, f"期望为数组，实际为 {type(actual).__name__}"
+            if len(actual) < len(expected):
+                return pointer, f"期望数组长度至少为 {len(expected)}，实际为 {len(actual)}"
+            for index, value in enumerate(expected):
+                mismatch = JsonMatcher.find_mismatch(value, actual[index], f"{pointer}/{index}")
+                if mismatch:
+                    return mismatch
+            return None
+
+        if isinstance(expected, bool) or isinstance(actual, bool):
+            if expected is actual:
+                return None
+        elif expected == actual:
+            return None
+        return pointer, (f"期望值: {json.dumps(expected, ensure_ascii=False)}, "
+                         f"实际值: {json.dumps(actual, ensure_ascii=False)}")
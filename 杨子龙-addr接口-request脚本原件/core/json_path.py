@@ -0,0 +1,61 @@
+import re
+from functools import lru_cache
+from typing import Any, Tuple
+
+# 路径片段：普通键名或 [数字] 形式的数组下标
+_TOKEN_PATTERN = re.compile(r'[^.\[\]]+|\[\d+\]')
+
+# 路径不存在时的返回标记（区别于JSON中的null）
+MISSING = object()
+
+
+@lru_cache(maxsize=1024)
+def compile_path(path: str) -> Tuple[Any, ...]:
+    """
+    把JSON路径编译为路径片段元组，结果在用例之间缓存
+
+    支持 "data[0].id"、"$.data[0].id" 和 "json.token" 三种写法
+
+    Args:
+        path (str): JSON路径
+
+    Returns:
+        tuple: 路径片段，键名为str，数组下标为int
+    """
+    path = path.strip()
+    if path.startswith('$'):
+        path = path[1:]
+    elif path.startswith('json.'):
+        path = path[5:]
+    tokens = []
+    for part in _TOKEN_PATTERN.findall(path):
+        if part.startswith('[') and part.endswith(']'):
+            tokens.append(int(part[1:-1]))
+        else:
+            tokens.append(part)
+    return tuple(tokens)
+
+
+def resolve_path(document: Any, tokens: Tuple[Any, ...]) -> Any:
+    """
+    按编译好的路径片段在JSON文档中取值
+
+    Args:
+        document: 已解析的JSON文档
+        tokens (tuple): compile_path 的结果
+
+    Returns:
+        取到的值；路径不存在时返回 MISSING
+    """
+    value = document
+    for token in tokens:
+        if isinstance(token, int):
+            if isinstance(value, list) and 0 <= token < len(value):
+                value = value[token]
+            else:
+                return MISSING
+        elif isinstance(value, dict) and token in value:
+            value = value[token]
+        else:
+            return MISSING
+    return value
@@ -0,0 +1,194 @@
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# json模块的C扫描器：解析单个值并返回结束位置
+_scan_once = json.JSONDecoder().scan_once
+
+
+class IncompleteJSONError(ValueError):
+    """JSON文本不完整或格式不合法，无法完成增量提取"""
+
+
+class _Complete(Exception):
+    """所有路径都已找到，提前结束扫描"""
+
+
+class _Node:
+    """路径前缀树的节点：children 为下一级键名/下标，targets 为在此处结束的路径"""
+
+    __slots__ = ('children', 'targets', 'max_index')
+
+    def __init__(self):
+        self.children: Dict[Any, '_Node'] = {}
+        self.targets = []
+        self.max_index = -1
+
+
+class _Scanner:
+    def __init__(self, text: str, paths: Iterable[Tuple[Any, ...]]):
+        self.text = text
+        self.root = _Node()
+        self.remaining = 0
+        self.found: Dict[Tuple[Any, ...], Any] = {}
+        for path in set(paths):
+            node = self.root
+            for token in path:
+                node = node.children.setdefault(token, _Node())
+            node.targets.append(path)
+            self.remaining += 1
+        self._index_bounds(self.root)
+
+    def _index_bounds(self, node: _Node):
+        for token, child in node.children.items():
+            if isinstance(token, int):
+                node.max_index = max(node.max_index, token)
+            self._index_bounds(child)
+
+    def _char(self, pos: int) -> str:
+        if pos >= len(self.text):
+            raise IncompleteJSONError(f"JSON在第 {pos} 个字符处意外结束")
+        return self.text[pos]
+
+    def _skip_ws(self, pos: int) -> int:
+        return _WHITESPACE.match(self.text, pos).end()
+
+    def _scan(self, pos: int) -> Tuple[Any, int]:
+        """用json模块的C扫描器解析 pos 处的单个值"""
+        try:
+            return _scan_once(self.text, pos)
+        except StopIteration as e:
+            raise IncompleteJSONError(f"第 {e.value} 个字符处不是合法的JSON值")
+        except ValueError as e:
+            raise IncompleteJSONError(str(e))
+
+    def _skip_value(self, pos: int) -> int:
+        """
+        跳过 pos 处的值
+
+        容器按下一层元素逐个交给C扫描器解析后立即丢弃，内存占用以单个元素为上限，
+        而不是整个被跳过的子树
+        """
+        char = self._char(pos)
+        if char == '{':
+            return self._each_member(pos + 1, None)
+        if char == '[':
+            return self._each_element(pos + 1, None)
+        return self._scan(pos)[1]
+
+    def _skip_child(self, pos: int, expand: bool) -> int:
+        """跳过容器中不在路径上的子值，expand 为True时再向下展开一层（用于路径上对象的兄弟成员）"""
+        pos = self._skip_ws(pos)
+        if expand:
+            return self._skip_value(pos)
+        return self._scan(pos)[1]
+
+    def _resolve_subtree(self, node: _Node, value: Any):
+        """完整解析出某个值后，直接在其中解析该节点下的所有路径"""
+        for path in node.targets:
+            self.found[path] = value
+            self.remaining -= 1
+        for token, child in node.children.items():
+            if isinstance(token, int):
+                if isinstance(value, list) and 0 <= token < len(value):
+                    self._resolve_subtree(child, value[token])
+            elif isinstance(value, dict) and token in value:
+                self._resolve_subtree(child, value[token])
+        if self.remaining == 0:
+            raise _Complete()
+
+    def walk(self, pos: int, node: _Node) -> int:
+        """扫描 pos 处的值，返回值之后的位置"""
+        pos = self._skip_ws(pos)
+        if node.targets:
+            value, end = self._scan(pos)
+            self._resolve_subtree(node, value)
+            return end
+        char = self._char(pos)
+        if char == '{':
+            return self._each_member(pos + 1, node)
+        if char == '[':
+            return self._each_element(pos + 1, node)
+        # 路径要求继续深入，但这里是标量：这些路径不存在
+        return self._scan(pos)[1]
+
+    def _each_member(self, pos: int, node: Optional[_Node]) -> int:
+        """遍历对象成员，node 为None时只跳过"""
+        text = self.text
+        pos = self._skip_ws(pos)
+        if self._char(pos) == '}':
+            return pos + 1
+        while True:
+            if self._char(pos) != '"':
+                raise IncompleteJSONError(f"第 {pos} 个字符处应为对象的键")
+            try:
+                key, pos = scanstring(text, pos + 1)
+            except ValueError as e:
+                raise IncompleteJSONError(str(e))
+            pos = self._skip_ws(pos)
+            if self._char(pos) != ':':
+                raise IncompleteJSONError(f"第 {pos} 个字符处应为冒号")
+            child = node.children.get(key) if node is not None else None
+            pos = self.walk(pos + 1, child) if child is not None else self._skip_child(pos + 1, node is not None)
+            pos = self._skip_ws(pos)
+            char = self._char(pos)
+            if char == '}':
+                return pos + 1
+            if char != ',':
+                raise IncompleteJSONError(f"第 {pos} 个字符处应为逗号或右花括号")
+            pos = self._skip_ws(pos + 1)
+
+    def _each_element(self, pos: int, node: Optional[_Node]) -> int:
+        """遍历数组元素，node 为None时只跳过"""
+        pos = self._skip_ws(pos)
+        if self._char(pos) == ']':
+            return pos + 1
+        max_index = node.max_index if node is not None else -1
+        index = 0
+        while True:
+            child = node.children.get(index) if index <= max_index else None
+            # 数组元素逐个解析后丢弃，内存以单个元素为上限
+            pos = self.walk(pos, child) if child is not None else self._skip_child(pos, False)
+            pos = self._skip_ws(pos)
+            char = self._char(pos)
+            if char == ']':
+                return pos + 1
+            if char != ',':
+                raise IncompleteJSONError(f"第 {pos} 个字符处应为逗号或右方括号")
+            pos += 1
+            index += 1
+
+
+def extract_paths(text: Union[str, bytes], paths: Iterable[Tuple[Any, ...]]) -> Dict[Tuple[Any, ...], Any]:
+    """
+    在JSON文本上增量提取若干路径的值，不构建完整文档
+
+    沿路径逐层扫描，路径以外的值逐个跳过后立即丢弃，只完整解析命中路径的值；
+    所有路径都找到后立即停止，之后的内容（包括被截断的部分）不再扫描
+
+    Args:
+        text (str): JSON文本（bytes按UTF-8解码）
+        paths (iterable): 路径片段元组，键名为str，数组下标为int
+
+    Returns:
+        dict: 路径 -> 值，文档中不存在的路径不包含在结果中
+
+    Raises:
+        IncompleteJSONError: 还有路径未找到时JSON已结束或格式不合法
+    """
+    if isinstance(text, bytes):
+        text = text.decode('utf-8-sig')
+    elif text.startswith('\ufeff'):
+        text = text[1:]
+    scanner = _Scanner(text, paths)
+    if scanner.remaining == 0:
+        return {}
+    try:
+        end = scanner.walk(0, scanner.root)
+    except _Complete:
+        return scanner.found
+    if scanner._skip_ws(end) != len(text):
+        raise IncompleteJSONError(f"第 {end} 个字符之后还有多余内容")
+    return scanner.found
@@ -0,0 +1,91 @@
+import json
+import math
+import threading
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from core.transport import TIMING_PHASES
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """最近秩法计算百分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(math.ceil(percent / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+class EndpointTimings:
+    """
+    按接口（请求方法 + 路径）汇总分阶段耗时
+
+    每个阶段保存全部样本用于计算百分位数，单次执行的请求量在几万以内，内存占用可以忽略
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Dict[str, List[float]]] = {}
+        self._reused: Dict[str, int] = {}
+
+    @staticmethod
+    def endpoint_key(method: str, url: str) -> str:
+        return f"{method.upper()} {urlsplit(url).path or '/'}"
+
+    def record(self, method: str, url: str, timings: Dict[str, float]):
+        """
+        记录一次请求的耗时分解
+
+        Args:
+            method (str): 请求方法
+            url (str): 请求URL
+            timings (dict): response.timings
+        """
+        key = self.endpoint_key(method, url)
+        with self._lock:
+            samples = self._samples.setdefault(key, {phase: [] for phase in TIMING_PHASES + ('total',)})
+            for phase, values in samples.items():
+                values.append(timings.get(phase, 0.0))
+            if timings.get('reused'):
+                self._reused[key] = self._reused.get(key, 0) + 1
+
+    def __len__(self):
+        return len(self._samples)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        汇总每个接口各阶段的平均值、p50、p95和最大值（毫秒）
+
+        Returns:
+            dict: 接口 -> {'count', 'reused', 阶段 -> {'avg', 'p50', 'p95', 'max'}}
+        """
+        result = {}
+        with self._lock:
+            items = [(key, {phase: sorted(values) for phase, values in samples.items()})
+                     for key, samples in self._samples.items()]
+            reused = dict(self._reused)
+        for key, samples in items:
+            count = len(samples['total'])
+            entry = {'count': count, 'reused': reused.get(key, 0)}
+            for phase, values in samples.items():
+                entry[phase] = {
+                    'avg': round(sum(values) / count, 3),
+                    'p50': percentile(values, 50),
+                    'p95': percentile(values, 95),
+                    'max': values[-1],
+                }
+            result[key] = entry
+        return result
+
+    def format_table(self) -> str:
+        """把汇总结果格式化为便于在日志中阅读的表格（各阶段为p95，单位毫秒）"""
+        header = f"{'接口':<40}{'次数':>6}" + ''.join(f"{phase:>10}" for phase in TIMING_PHASES + ('total',))
+        lines = [header]
+        for key, entry in sorted(self.summary().items()):
+            lines.append(f"{key:<40}{entry['count']:>6}" +
+                         ''.join(f"{entry[phase]['p95']:>10.1f}" for phase in TIMING_PHASES + ('total',)))
+        return '\n'.join(lines)
+
+    def save(self, file_path: str):
+        """把汇总结果保存为JSON文件"""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
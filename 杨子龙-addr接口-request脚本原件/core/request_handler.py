@@ -1,10 +1,12 @@
+import codecs
+import hashlib
 import json
 import shlex
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
 
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
 try:
     import allure
@@ -14,28 +16,376 @@ except ImportError:
     allure = None
     ALLURE_AVAILABLE = False
 
+from core.cassette import MODE_REPLAY, Cassette, CassetteAdapter
+from core.circuit_breaker import CircuitBreakerRegistry, CircuitOpenError, is_connection_failure
+from core.flow_control import FlowController
+from core.metrics import EndpointTimings
+from core.response_cache import DEFAULT_KEY_HEADERS, CachingAdapter, ResponseCache
+from core.retry import RetryBudget, RetryPolicy, RetryStats, parse_retry_after
+from core.transport import PooledHTTPAdapter
 from utils.logger import logger
 
 
+def get_response_text(response) -> str:
+    """获取响应体文本，优先使用RequestHandler已解码好的结果，避免重复解码和字符集探测"""
+    text = getattr(response, 'decoded_text', None)
+    if text is not None:
+        return text
+    return response.text if hasattr(response, 'text') else str(response)
+
+
+def get_response_json(response) -> Any:
+    """解析响应体JSON，基于已解码的文本且只解析一次"""
+    if not hasattr(response, 'decoded_text'):
+        return response.json() if hasattr(response, 'json') else json.loads(response)
+    if not hasattr(response, 'decoded_json'):
+        response.decoded_json = json.loads(response.decoded_text)
+    return response.decoded_json
+
+
+# 流式模式：bounded 只保留响应体前缀，full 保留完整响应体
+STREAM_BOUNDED = 'bounded'
+STREAM_FULL = 'full'
+
+
+def parse_stream_mode(value) -> Tuple[Optional[str], Optional[int]]:
+    """
+    解析用例的 stream 列
+
+    支持：空/0/false（不使用流式）、bounded 或 true（保留默认长度的前缀）、
+    bounded:<字节数>（保留指定长度的前缀）、full（流式读取但保留完整响应体）
+
+    Returns:
+        tuple: (流式模式, 前缀字节数)，不使用流式时为 (None, None)
+
+    Raises:
+        ValueError: 模式不支持，或前缀字节数不是正整数
+    """
+    text = str(value or '').strip().lower()
+    if text in ('', '0', 'false', 'no', 'n', 'none'):
+        return None, None
+    mode, _, size = text.partition(':')
+    if mode in ('1', 'true', 'yes', 'y'):
+        mode = STREAM_BOUNDED
+    if mode not in (STREAM_BOUNDED, STREAM_FULL):
+        raise ValueError(f"不支持的stream模式: {value}")
+    size = size.strip()
+    if not size:
+        return mode, None
+    if not size.isdigit() or int(size) <= 0:
+        raise ValueError(f"stream列格式不正确: {value}，前缀字节数必须是正整数，例如 bounded:65536")
+    return mode, int(size)
+
 
 class RequestHandler:
     """HTTP请求处理器（根据Content-Type判断发送JSON或表单数据）"""
 
-    def __init__(self, base_url: str = "", timeout: int = 30, retries: int = 3):
+    def __init__(self, base_url: str = "", timeout: int = 30, retries: int = 3,
+                 default_encoding: Optional[str] = 'utf-8', detect_encoding: bool = False,
+                 cassette_mode: Optional[str] = None, cassette_path: Optional[str] = None,
+                 cassette_match_host: bool = False, pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False, keep_alive: bool = True, idle_timeout: float = 0, warmup_connections: int = 0,
+                 record_timings: bool = False, stream_prefix_bytes: int = 65536,
+                 stream_chunk_size: int = 65536, rate_limit: float = 0, rate_burst: int = 1,
+                 adaptive_concurrency: bool = False, concurrency_initial: int = 4, concurrency_min: int = 1,
+                 concurrency_max: int = 64, latency_target_ms: float = 0, retry_base_delay: float = 0.5,
+                 retry_max_delay: float = 30.0, retry_budget_ratio: float = 0.2, retry_budget_min: int = 10,
+                 circuit_failure_threshold: int = 5, circuit_recovery_timeout: float = 10.0,
+                 connect_timeout: float = 0, response_cache: bool = False, response_cache_ttl: float = 60.0,
+                 response_cache_size: int = 256, response_cache_headers: Optional[List[str]] = None):
         self.base_url = base_url.rstrip('/') if base_url else ""
         self.timeout = timeout
-
-        # 配置会话和重试策略
+        # 建连超时单独设置时，主机不可达能更快失败并触发熔断
+        self.connect_timeout = connect_timeout
+        # 响应未声明charset时使用的默认字符集；字符集探测只作为解码失败时的兜底
+        self.default_encoding = default_encoding
+        self.detect_encoding = detect_encoding
+        # 流式模式下默认保留的响应体前缀长度和每次读取的块大小
+        self.stream_prefix_bytes = stream_prefix_bytes
+        self.stream_chunk_size = stream_chunk_size
+
+        # 配置会话和重试策略：重试在send_request中进行，等待期间不占用连接和并发窗口
         self.session = requests.Session()
-        retry_strategy = Retry(
-            total=retries,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
+        self.retry_policy = RetryPolicy(max_retries=retries, base_delay=retry_base_delay, max_delay=retry_max_delay)
+        self.retry_budget = RetryBudget(ratio=retry_budget_ratio, min_retries=retry_budget_min)
+        self.retry_stats = RetryStats()
+        self._local = threading.local()
+        # 按主机熔断：环境不可达时剩余用例立即失败，而不是每个都等待超时和重试
+        self.circuit_breakers = CircuitBreakerRegistry(failure_threshold=circuit_failure_threshold,
+                                                       recovery_timeout=circuit_recovery_timeout)
+        # 连接池大小、长连接和空闲超时按环境配置，默认与requests一致
+        self.transport = PooledHTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive,
+            idle_timeout=idle_timeout,
+            record_timings=record_timings,
+            max_retries=0,
+        )
+        adapter = self.transport
+        # 分阶段耗时按接口汇总
+        self.endpoint_timings = EndpointTimings()
+        # 按主机限速和自适应并发控制，默认关闭
+        self.flow_control = FlowController(
+            rate_limit=rate_limit,
+            rate_burst=rate_burst,
+            adaptive_concurrency=adaptive_concurrency,
+            concurrency_initial=concurrency_initial,
+            concurrency_min=concurrency_min,
+            concurrency_max=concurrency_max,
+            latency_target_ms=latency_target_ms,
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+
+        # 磁带模式：录制全部请求/响应，或在不访问网络的情况下重放
+        self.cassette = None
+        if cassette_mode:
+            self.cassette = Cassette(cassette_path, cassette_mode, match_host=cassette_match_host)
+            adapter = CassetteAdapter(self.cassette, adapter)
+
+        # 可选的GET/HEAD响应缓存：相同的查询请求在有效期内只访问一次网络
+        self.response_cache = None
+        if response_cache:
+            self.response_cache = ResponseCache(
+                ttl=response_cache_ttl,
+                max_entries=response_cache_size,
+                key_headers=response_cache_headers or DEFAULT_KEY_HEADERS,
+            )
+            adapter = CachingAdapter(self.response_cache, adapter)
+
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
 
+        # 在第一个用例之前预先建立连接，避免首批请求的耗时包含建连时间
+        if warmup_connections > 0 and self.base_url and cassette_mode != MODE_REPLAY:
+            self.transport.warmup(self.base_url, warmup_connections, verify=False)
+
+    def get_connection_stats(self) -> Dict[str, float]:
+        """返回连接复用、重建和丢弃的统计"""
+        return self.transport.stats.snapshot()
+
+    def get_flow_control_stats(self) -> Dict[str, Dict[str, float]]:
+        """返回每个主机的限速等待、并发等待和当前并发窗口"""
+        return self.flow_control.snapshot()
+
+    def get_last_retry_info(self) -> Optional[Dict[str, Any]]:
+        """返回当前线程最近一次请求的重试情况（请求最终失败、没有响应对象时也可以获取）"""
+        return getattr(self._local, 'retry_info', None)
+
+    def get_last_error(self) -> Optional[str]:
+        """返回当前线程最近一次请求失败的原因，请求成功时为None"""
+        return getattr(self._local, 'last_error', None)
+
+    def get_circuit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回每个主机熔断器的状态、连续失败次数、打开次数和直接拒绝的请求数"""
+        return self.circuit_breakers.snapshot()
+
+    def close(self):
+        """关闭会话，磁带录制模式下同时落盘索引"""
+        logger.info(f"连接统计: {self.get_connection_stats()}")
+        if self.flow_control.enabled:
+            logger.info(f"流控统计: {self.get_flow_control_stats()}")
+        if self.response_cache is not None:
+            logger.info(f"响应缓存统计: {self.response_cache.snapshot()}")
+        circuit_stats = self.get_circuit_stats()
+        if any(stats['opened'] for stats in circuit_stats.values()):
+            logger.info(f"熔断统计: {json.dumps(circuit_stats, ensure_ascii=False)}")
+        if self.retry_stats.total_retries:
+            logger.info(f"重试预算: {self.retry_budget.snapshot()}")
+            logger.info(f"接口重试统计: {json.dumps(self.retry_stats.summary(), ensure_ascii=False)}")
+        if len(self.endpoint_timings):
+            logger.info(f"接口耗时分解（p95，毫秒）:\n{self.endpoint_timings.format_table()}")
+        self.session.close()
+        if self.cassette is not None:
+            self.cassette.close()
+
+    @staticmethod
+    def _get_declared_charset(content_type: str) -> Optional[str]:
+        """从Content-Type中解析服务端明确声明的charset"""
+        for param in content_type.split(';')[1:]:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'charset' and value.strip():
+                return value.strip().strip('\'"')
+        return None
+
+    def _decode_response(self, response: requests.Response) -> str:
+        """
+        一次性解码响应体：声明的charset > 环境默认字符集 > （可选）字符集探测
+
+        解码结果保存在response.decoded_text中，并同步设置response.encoding，
+        使后续的日志、Allure附件和断言都不再触发charset_normalizer探测
+        """
+        content = response.content or b''
+        encoding = self._get_declared_charset(response.headers.get('Content-Type', ''))
+        if encoding is None:
+            encoding = self.default_encoding
+
+        # 截断的前缀末尾可能是不完整的多字节字符，按增量方式解码时丢弃这部分字节
+        truncated = getattr(response, 'stream_info', {}).get('truncated', False)
+
+        text = None
+        if encoding:
+            try:
+                if truncated:
+                    text = codecs.getincrementaldecoder(encoding)().decode(content, final=False)
+                else:
+                    text = content.decode(encoding)
+            except (UnicodeDecodeError, LookupError) as e:
+                logger.warning(f"使用字符集 {encoding} 解码响应体失败: {e}")
+                text = None
+
+        if text is None:
+            if self.detect_encoding:
+                encoding = response.apparent_encoding or 'utf-8'
+                logger.debug(f"启用字符集探测，探测结果: {encoding}")
+            else:
+                encoding = encoding or 'utf-8'
+            try:
+                text = content.decode(encoding, errors='replace')
+            except LookupError:
+                encoding = 'utf-8'
+                text = content.decode(encoding, errors='replace')
+
+        response.encoding = encoding
+        response.decoded_text = text
+        return text
+
+    def _consume_stream(self, response: requests.Response, mode: str, prefix_bytes: Optional[int]):
+        """
+        分块读取响应体：增量计算SHA-256和字节数，只在内存中保留有限长度的前缀
+
+        读取完成后response.content为保留的内容，统计信息保存在response.stream_info中
+        """
+        limit = None if mode == STREAM_FULL else (prefix_bytes if prefix_bytes is not None
+                                                  else self.stream_prefix_bytes)
+        digest = hashlib.sha256()
+        kept = bytearray()
+        total = 0
+        # 录制磁带时边读边写入录制器
+        recorder = getattr(response, 'cassette_recorder', None)
+        start = time.perf_counter()
+        try:
+            for chunk in response.iter_content(chunk_size=self.stream_chunk_size):
+                digest.update(chunk)
+                total += len(chunk)
+                if recorder is not None:
+                    recorder.write(chunk)
+                if limit is None:
+                    kept += chunk
+                elif len(kept) < limit:
+                    kept += chunk[:limit - len(kept)]
+            if recorder is not None:
+                recorder.finish()
+        finally:
+            response.close()
+        seconds = time.perf_counter() - start
+
+        response._content = bytes(kept)
+        response._content_consumed = True
+        response.stream_info = {
+            'mode': mode,
+            'bytes': total,
+            'kept_bytes': len(kept),
+            'truncated': len(kept) < total,
+            'sha256': digest.hexdigest(),
+            'download_seconds': round(seconds, 6),
+            'bytes_per_sec': round(total / seconds, 1) if seconds > 0 else 0.0,
+        }
+        logger.info(f"流式读取响应体: {json.dumps(response.stream_info, ensure_ascii=False)}")
+
+    def _record_discarded_stream(self, response: requests.Response):
+        """录制磁带时，被重试丢弃的流式响应也要录制，重放时才能得到相同的重试过程"""
+        recorder = getattr(response, 'cassette_recorder', None)
+        if recorder is None:
+            return
+        for chunk in response.iter_content(chunk_size=self.stream_chunk_size):
+            recorder.write(chunk)
+        recorder.finish()
+
+    def _send_with_retry(self, method: str, url: str, stream: bool, **request_kwargs):
+        """
+        发送请求并按重试策略重试
+
+        每次尝试单独占用流控许可，退避等待前归还，等待期间不阻塞其他请求；
+        等待时间优先使用Retry-After，否则按去相关抖动计算，重试次数受单次执行的重试预算限制
+
+        Returns:
+            tuple: (响应, 流控许可)，许可需在读完响应体后归还
+
+        Raises:
+            Exception: 最后一次尝试的异常
+        """
+        policy = self.retry_policy
+        self.retry_budget.record_request()
+        retry_info = {'attempts': 0, 'retries': 0, 'wait_seconds': 0.0, 'reasons': [], 'budget_denied': False}
+        self._local.retry_info = retry_info
+        # 重放模式下响应来自磁带，重试不需要真正等待
+        replaying = self.cassette is not None and self.cassette.mode == MODE_REPLAY
+        delay = 0.0
+        breaker = self.circuit_breakers.get(url)
+
+        while True:
+            retry_info['attempts'] += 1
+            response = error = permit = None
+            try:
+                # 熔断器打开时在限速和并发等待之前直接失败
+                if breaker is not None:
+                    breaker.before_request()
+                permit = self.flow_control.acquire(url)
+                if permit is not None and permit.waited > 0.001:
+                    logger.info(f"流控等待: {permit.waited:.3f}秒")
+                response = self.session.request(method=method, url=url, stream=stream, **request_kwargs)
+            except Exception as e:
+                error = e
+                if permit is not None:
+                    permit.release(error=e)
+
+            if breaker is not None:
+                if error is None:
+                    breaker.record_success()
+                elif is_connection_failure(error):
+                    breaker.record_failure(error)
+                elif not isinstance(error, CircuitOpenError):
+                    breaker.cancel_probe()
+
+            reason = policy.retry_reason(method, response, error)
+            if reason is None or retry_info['retries'] >= policy.max_retries:
+                break
+            wait = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+            if wait is not None and wait > policy.max_delay:
+                logger.warning(f"{reason}，服务端要求等待 {wait:.1f}秒，超过上限 {policy.max_delay}秒，不再重试")
+                break
+            if not self.retry_budget.try_spend():
+                retry_info['budget_denied'] = True
+                logger.warning(f"{reason}，本次执行的重试预算已用尽，不再重试: {self.retry_budget.snapshot()}")
+                break
+            if wait is None:
+                delay = policy.next_delay(delay)
+                wait = delay
+
+            if response is not None:
+                if permit is not None:
+                    permit.release(status_code=response.status_code)
+                self._record_discarded_stream(response)
+                response.close()
+            retry_info['retries'] += 1
+            retry_info['wait_seconds'] = round(retry_info['wait_seconds'] + wait, 3)
+            retry_info['reasons'].append(reason)
+            logger.warning(f"{reason}，{wait:.2f}秒后第 {retry_info['retries']} 次重试: {method} {url}")
+            if not replaying:
+                time.sleep(wait)
+
+        self.retry_stats.record(method, url, retry_info)
+        if retry_info['retries']:
+            logger.info(f"重试统计: {json.dumps(retry_info, ensure_ascii=False)}")
+            if ALLURE_AVAILABLE and allure:
+                allure.attach(json.dumps(retry_info, ensure_ascii=False, indent=2), "重试统计",
+                              allure.attachment_type.JSON)
+        if error is not None:
+            raise error
+        response.retry_info = retry_info
+        return response, permit
+
     def _generate_curl_command(self, method: str, url: str,
                                headers: Optional[Dict[str, str]] = None,
                                params: Optional[Dict[str, Any]] = None,
@@ -91,6 +441,7 @@ class RequestHandler:
                      data: Optional[Dict[str, Any]] = None,
                      json_data: Optional[Dict[str, Any]] = None,
                      plain_text: Optional[str] = None,
+                     stream_mode: Optional[str] = None,
                      **kwargs) -> Optional[requests.Response]:
         """
         发送HTTP请求（根据Content-Type判断发送JSON或表单数据）
@@ -103,8 +454,16 @@ class RequestHandler:
             data: 表单数据
             json_data: JSON数据
             plain_text: 纯文本数据
+            stream_mode: 流式读取模式（用例的 stream 列，见 parse_stream_mode）
             **kwargs: 其他requests参数（如files、cookies等）
         """
+        try:
+            stream, stream_prefix = parse_stream_mode(stream_mode)
+        except ValueError as e:
+            self._local.last_error = str(e)
+            logger.error(f"请求参数错误: {str(e)}")
+            return None
+
         # 处理URL
         if not url.startswith(('http://', 'https://')):
             base = self.base_url.rstrip('/')
@@ -205,45 +564,77 @@ class RequestHandler:
                 logger.info(f"请求表单数据: {json.dumps(data, ensure_ascii=False, indent=2)}")
         logger.info("-" * 30)
 
+        # 限速和并发窗口在发送前等待，请求结束（包括读完响应体）后归还
+        permit = None
+        self._local.last_error = None
         try:
             # 发送请求
-            response = self.session.request(
-                method=method,
-                url=url,
+            response, permit = self._send_with_retry(
+                method,
+                url,
+                stream is not None,
                 headers=request_headers,
                 params=params,
                 json=request_json,  # JSON数据
                 data=request_data,  # 表单数据或纯文本数据
-                timeout=self.timeout,
+                timeout=(self.connect_timeout, self.timeout) if self.connect_timeout else self.timeout,
                 verify=False,
                 **kwargs
             )
 
+            if stream is not None:
+                self._consume_stream(response, stream, stream_prefix)
+            if permit is not None:
+                permit.release(status_code=response.status_code)
+            response_text = self._decode_response(response)
+
             # 记录响应信息
             if ALLURE_AVAILABLE and allure:
                 allure.attach(str(response.status_code), "响应状态码", allure.attachment_type.TEXT)
                 allure.attach(json.dumps(dict(response.headers), ensure_ascii=False, indent=2), "响应头",
                               allure.attachment_type.JSON)
-                allure.attach(response.text, "响应体", allure.attachment_type.TEXT)
+                allure.attach(response_text, "响应体", allure.attachment_type.TEXT)
+                if stream is not None:
+                    allure.attach(json.dumps(response.stream_info, ensure_ascii=False, indent=2), "流式读取统计",
+                                  allure.attachment_type.JSON)
 
-            logger.info("收到响应")
+            logger.info("收到响应（来自缓存）" if getattr(response, 'from_cache', False) else "收到响应")
             logger.info(f"状态码: {response.status_code}")
             logger.info(f"响应头: {json.dumps(dict(response.headers), ensure_ascii=False, indent=2)}")
-            logger.info(f"响应体: {response.text}")
+            if stream is not None and response.stream_info['truncated']:
+                logger.info(f"响应体（前 {response.stream_info['kept_bytes']} 字节）: {response_text}")
+            else:
+                logger.info(f"响应体: {response_text}")
             logger.info(f"耗时: {response.elapsed.total_seconds()}秒")
+            timings = getattr(response, 'timings', None)
+            if timings:
+                self.endpoint_timings.record(method, url, timings)
+                logger.info(f"耗时分解(毫秒): {json.dumps(timings, ensure_ascii=False)}")
+                if ALLURE_AVAILABLE and allure:
+                    allure.attach(json.dumps(timings, ensure_ascii=False, indent=2), "耗时分解",
+                                  allure.attachment_type.JSON)
             logger.info("=" * 50)
 
             return response
 
         except requests.exceptions.Timeout as e:
+            if permit is not None:
+                permit.release(error=e)
+            self._local.last_error = f"请求超时: {e}"
             logger.error(f"请求超时: {e}")
             if ALLURE_AVAILABLE and allure:
                 allure.attach(str(e), "请求超时", allure.attachment_type.TEXT)
         except requests.exceptions.RequestException as e:
+            if permit is not None:
+                permit.release(error=e)
+            self._local.last_error = f"请求失败: {e}"
             logger.error(f"请求失败: {e}")
             if ALLURE_AVAILABLE and allure:
                 allure.attach(str(e), "请求异常", allure.attachment_type.TEXT)
         except Exception as e:
+            if permit is not None:
+                permit.release(error=e)
+            self._local.last_error = f"未知错误: {e}"
             logger.error(f"未知错误: {e}")
             if ALLURE_AVAILABLE and allure:
                 allure.attach(str(e), "未知错误", allure.attachment_type.TEXT)
@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from core.cassette import normalize_url
+from utils.logger import logger
+
+# 只缓存安全且幂等的方法；其他方法的请求会使同一主机的缓存失效
+CACHEABLE_METHODS = frozenset(['GET', 'HEAD'])
+# 参与缓存键计算的请求头（影响响应内容的认证和内容协商头）
+DEFAULT_KEY_HEADERS = ('Authorization', 'Cookie', 'Accept', 'Accept-Language', 'token')
+
+
+class _CachedResponse:
+    """缓存的响应快照，命中时据此构造新的Response对象，不同用例之间不共享可变状态"""
+
+    __slots__ = ('status_code', 'reason', 'headers', 'content', 'elapsed', 'expires_at')
+
+    def __init__(self, response: requests.Response, expires_at: float):
+        self.status_code = response.status_code
+        self.reason = response.reason
+        self.headers = dict(response.headers)
+        self.content = response.content
+        self.elapsed = response.elapsed
+        self.expires_at = expires_at
+
+
+class _Flight:
+    """正在进行中的请求，相同请求的其他线程等待它完成后共享结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.entry: Optional[_CachedResponse] = None
+
+
+class ResponseCache:
+    """
+    GET/HEAD响应缓存（线程安全）：TTL过期 + LRU淘汰 + 单飞合并
+
+    缓存键由请求方法、规范化后的URL（含查询参数）和影响响应内容的请求头组成；
+    同一主机出现非幂等请求（POST/PUT/DELETE等）时清空该主机的缓存，避免读到修改前的数据
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 256,
+                 key_headers: Iterable[str] = DEFAULT_KEY_HEADERS):
+        """
+        Args:
+            ttl (float): 缓存有效期（秒）
+            max_entries (int): 最多缓存的响应数，超出时淘汰最久未使用的
+            key_headers (iterable): 参与缓存键计算的请求头
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.key_headers = tuple(h.strip().lower() for h in key_headers if h.strip())
+        self._entries: 'OrderedDict[str, _CachedResponse]' = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'invalidations': 0}
+
+    def make_key(self, request: requests.PreparedRequest) -> str:
+        headers = request.headers or {}
+        parts = [request.method.upper(), normalize_url(request.url)]
+        for name in self.key_headers:
+            value = headers.get(name)
+            if value is not None:
+                parts.append(f"{name}={value}")
+        return '\n'.join(parts)
+
+    @staticmethod
+    def _host_of(key: str) -> str:
+        return urlsplit(key.split('\n', 2)[1]).netloc
+
+    def begin(self, key: str) -> Tuple[Optional[_CachedResponse], Optional[_Flight], bool]:
+        """
+        查找缓存，未命中时登记或加入进行中的请求
+
+        Returns:
+            tuple: (命中的缓存, 进行中的请求, 当前线程是否负责发送请求)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry, None, False
+                del self._entries[key]
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats['coalesced'] += 1
+                return None, flight, False
+            flight = _Flight()
+            self._flights[key] = flight
+            self.stats['misses'] += 1
+            return None, flight, True
+
+    def finish(self, key: str, flight: _Flight, response: Optional[requests.Response]):
+        """请求完成：可缓存的响应写入缓存，并唤醒等待同一请求的线程"""
+        entry = None
+        if response is not None and response.status_code < 400:
+            entry = _CachedResponse(response, time.monotonic() + self.ttl)
+        with self._lock:
+            if entry is not None:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats['evictions'] += 1
+            self._flights.pop(key, None)
+        flight.entry = entry
+        flight.event.set()
+
+    def invalidate_host(self, host: str):
+        """清空指定主机的缓存"""
+        with self._lock:
+            keys = [key for key in self._entries if self._host_of(key) == host]
+            for key in keys:
+                del self._entries[key]
+            if keys:
+                self.stats['invalidations'] += 1
+        if keys:
+            logger.debug(f"主机 {host} 出现非幂等请求，清除 {len(keys)} 条缓存")
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            data = dict(self.stats)
+            data['entries'] = len(self._entries)
+        return data
+
+
+class CachingAdapter(BaseAdapter):
+    """
+    响应缓存传输适配器
+
+    包装真实的传输适配器：GET/HEAD命中缓存时不访问网络，相同请求同时发出时只发送一次；
+    流式读取的请求不经过缓存
+    """
+
+    def __init__(self, cache: ResponseCache, inner: BaseAdapter):
+        super().__init__()
+        self.cache = cache
+        self.inner = inner
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        method = request.method.upper()
+        if method not in CACHEABLE_METHODS:
+            self.cache.invalidate_host(urlsplit(normalize_url(request.url)).netloc)
+        if stream or method not in CACHEABLE_METHODS:
+            return self.inner.send(request, stream=stream, timeout=timeout, verify=verify,
+                                   cert=cert, proxies=proxies)
+
+        key = self.cache.make_key(request)
+        entry, flight, leader = self.cache.begin(key)
+        if entry is not None:
+            return self._build_response(request, entry)
+        if not leader:
+            flight.event.wait()
+            if flight.entry is not None:
+                return self._build_response(request, flight.entry)
+            # 合并的请求失败或不可缓存时各自重新发送
+            return self.inner.send(request, stream=stream, timeout=timeout, verify=verify,
+                                   cert=cert, proxies=proxies)
+
+        completed = None
+        try:
+            response = self.inner.send(request, stream=stream, timeout=timeout, verify=verify,
+                                       cert=cert, proxies=proxies)
+            # 读完响应体后才能缓存；读取失败时等待的线程各自重新发送
+            response.content
+            completed = response
+        finally:
+            self.cache.finish(key, flight, completed)
+        return response
+
+    def _build_response(self, request, entry: _CachedResponse) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry.status_code
+        response.reason = entry.reason
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response._content = entry.content
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(0)
+        response.from_cache = True
+        return response
+
+    def close(self):
+        self.inner.close()
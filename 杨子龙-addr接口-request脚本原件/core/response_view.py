@@ -0,0 +1,82 @@
+from typing import Any, Dict, Iterable, Tuple
+
+from core.json_path import MISSING, resolve_path
+from core.json_stream import IncompleteJSONError, extract_paths
+from core.request_handler import get_response_text, get_response_json
+from utils.logger import logger
+
+_UNSET = object()
+
+
+class ResponseView:
+    """
+    单次响应的共享只读视图
+
+    状态码、响应文本和解析后的JSON都只计算一次，供同一用例的所有断言复用
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.status_code = getattr(response, 'status_code', None)
+        self.headers = getattr(response, 'headers', {})
+        self.elapsed = getattr(response, 'elapsed', None)
+        # 流式模式下的读取统计（总字节数、SHA-256、吞吐量等），非流式时为None
+        self.stream_info = getattr(response, 'stream_info', None)
+        self._text = _UNSET
+        self._json = _UNSET
+        self._json_error = None
+
+    @property
+    def text(self) -> str:
+        """响应体文本（已按声明字符集解码）"""
+        if self._text is _UNSET:
+            self._text = get_response_text(self.response)
+        return self._text
+
+    def json(self) -> Any:
+        """解析后的响应JSON，解析失败时每次调用都抛出同一个异常"""
+        if self._json is _UNSET and self._json_error is None:
+            if self.stream_info and self.stream_info['truncated']:
+                self._json_error = ValueError(
+                    f"响应体已截断（共 {self.stream_info['bytes']} 字节，只保留前 {self.stream_info['kept_bytes']} 字节），"
+                    f"需要完整文档的断言请把用例的 stream 列设置为 full")
+                raise self._json_error
+            try:
+                self._json = get_response_json(self.response)
+            except (ValueError, TypeError) as e:
+                self._json_error = e
+        if self._json_error is not None:
+            raise self._json_error
+        return self._json
+
+    @property
+    def json_parsed(self) -> bool:
+        """是否已经解析过完整的JSON（断言用到了完整文档）"""
+        return self._json is not _UNSET
+
+    def extract(self, paths: Iterable[Tuple[Any, ...]]) -> Dict[Tuple[Any, ...], Any]:
+        """
+        按路径取值：已解析完整JSON时直接在文档中取值，否则在响应文本上增量提取
+
+        增量提取在所有路径找到后即停止，不构建完整文档；截断的响应体只要路径位于保留的前缀内也能提取。
+        文本不是完整合法的JSON且还有路径未找到时，退回完整解析（并抛出完整解析的异常）
+
+        Args:
+            paths (iterable): 路径片段元组（见 core.json_path.compile_path）
+
+        Returns:
+            dict: 路径 -> 值，不存在的路径不包含在结果中
+        """
+        paths = list(paths)
+        if not self.json_parsed:
+            try:
+                return extract_paths(self.text, paths)
+            except IncompleteJSONError as e:
+                logger.debug(f"增量提取失败，改为完整解析: {e}")
+        document = self.json()
+        result = {}
+        for path in paths:
+            value = resolve_path(document, path)
+            if value is not MISSING:
+                result[path] = value
+        return result
@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+结构化结果库：每条用例的执行结果写入本地SQLite，用于趋势、不稳定用例、耗时基线查询和只重跑失败用例
+"""
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from core.metrics import percentile
+from core.template_functions import compile_template
+from utils.logger import logger
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        env TEXT,
+        started_at REAL,
+        finished_at REAL,
+        total INTEGER,
+        passed INTEGER,
+        failed INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS case_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT NOT NULL,
+        env TEXT,
+        case_id TEXT,
+        case_name TEXT,
+        method TEXT,
+        endpoint TEXT,
+        status_code INTEGER,
+        outcome TEXT,
+        failure TEXT,
+        started_at REAL,
+        duration_ms REAL,
+        elapsed_ms REAL,
+        timings TEXT,
+        retries INTEGER,
+        assertions INTEGER,
+        failed_assertions INTEGER,
+        body_sha256 TEXT,
+        nodeid TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_case_results_endpoint_run ON case_results (endpoint, run_id)",
+    "CREATE INDEX IF NOT EXISTS idx_case_results_run_outcome ON case_results (run_id, outcome)",
+    "CREATE INDEX IF NOT EXISTS idx_case_results_case_run ON case_results (case_id, case_name, run_id)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at)",
+]
+
+_COLUMNS = ('run_id', 'env', 'case_id', 'case_name', 'method', 'endpoint', 'status_code', 'outcome', 'failure',
+            'started_at', 'duration_ms', 'elapsed_ms', 'timings', 'retries', 'assertions', 'failed_assertions',
+            'body_sha256', 'nodeid')
+# 旧版本结果库中缺少的列，打开时补上
+_ADDED_COLUMNS = (('nodeid', 'TEXT'),)
+
+_INSERT = f"INSERT INTO case_results ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+# 失败原因最多保存的字符数
+_FAILURE_LIMIT = 2000
+
+OUTCOME_PASSED = 'passed'
+OUTCOME_FAILED = 'failed'
+OUTCOME_ERROR = 'error'
+OUTCOME_SKIPPED = 'skipped'
+
+_STOP = object()
+
+
+def new_run_id() -> str:
+    """执行标识：时间 + 随机后缀，按字符串排序即按时间排序"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class ResultStore:
+    """
+    用例执行结果库
+
+    record() 只把结果放入队列，由后台线程攒批后在一个事务中 executemany 写入，
+    用例线程不等待磁盘IO；结果表按 (接口, 执行)、(执行, 结果)、(用例, 执行) 建索引，
+    常用查询都是索引查找，不需要再解析报告目录
+    """
+
+    def __init__(self, db_file: str, run_id: Optional[str] = None, env: str = '',
+                 batch_size: int = 200, flush_interval: float = 1.0):
+        """
+        Args:
+            db_file (str): SQLite数据库文件
+            run_id (str): 本次执行的标识，默认自动生成
+            env (str): 运行环境
+            batch_size (int): 每批写入的最大行数
+            flush_interval (float): 未攒满一批时的最长等待时间（秒）
+        """
+        self.db_file = db_file
+        self.run_id = run_id or new_run_id()
+        self.env = env
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.written = 0
+        # 当前执行的pytest测试节点，由conftest在每个测试开始时设置，随结果写入
+        self.current_nodeid: Optional[str] = None
+        self._queue = queue.Queue()
+        self._thread = None
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._transaction() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(case_results)")}
+            for column, column_type in _ADDED_COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE case_results ADD COLUMN {column} {column_type}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每个线程使用自己的连接；WAL模式下查询不阻塞后台写入
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """短连接：事务结束后提交并关闭"""
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ---------------------------------------------------------------- 写入
+
+    def start(self):
+        """登记本次执行并启动后台写入线程"""
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO runs (run_id, env, started_at) VALUES (?, ?, ?)",
+                         (self.run_id, self.env, time.time()))
+        self._thread = threading.Thread(target=self._write_loop, name='result-store-writer', daemon=True)
+        self._thread.start()
+        logger.info(f"结果库: {self.db_file}，执行标识: {self.run_id}")
+
+    def record(self, result: Dict[str, Any]):
+        """
+        记录一条用例执行结果（非阻塞）
+
+        Args:
+            result (dict): 结果字段（见 _COLUMNS），run_id、env 和 nodeid 自动填充
+        """
+        row = dict(result, run_id=self.run_id, env=self.env)
+        row.setdefault('nodeid', self.current_nodeid)
+        if isinstance(row.get('timings'), dict):
+            row['timings'] = json.dumps(row['timings'], ensure_ascii=False)
+        if row.get('failure'):
+            row['failure'] = str(row['failure'])[:_FAILURE_LIMIT]
+        self._queue.put(tuple(row.get(column) for column in _COLUMNS))
+
+    def _write_loop(self):
+        conn = self._connect()
+        batch = []
+        deadline = 0.0
+        try:
+            while True:
+                timeout = max(deadline - time.monotonic(), 0) if batch else None
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    break
+                if item is not None:
+                    if not batch:
+                        deadline = time.monotonic() + self.flush_interval
+                    batch.append(item)
+                if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self._flush(conn, batch)
+                    batch = []
+            if batch:
+                self._flush(conn, batch)
+        finally:
+            conn.close()
+
+    def _flush(self, conn: sqlite3.Connection, batch: List[tuple]):
+        # 写入失败只记录日志，不影响用例执行
+        try:
+            with conn:
+                conn.executemany(_INSERT, batch)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            logger.error(f"结果库写入失败（{len(batch)} 条）: {e}")
+
+    def close(self) -> Dict[str, int]:
+        """
+        写完队列中剩余的结果，汇总本次执行
+
+        Returns:
+            dict: total、passed、failed（含error）
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        with self._transaction() as conn:
+            total, passed, failed = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(outcome = ?), 0), COALESCE(SUM(outcome IN (?, ?)), 0) "
+                "FROM case_results WHERE run_id = ?",
+                (OUTCOME_PASSED, OUTCOME_FAILED, OUTCOME_ERROR, self.run_id)).fetchone()
+            conn.execute("UPDATE runs SET finished_at = ?, total = ?, passed = ?, failed = ? WHERE run_id = ?",
+                         (time.time(), total, passed, failed, self.run_id))
+        return {'total': total, 'passed': passed, 'failed': failed}
+
+    # ---------------------------------------------------------------- 查询
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._transaction() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """最近的执行记录（新的在前）"""
+        rows = self._query("SELECT run_id, env, started_at, finished_at, total, passed, failed FROM runs "
+                           "ORDER BY started_at DESC LIMIT ?", (limit,))
+        keys = ('run_id', 'env', 'started_at', 'finished_at', 'total', 'passed', 'failed')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def last_finished_run(self) -> Optional[str]:
+        """最近一次已结束且有结果的执行（不含当前执行）"""
+        rows = self._query("SELECT run_id FROM runs WHERE finished_at IS NOT NULL AND total > 0 AND run_id != ? "
+                           "ORDER BY started_at DESC LIMIT 1", (self.run_id,))
+        return rows[0][0] if rows else None
+
+    def failed_cases(self, run_id: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        某次执行中失败的用例
+
+        Args:
+            run_id (str): 执行标识，默认最近一次已结束的执行
+
+        Returns:
+            list: (用例编号, 用例名称) 列表
+        """
+        run_id = run_id or self.last_finished_run()
+        if run_id is None:
+            return []
+        return self._query("SELECT DISTINCT case_id, case_name FROM case_results "
+                           "WHERE run_id = ? AND outcome IN (?, ?)", (run_id, OUTCOME_FAILED, OUTCOME_ERROR))
+
+    def failed_nodeids(self, run_id: Optional[str] = None) -> List[str]:
+        """
+        某次执行中失败的pytest测试节点，用于只重跑失败用例
+
+        同名用例可能出现在多个用例文件中，同一用例文件也会被多个测试模块执行，
+        按节点（测试模块 + 参数化ID）匹配才能只选中真正失败的那一个
+
+        Args:
+            run_id (str): 执行标识，默认最近一次已结束的执行
+
+        Returns:
+            list: 测试节点ID列表
+        """
+        run_id = run_id or self.last_finished_run()
+        if run_id is None:
+            return []
+        rows = self._query("SELECT DISTINCT nodeid FROM case_results "
+                           "WHERE run_id = ? AND outcome IN (?, ?) AND nodeid IS NOT NULL",
+                           (run_id, OUTCOME_FAILED, OUTCOME_ERROR))
+        return [row[0] for row in rows]
+
+    def _recent_runs_clause(self) -> str:
+        return "run_id IN (SELECT run_id FROM runs WHERE total > 0 ORDER BY started_at DESC LIMIT ?)"
+
+    def flaky_cases(self, runs: int = 10) -> List[Dict[str, Any]]:
+        """
+        最近若干次执行中既通过过又失败过的用例
+
+        Returns:
+            list: {'case_id', 'case_name', 'runs', 'passed', 'failed'}，失败次数多的在前
+        """
+        rows = self._query(
+            "SELECT case_id, case_name, COUNT(DISTINCT run_id), SUM(outcome = ?), SUM(outcome IN (?, ?)) "
+            f"FROM case_results WHERE {self._recent_runs_clause()} GROUP BY case_id, case_name "
+            "HAVING SUM(outcome = ?) > 0 AND SUM(outcome IN (?, ?)) > 0 ORDER BY 5 DESC",
+            (OUTCOME_PASSED, OUTCOME_FAILED, OUTCOME_ERROR, runs, OUTCOME_PASSED, OUTCOME_FAILED, OUTCOME_ERROR))
+        keys = ('case_id', 'case_name', 'runs', 'passed', 'failed')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def endpoint_trend(self, endpoint: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        某个接口在最近若干次执行中的请求数、通过数和耗时（毫秒）
+
+        Args:
+            endpoint (str): 接口，格式为 "GET /api/addr"
+            limit (int): 执行次数
+        """
+        rows = self._query(
+            "SELECT c.run_id, r.started_at, COUNT(*), SUM(c.outcome = ?), AVG(c.elapsed_ms), MAX(c.elapsed_ms) "
+            "FROM case_results c JOIN runs r ON r.run_id = c.run_id WHERE c.endpoint = ? "
+            "GROUP BY c.run_id ORDER BY r.started_at DESC LIMIT ?", (OUTCOME_PASSED, endpoint, limit))
+        keys = ('run_id', 'started_at', 'count', 'passed', 'avg_ms', 'max_ms')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def latency_baseline(self, runs: int = 10, endpoint: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        最近若干次执行中通过的请求的耗时基线（毫秒）
+
+        Args:
+            runs (int): 参与计算的执行次数
+            endpoint (str): 只计算某个接口，默认全部接口
+
+        Returns:
+            dict: 接口 -> {'count', 'p50', 'p95', 'max'}
+        """
+        sql = (f"SELECT endpoint, elapsed_ms FROM case_results WHERE {self._recent_runs_clause()} "
+               "AND outcome = ? AND elapsed_ms IS NOT NULL")
+        params = (runs, OUTCOME_PASSED)
+        if endpoint:
+            sql += " AND endpoint = ?"
+            params += (endpoint,)
+        samples: Dict[str, List[float]] = {}
+        for name, elapsed in self._query(sql, params):
+            samples.setdefault(name, []).append(elapsed)
+        baseline = {}
+        for name, values in samples.items():
+            values.sort()
+            baseline[name] = {'count': len(values), 'p50': round(percentile(values, 50), 2),
+                              'p95': round(percentile(values, 95), 2), 'max': round(values[-1], 2)}
+        return baseline
+
+
+# 请求中会做变量替换的用例字段
+_TEMPLATE_FIELDS = ('url', 'headers', 'params', 'body')
+
+
+def _extracted_variables(case: dict) -> Set[str]:
+    """用例执行后提取（保存）的变量名"""
+    names = set()
+    for item in str(case.get('extract_key') or '').split(';'):
+        if '=' in item:
+            names.add(item.split('=', 1)[0].strip())
+    if case.get('save_var_name'):
+        names.add(str(case['save_var_name']).strip())
+    names.discard('')
+    return names
+
+
+def _referenced_variables(case: dict) -> Set[str]:
+    """用例请求中引用的变量名"""
+    names = set()
+    for field in _TEMPLATE_FIELDS:
+        value = case.get(field)
+        if isinstance(value, str) and value:
+            text = value.replace('｛', '{').replace('｝', '}')
+            names.update(compile_template(text).variables())
+    return names
+
+
+def select_rerun_cases(cases: List[dict], failed: List[bool]) -> List[bool]:
+    """
+    选出只重跑失败用例时需要执行的用例
+
+    除失败用例外，还保留在它之前、提取了它所引用变量的用例（如登录用例提取的token），
+    并递归保留这些用例自身的依赖；每个变量只保留离引用处最近的一个提取用例
+
+    Args:
+        cases (list): 按执行顺序排列的用例
+        failed (list): 与 cases 一一对应，True 表示上次执行失败
+
+    Returns:
+        list: 与 cases 一一对应，True 表示需要执行
+    """
+    selected = [False] * len(cases)
+    # 之后已选中的用例还需要、但尚未找到提取用例的变量
+    wanted: Set[str] = set()
+    for index in range(len(cases) - 1, -1, -1):
+        case = cases[index]
+        extracted = _extracted_variables(case)
+        if failed[index] or extracted & wanted:
+            selected[index] = True
+            wanted -= extracted
+            wanted |= _referenced_variables(case)
+    return selected
+
+
+def main():
+    """命令行入口：查询结果库"""
+    from config.config import Config
+
+    parser = argparse.ArgumentParser(description="查询用例执行结果库")
+    parser.add_argument("query", choices=["runs", "failed", "flaky", "trend", "baseline"],
+                        help="runs 最近的执行, failed 失败用例, flaky 不稳定用例, trend 接口趋势, baseline 耗时基线")
+    parser.add_argument("--db", help="数据库文件，默认使用 [results] db_file")
+    parser.add_argument("--run", help="执行标识（failed），默认最近一次执行")
+    parser.add_argument("--endpoint", help="接口，如 \"GET /api/addr\"（trend 必填，baseline 可选）")
+    parser.add_argument("--limit", type=int, default=10, help="执行次数")
+    args = parser.parse_args()
+
+    store = ResultStore(args.db or Config().get_result_store_options()['db_file'])
+    if args.query == 'runs':
+        result = store.runs(args.limit)
+    elif args.query == 'failed':
+        result = store.failed_cases(args.run)
+    elif args.query == 'flaky':
+        result = store.flaky_cases(args.limit)
+    elif args.query == 'trend':
+        if not args.endpoint:
+            parser.error("trend 需要指定 --endpoint")
+        result = store.endpoint_trend(args.endpoint, args.limit)
+    else:
+        result = store.latency_baseline(args.limit, args.endpoint)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from core.cassette import CassetteMissError
+from core.circuit_breaker import CircuitOpenError
+from core.metrics import EndpointTimings
+
+# 与urllib3 Retry默认值一致：按状态码和读取失败重试只针对幂等方法，建连失败对所有方法都可以重试
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS', 'TRACE'])
+RETRY_STATUS = frozenset([429, 500, 502, 503, 504])
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析Retry-After响应头
+
+    Args:
+        value (str): 秒数或HTTP日期
+
+    Returns:
+        float: 需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        target = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if target is None:
+        return None
+    return max(target.timestamp() - time.time(), 0.0)
+
+
+def is_connect_error(error: BaseException) -> bool:
+    """请求尚未发出的建连失败（DNS解析失败、连接被拒绝、建连超时），对任何方法重试都是安全的"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        reason = getattr(error.args[0], 'reason', error.args[0])
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+class RetryBudget:
+    """
+    单次执行的重试预算（线程安全）
+
+    允许的重试总数为 min_retries + ratio * 已发送的请求数，环境整体不可用时重试次数
+    随请求数线性增长而不是按每个请求的重试次数成倍放大
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.spent = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """尝试消耗一次重试，预算用尽时返回False"""
+        with self._lock:
+            if self.spent < self.min_retries + self.ratio * self.requests:
+                self.spent += 1
+                return True
+            self.denied += 1
+            return False
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {'requests': self.requests, 'retries': self.spent, 'denied': self.denied}
+
+
+class RetryPolicy:
+    """
+    重试策略：去相关抖动退避（decorrelated jitter），优先遵循服务端的Retry-After
+
+    第n次重试的等待时间在 [base_delay, 上一次等待时间 * 3] 之间随机取值，且不超过 max_delay，
+    避免大量失败请求在同一时刻集中重试
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0,
+                 status_forcelist: Iterable[int] = RETRY_STATUS,
+                 allowed_methods: Iterable[str] = IDEMPOTENT_METHODS):
+        """
+        Args:
+            max_retries (int): 单个请求的最大重试次数，0 表示不重试
+            base_delay (float): 退避等待的下限（秒）
+            max_delay (float): 单次等待的上限（秒），Retry-After超过该值时放弃重试
+            status_forcelist (iterable): 需要重试的响应状态码
+            allowed_methods (iterable): 可以按状态码和读取失败重试的请求方法
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.status_forcelist = frozenset(status_forcelist)
+        self.allowed_methods = frozenset(m.upper() for m in allowed_methods)
+
+    def next_delay(self, previous: float) -> float:
+        """计算下一次退避等待的秒数"""
+        upper = max(previous * 3, self.base_delay)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+    def retry_reason(self, method: str, response: Optional[requests.Response] = None,
+                     error: Optional[BaseException] = None) -> Optional[str]:
+        """
+        判断本次结果是否需要重试
+
+        Returns:
+            str: 重试原因，不需要重试时返回None
+        """
+        if error is not None:
+            if isinstance(error, (CassetteMissError, CircuitOpenError)):
+                return None
+            if is_connect_error(error):
+                return f"建连失败: {type(error).__name__}"
+            if (method.upper() in self.allowed_methods
+                    and isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))):
+                return f"请求失败: {type(error).__name__}"
+            return None
+        if response is not None and response.status_code in self.status_forcelist \
+                and method.upper() in self.allowed_methods:
+            return f"状态码 {response.status_code}"
+        return None
+
+
+class RetryStats:
+    """按接口（请求方法 + 路径）汇总重试次数和重试等待时间"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, float]] = {}
+
+    def record(self, method: str, url: str, retry_info: dict):
+        """
+        记录一次请求的重试情况
+
+        Args:
+            method (str): 请求方法
+            url (str): 请求URL
+            retry_info (dict): response.retry_info
+        """
+        key = EndpointTimings.endpoint_key(method, url)
+        with self._lock:
+            entry = self._endpoints.setdefault(key, {'requests': 0, 'retried_requests': 0, 'retries': 0,
+                                                     'wait_seconds': 0.0, 'budget_denied': 0})
+            entry['requests'] += 1
+            if retry_info['retries']:
+                entry['retried_requests'] += 1
+            entry['retries'] += retry_info['retries']
+            entry['wait_seconds'] = round(entry['wait_seconds'] + retry_info['wait_seconds'], 3)
+            if retry_info.get('budget_denied'):
+                entry['budget_denied'] += 1
+
+    @property
+    def total_retries(self) -> int:
+        with self._lock:
+            return sum(entry['retries'] for entry in self._endpoints.values())
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._endpoints.items()}
+
+    def save(self, file_path: str):
+        """把汇总结果保存为JSON文件"""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,239 @@
+import argparse
+import json
+import sys
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+from core.json_matcher import JsonMatcher
+
+# 校验结果：(JSON Pointer, 原因)，通过时为None
+Mismatch = Optional[Tuple[str, str]]
+
+# 数组校验模式
+MODE_FULL = 'full'
+MODE_SAMPLE = 'sample'
+
+
+class SchemaOptions:
+    """结构校验参数"""
+
+    def __init__(self, mode: str = MODE_FULL, sample_size: int = 10, max_depth: int = 0):
+        """
+        Args:
+            mode (str): full 校验数组的全部元素；sample 只校验首尾及均匀分布的部分元素
+            sample_size (int): sample 模式下每个数组最多校验的元素个数
+            max_depth (int): 最大校验深度，0 表示不限制
+        """
+        if mode not in (MODE_FULL, MODE_SAMPLE):
+            raise ValueError(f"不支持的数组校验模式: {mode}")
+        self.mode = mode
+        self.sample_size = max(int(sample_size), 1)
+        self.max_depth = max(int(max_depth), 0)
+
+    @classmethod
+    def from_config(cls, config) -> 'SchemaOptions':
+        """从 test_data_config.ini 的 [schema] 部分读取默认参数"""
+        data_config = config.test_data_config
+        return cls(
+            mode=data_config.get('schema', 'mode', fallback=MODE_FULL),
+            sample_size=data_config.getint('schema', 'sample_size', fallback=10),
+            max_depth=data_config.getint('schema', 'max_depth', fallback=0),
+        )
+
+
+def _sample_indices(length: int, sample_size: int) -> List[int]:
+    """返回数组中需要抽样校验的下标：首尾元素加均匀分布的中间元素"""
+    if length <= sample_size:
+        return list(range(length))
+    if sample_size == 1:
+        return [0]
+    step = (length - 1) / (sample_size - 1)
+    return sorted({int(round(i * step)) for i in range(sample_size)})
+
+
+def _type_check(expected_example: Any) -> Callable[[Any], bool]:
+    """根据示例值生成类型判断函数（JSON语义：布尔值不算数字，浮点示例兼容整数）"""
+    if isinstance(expected_example, bool):
+        return lambda value: isinstance(value, bool)
+    if isinstance(expected_example, int):
+        return lambda value: isinstance(value, int) and not isinstance(value, bool)
+    if isinstance(expected_example, float):
+        return lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+    expected_type = type(expected_example)
+    return lambda value: isinstance(value, expected_type)
+
+
+def _build_node(schema: Any):
+    """
+    把示例结构编译为校验节点
+
+    节点签名为 node(actual, pointer, depth, options) -> Mismatch
+    """
+    if schema is None:
+        # null 表示任意类型
+        return lambda actual, pointer, depth, options: None
+
+    if isinstance(schema, dict):
+        children = [(key, JsonMatcher.escape_pointer_token(key), _build_node(value))
+                    for key, value in schema.items()]
+
+        def object_node(actual, pointer, depth, options):
+            if not isinstance(actual, dict):
+                return pointer, f"期望为对象，实际为 {type(actual).__name__}"
+            if options.max_depth and depth >= options.max_depth:
+                return None
+            for key, token, child in children:
+                child_pointer = f"{pointer}/{token}"
+                if key not in actual:
+                    return child_pointer, "缺少字段"
+                mismatch = child(actual[key], child_pointer, depth + 1, options)
+                if mismatch:
+                    return mismatch
+            return None
+        return object_node
+
+    if isinstance(schema, list):
+        item_node = _build_node(schema[0]) if schema else None
+
+        def array_node(actual, pointer, depth, options):
+            if not isinstance(actual, list):
+                return pointer, f"期望为数组，实际为 {type(actual).__name__}"
+            if item_node is None or not actual:
+                return None
+            if options.max_depth and depth >= options.max_depth:
+                return None
+            if options.mode == MODE_SAMPLE:
+                indices = _sample_indices(len(actual), options.sample_size)
+            else:
+                indices = range(len(actual))
+            for index in indices:
+                mismatch = item_node(actual[index], f"{pointer}/{index}", depth + 1, options)
+                if mismatch:
+                    return mismatch
+            return None
+        return array_node
+
+    type_check = _type_check(schema)
+    type_name = type(schema).__name__
+
+    def scalar_node(actual, pointer, depth, options):
+        if not type_check(actual):
+            return pointer, f"期望类型为 {type_name}，实际为 {type(actual).__name__}"
+        return None
+    return scalar_node
+
+
+@lru_cache(maxsize=128)
+def _compile_cached(schema_key: str):
+    return _build_node(json.loads(schema_key))
+
+
+class CompiledSchema:
+    """编译后的结构校验器"""
+
+    def __init__(self, root):
+        self._root = root
+
+    def find_mismatch(self, document: Any, options: Optional[SchemaOptions] = None) -> Mismatch:
+        """
+        校验文档结构，遇到第一个不匹配即返回
+
+        Args:
+            document: 已解析的JSON文档
+            options (SchemaOptions): 校验参数，默认全量校验且不限制深度
+
+        Returns:
+            tuple: (JSON Pointer, 不匹配原因)；结构符合时返回None
+        """
+        return self._root(document, '', 0, options or SchemaOptions())
+
+
+def compile_schema(schema: Any) -> CompiledSchema:
+    """
+    把示例结构编译为校验器，相同结构只编译一次
+
+    示例结构的写法与 assert_json_structure 一致：对象列出必需字段，数组用第一个元素
+    描述所有元素的结构，标量用示例值表示类型，null 表示任意类型
+
+    Args:
+        schema: 示例结构
+
+    Returns:
+        CompiledSchema: 编译后的校验器
+    """
+    return CompiledSchema(_compile_cached(json.dumps(schema, sort_keys=True, ensure_ascii=False)))
+
+
+def _merge_schemas(schemas: List[Any]) -> Any:
+    """合并多个样本推断出的结构：对象取共有字段，类型冲突时退化为任意类型"""
+    if not schemas:
+        return None
+    if all(isinstance(s, dict) for s in schemas):
+        common_keys = [key for key in schemas[0] if all(key in s for s in schemas[1:])]
+        return {key: _merge_schemas([s[key] for s in schemas]) for key in common_keys}
+    if all(isinstance(s, list) for s in schemas):
+        items = [s[0] for s in schemas if s]
+        return [_merge_schemas(items)] if items else []
+    if any(s is None for s in schemas):
+        return None
+    kinds = {type(s) for s in schemas}
+    if len(kinds) == 1:
+        return schemas[0]
+    if kinds <= {int, float}:
+        return 0.0
+    return None
+
+
+def infer_schema(*documents: Any) -> Any:
+    """
+    从一个或多个已记录的响应推断示例结构
+
+    数组中所有元素共同拥有的字段才会成为必需字段，可直接传给 compile_schema
+
+    Args:
+        *documents: 已解析的JSON响应
+
+    Returns:
+        示例结构
+    """
+    def infer(value):
+        if isinstance(value, dict):
+            return {key: infer(item) for key, item in value.items()}
+        if isinstance(value, list):
+            items = [infer(item) for item in value]
+            return [_merge_schemas(items)] if items else []
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, int):
+            return 0
+        if isinstance(value, float):
+            return 0.0
+        if isinstance(value, str):
+            return ''
+        return None
+
+    return _merge_schemas([infer(document) for document in documents])
+
+
+def main():
+    """命令行入口：从记录的JSON响应文件推断示例结构"""
+    parser = argparse.ArgumentParser(description="从记录的JSON响应推断结构校验用的示例结构")
+    parser.add_argument("files", nargs='+', help="JSON响应文件")
+    parser.add_argument("-o", "--output", help="输出文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    documents = []
+    for file_path in args.files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            documents.append(json.load(f))
+    schema_text = json.dumps(infer_schema(*documents), ensure_ascii=False, indent=2)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(schema_text)
+    else:
+        sys.stdout.write(schema_text + '\n')
+
+
+if __name__ == '__main__':
+    main()
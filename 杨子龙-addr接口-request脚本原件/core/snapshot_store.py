@@ -0,0 +1,199 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Iterable, List, Tuple
+
+from core.json_diff import JsonMismatchError, diff_json
+from utils.common_utils import CommonUtils
+from utils.logger import logger
+
+# 忽略路径片段：..（任意深度）、*（任意键或下标）、[数字]、键名
+_IGNORE_TOKEN = re.compile(r'\.\.|\[\*\]|\[\d+\]|[^.\[\]]+')
+_RECURSIVE = '..'
+_WILDCARD = '*'
+
+# 用例 snapshot 列中表示"使用用例编号作为快照名"的取值
+_AUTO_NAMES = ('1', 'true', 'yes', 'y')
+
+
+@lru_cache(maxsize=256)
+def compile_ignore_path(path: str) -> Tuple[Any, ...]:
+    """
+    编译忽略路径
+
+    支持 "created_at"（顶层键）、"data[*].updated_at"、"data.*.id"、"$..created_at"（任意深度的键）
+
+    Returns:
+        tuple: 路径片段，".." 表示任意深度，"*" 表示任意键或下标，数组下标为int
+    """
+    path = path.strip()
+    if path.startswith('$'):
+        path = path[1:]
+    tokens = []
+    for part in _IGNORE_TOKEN.findall(path):
+        if part == '[*]':
+            tokens.append(_WILDCARD)
+        elif part.startswith('['):
+            tokens.append(int(part[1:-1]))
+        else:
+            tokens.append(part)
+    return tuple(tokens)
+
+
+def _remove_path(node: Any, tokens: Tuple[Any, ...]):
+    """在文档中原地删除路径匹配到的字段"""
+    if not tokens:
+        return
+    token, rest = tokens[0], tokens[1:]
+    if token == _RECURSIVE:
+        # 当前层按剩余路径删除，再对每个子节点递归
+        _remove_path(node, rest)
+        children = node.values() if isinstance(node, dict) else node if isinstance(node, list) else ()
+        for child in children:
+            _remove_path(child, tokens)
+        return
+    if isinstance(node, dict):
+        keys = list(node) if token == _WILDCARD else [token] if token in node else []
+        for key in keys:
+            if rest:
+                _remove_path(node[key], rest)
+            else:
+                del node[key]
+    elif isinstance(node, list):
+        if token == _WILDCARD:
+            indexes = range(len(node))
+        elif isinstance(token, int) and 0 <= token < len(node):
+            indexes = [token]
+        else:
+            indexes = []
+        if rest:
+            for index in indexes:
+                _remove_path(node[index], rest)
+        else:
+            for index in sorted(indexes, reverse=True):
+                del node[index]
+
+
+def normalize(document: Any, ignore_paths: Iterable[str] = ()) -> Any:
+    """
+    返回去掉易变字段后的文档副本
+
+    Args:
+        document: 已解析的JSON
+        ignore_paths (iterable): 忽略路径（见 compile_ignore_path）
+    """
+    paths = [compile_ignore_path(path) for path in ignore_paths if path.strip()]
+    if not paths:
+        return document
+    document = copy.deepcopy(document)
+    for tokens in paths:
+        _remove_path(document, tokens)
+    return document
+
+
+def canonical_bytes(document: Any) -> bytes:
+    """规范化序列化：键排序、无多余空白，相同内容得到相同字节"""
+    return json.dumps(document, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+class SnapshotStore:
+    """
+    内容寻址的快照（黄金响应）存储
+
+    规范化后的响应按SHA-256保存在 objects/<前两位>/<哈希>.json，index.json 记录快照名到哈希的映射，
+    相同内容只保存一份。比较时先比哈希，只有不一致时才读取快照做结构化比较
+    """
+
+    def __init__(self, root: str, ignore_paths: Iterable[str] = (), update: bool = False):
+        """
+        Args:
+            root (str): 快照目录
+            ignore_paths (iterable): 比较前从响应中删除的易变字段路径，如 $..created_at
+            update (bool): 更新模式，用实际响应覆盖快照（--update-snapshots）
+        """
+        self.root = root
+        self.ignore_paths = [path.strip() for path in ignore_paths if path.strip()]
+        self.update = update
+        self.index_file = os.path.join(root, 'index.json')
+        self.stats = {'matched': 0, 'mismatched': 0, 'created': 0, 'updated': 0}
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        if not os.path.exists(self.index_file):
+            return {}
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.json")
+
+    @staticmethod
+    def snapshot_name(case: dict) -> str:
+        """用例 snapshot 列为 1/true 时使用用例编号作为快照名，否则列值即快照名"""
+        value = str(case.get('snapshot') or '').strip()
+        if value.lower() in _AUTO_NAMES:
+            return f"case_{case['case_id']}"
+        return value
+
+    def _prepare(self, view) -> Tuple[Any, bytes]:
+        """解析并规范化响应，非JSON响应按文本保存"""
+        try:
+            document = normalize(view.json(), self.ignore_paths)
+        except (ValueError, TypeError):
+            document = view.text
+        return document, canonical_bytes(document)
+
+    def _save(self, name: str, data: bytes, digest: str):
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            CommonUtils.write_atomic(object_path, data)
+        with self._lock:
+            self._index[name] = {'sha256': digest, 'updated_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+            index_data = json.dumps(self._index, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+            CommonUtils.write_atomic(self.index_file, index_data)
+
+    def check(self, case: dict, view):
+        """
+        把响应与用例的快照比较
+
+        快照不存在时以本次响应创建快照；更新模式下用本次响应覆盖快照
+
+        Args:
+            case (dict): 测试用例（snapshot 列不为空）
+            view (ResponseView): 响应视图
+
+        Raises:
+            JsonMismatchError: 响应与快照不一致，diff 为差异列表
+        """
+        name = self.snapshot_name(case)
+        document, data = self._prepare(view)
+        digest = hashlib.sha256(data).hexdigest()
+        entry = self._index.get(name)
+
+        if entry is not None and entry['sha256'] == digest:
+            self.stats['matched'] += 1
+            logger.info(f"快照一致: {name} ({digest[:12]})")
+            return
+
+        if entry is None or self.update:
+            self._save(name, data, digest)
+            self.stats['updated' if entry is not None else 'created'] += 1
+            logger.info(f"{'更新' if entry is not None else '新建'}快照: {name} ({digest[:12]})")
+            return
+
+        self.stats['mismatched'] += 1
+        with open(self._object_path(entry['sha256']), 'r', encoding='utf-8') as f:
+            expected = json.load(f)
+        diff = diff_json(expected, document)
+        raise JsonMismatchError(
+            f"响应与快照 {name} 不一致（快照 {entry['sha256'][:12]}，实际 {digest[:12]}），{diff.format()}\n"
+            f"确认为预期变更时使用 --update-snapshots 更新快照", diff)
+
+    def names(self) -> List[str]:
+        return sorted(self._index)
@@ -0,0 +1,323 @@
+import datetime
+import hashlib
+import hmac
+import itertools
+import random
+import re
+import string
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# ${name} 和 {{name}} 两种占位符
+PLACEHOLDER_PATTERN = re.compile(r'\$\{([^}]+)\}|\{\{([^}]+)\}\}')
+# 函数调用：__name(参数1, 参数2)
+_CALL_PATTERN = re.compile(r'^__(\w+)\((.*)\)$', re.S)
+
+_RAND_STR_ALPHABET = string.ascii_letters + string.digits
+
+
+class TemplateFunction:
+    """模板函数：single 生成单个值，batch（可选）一次生成n个值"""
+
+    __slots__ = ('name', 'single', 'batch')
+
+    def __init__(self, name: str, single: Callable[..., object], batch: Optional[Callable[..., list]] = None):
+        self.name = name
+        self.single = single
+        self.batch = batch
+
+
+_FUNCTIONS: Dict[str, TemplateFunction] = {}
+
+
+def register_function(name: str, batch: Optional[Callable[..., list]] = None):
+    """
+    注册模板函数的装饰器，模板中以 ${__name(参数)} 调用
+
+    Args:
+        name (str): 函数名（不含 __ 前缀）
+        batch (callable): 批量生成函数，签名为 batch(n, *参数)，返回n个值的列表
+    """
+
+    def decorator(func):
+        _FUNCTIONS[name] = TemplateFunction(name, func, batch)
+        return func
+
+    return decorator
+
+
+def get_function(name: str) -> Optional[TemplateFunction]:
+    return _FUNCTIONS.get(name)
+
+
+# ---------------------------------------------------------------- 内置函数
+
+def _batch_uuid(n):
+    # 16字节随机数按RFC 4122设置版本号和变体位，得到uuid4
+    raw = np.frombuffer(np.random.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    digits = raw.tobytes().hex()
+    result = []
+    for i in range(0, 32 * n, 32):
+        h = digits[i:i + 32]
+        result.append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+    return result
+
+
+@register_function('uuid', batch=_batch_uuid)
+def _uuid():
+    return str(uuid.uuid4())
+
+
+@register_function('now')
+def _now(fmt='s'):
+    """当前时间：s（秒级时间戳）、ms（毫秒级时间戳）、iso，或strftime格式"""
+    if fmt == 's':
+        return int(time.time())
+    if fmt == 'ms':
+        return int(time.time() * 1000)
+    if fmt == 'iso':
+        return datetime.datetime.now().isoformat(timespec='seconds')
+    return datetime.datetime.now().strftime(fmt)
+
+
+def _batch_rand_int(n, low=0, high=100):
+    return np.random.randint(int(low), int(high) + 1, size=n).tolist()
+
+
+@register_function('rand_int', batch=_batch_rand_int)
+def _rand_int(low=0, high=100):
+    """闭区间 [low, high] 内的随机整数"""
+    return random.randint(int(low), int(high))
+
+
+def _batch_rand_str(n, length=8):
+    alphabet = np.array(list(_RAND_STR_ALPHABET))
+    chars = alphabet[np.random.randint(0, len(alphabet), size=(n, int(length)))]
+    return [''.join(row) for row in chars]
+
+
+@register_function('rand_str', batch=_batch_rand_str)
+def _rand_str(length=8):
+    return ''.join(random.choices(_RAND_STR_ALPHABET, k=int(length)))
+
+
+def _batch_rand_phone(n):
+    second = np.random.randint(3, 10, size=n)
+    rest = np.random.randint(0, 10 ** 9, size=n)
+    return [f"1{a}{b:09d}" for a, b in zip(second.tolist(), rest.tolist())]
+
+
+@register_function('rand_phone', batch=_batch_rand_phone)
+def _rand_phone():
+    """11位手机号"""
+    return f"1{random.randint(3, 9)}{random.randint(0, 10 ** 9 - 1):09d}"
+
+
+_counters: Dict[str, 'itertools.count'] = {}
+_counters_lock = threading.Lock()
+
+
+def _counter(name):
+    counter = _counters.get(name)
+    if counter is None:
+        with _counters_lock:
+            counter = _counters.setdefault(name, itertools.count(1))
+    return counter
+
+
+def _batch_seq(n, name='default'):
+    counter = _counter(name)
+    return [next(counter) for _ in range(n)]
+
+
+@register_function('seq', batch=_batch_seq)
+def _seq(name='default'):
+    """按名称递增的序号（从1开始，线程安全）"""
+    return next(_counter(name))
+
+
+# 本次执行的标识，保证不同执行生成的唯一名称不重复
+_RUN_ID = format(int(time.time() * 1000) % 16 ** 8, '08x')
+
+
+def _batch_unique_name(n, prefix='user'):
+    return [f"{prefix}_{_RUN_ID}_{i}" for i in _batch_seq(n, '__unique_name')]
+
+
+@register_function('unique_name', batch=_batch_unique_name)
+def _unique_name(prefix='user'):
+    """在本次执行和历次执行中都不重复的名称，如 user_5f3a18c2_12"""
+    return f"{prefix}_{_RUN_ID}_{_seq('__unique_name')}"
+
+
+@register_function('md5')
+def _md5(text=''):
+    return hashlib.md5(str(text).encode('utf-8')).hexdigest()
+
+
+@register_function('sha256')
+def _sha256(text=''):
+    return hashlib.sha256(str(text).encode('utf-8')).hexdigest()
+
+
+@register_function('hmac_sha256')
+def _hmac_sha256(key='', text=''):
+    return hmac.new(str(key).encode('utf-8'), str(text).encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+# ---------------------------------------------------------------- 模板编译
+
+class _VariableRef:
+    """参数中以 $ 开头的变量引用，渲染时取值"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+
+def _parse_args(text: str) -> Tuple[object, ...]:
+    args = []
+    if not text.strip():
+        return ()
+    for arg in text.split(','):
+        arg = arg.strip()
+        if len(arg) >= 2 and arg[0] == arg[-1] and arg[0] in '\'"':
+            args.append(arg[1:-1])
+        elif arg.startswith('$') and len(arg) > 1:
+            args.append(_VariableRef(arg[1:]))
+        else:
+            args.append(arg)
+    return tuple(args)
+
+
+class _Placeholder:
+    """模板中的一个占位符：变量引用或函数调用"""
+
+    __slots__ = ('raw', 'name', 'function', 'args')
+
+    def __init__(self, raw: str, expression: str):
+        self.raw = raw
+        self.name = expression
+        self.function = None
+        self.args = ()
+        match = _CALL_PATTERN.match(expression)
+        if match:
+            function = get_function(match.group(1))
+            if function is not None:
+                self.function = function
+                self.args = _parse_args(match.group(2))
+
+    def _resolve_args(self, lookup):
+        return [lookup(arg.name) if isinstance(arg, _VariableRef) else arg for arg in self.args]
+
+    def resolve(self, lookup: Callable[[str], object]):
+        if self.function is not None:
+            return self.function.single(*self._resolve_args(lookup))
+        return lookup(self.name)
+
+    def resolve_batch(self, lookup: Callable[[str], object], n: int) -> list:
+        if self.function is None:
+            return [lookup(self.name)] * n
+        args = self._resolve_args(lookup)
+        if self.function.batch is not None and NUMPY_AVAILABLE:
+            return self.function.batch(n, *args)
+        return [self.function.single(*args) for _ in range(n)]
+
+
+class CompiledTemplate:
+    """
+    编译后的模板：文本在编译时切分为常量片段和占位符，函数调用在编译时解析为可调用对象，
+    渲染时只做取值和拼接
+    """
+
+    __slots__ = ('text', 'parts', 'has_placeholders')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts: List[object] = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            if match.start() > position:
+                self.parts.append(text[position:match.start()])
+            self.parts.append(_Placeholder(match.group(0), match.group(1) or match.group(2)))
+            position = match.end()
+        if position < len(text):
+            self.parts.append(text[position:])
+        self.has_placeholders = any(isinstance(part, _Placeholder) for part in self.parts)
+
+    def variables(self) -> List[str]:
+        """模板引用的变量名：变量占位符，以及函数参数中的 $变量"""
+        names = []
+        for part in self.parts:
+            if not isinstance(part, _Placeholder):
+                continue
+            if part.function is None:
+                names.append(part.name.strip())
+            else:
+                names.extend(arg.name for arg in part.args if isinstance(arg, _VariableRef))
+        return names
+
+    def render(self, lookup: Callable[[str], object]) -> Tuple[str, List[str]]:
+        """
+        渲染模板
+
+        Args:
+            lookup (callable): 按变量名取值，未找到时返回空值
+
+        Returns:
+            tuple: (渲染结果, 未找到的变量名列表)；未找到的变量保留原占位符
+        """
+        if not self.has_placeholders:
+            return self.text, []
+        pieces = []
+        missing = []
+        for part in self.parts:
+            if isinstance(part, str):
+                pieces.append(part)
+                continue
+            value = part.resolve(lookup)
+            # 函数的返回值原样输出（包括0），变量为空时视为未找到
+            if value or part.function is not None:
+                pieces.append(str(value))
+            else:
+                pieces.append(part.raw)
+                missing.append(part.name)
+        return ''.join(pieces), missing
+
+    def render_batch(self, lookup: Callable[[str], object], n: int) -> List[str]:
+        """
+        一次渲染n份模板，支持批量生成的函数（uuid、rand_int等）按列一次生成n个值
+
+        Returns:
+            list: n个渲染结果
+        """
+        if not self.has_placeholders:
+            return [self.text] * n
+        columns = []
+        for part in self.parts:
+            if isinstance(part, str):
+                columns.append([part] * n)
+                continue
+            values = part.resolve_batch(lookup, n)
+            columns.append([str(v) if (v or part.function is not None) else part.raw for v in values])
+        return [''.join(row) for row in zip(*columns)]
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text: str) -> CompiledTemplate:
+    """编译模板（按文本缓存，同一模板只编译一次）"""
+    return CompiledTemplate(text)
@@ -6,17 +6,36 @@
 # @File    : test_executor.py
 # @Software: PyCharm
 # core/test_executor.py
+import hashlib
 import json
+import time
 import allure
 import pytest
+
+from core.assertion_plan import AssertionPlan
+from core.metrics import EndpointTimings
+from core.request_handler import get_response_text
+from core.response_view import ResponseView
+from core.result_store import OUTCOME_ERROR, OUTCOME_FAILED, OUTCOME_PASSED, OUTCOME_SKIPPED
 from utils.logger import logger
 
 
 class TestExecutor:
-    def __init__(self, request_handler, data_handler, assert_handler):
+    def __init__(self, request_handler, data_handler, assert_handler, credential_cache=None, snapshot_store=None,
+                 result_store=None, write_back=None):
         self.request_handler = request_handler
         self.data_handler = data_handler
         self.assert_handler = assert_handler
+        # 可选的登录凭证缓存（见 core.credential_cache）
+        self.credential_cache = credential_cache
+        # 可选的快照存储，用例 snapshot 列不为空时与快照比较（见 core.snapshot_store）
+        self.snapshot_store = snapshot_store
+        # 可选的结构化结果库，每条用例的执行结果写入SQLite（见 core.result_store）
+        self.result_store = result_store
+        # 可选的结果写回，执行结束后统一写回用例文件（见 core.write_back）
+        self.write_back = write_back
+        # 当前用例的执行结果，只在启用结果库时收集
+        self._result = None
 
     def execute_test_case(self, case):
         """
@@ -30,9 +49,63 @@ class TestExecutor:
         # 使用allure（如果可用）
         if hasattr(allure, 'step'):
             with allure.step(f"执行用例: {case['case_id']} - {case['case_name']}"):
-                return self._execute_case_logic(case)
+                return self._execute_and_record(case)
         else:
+            return self._execute_and_record(case)
+
+    def _execute_and_record(self, case):
+        """执行用例，启用结果库/结果写回时收集执行结果（含失败原因）"""
+        if self.result_store is None and self.write_back is None:
             return self._execute_case_logic(case)
+        self._result = {'case_id': str(case['case_id']), 'case_name': case['case_name'],
+                        'method': str(case['method']).upper(), 'started_at': time.time(), 'outcome': OUTCOME_ERROR}
+        start = time.perf_counter()
+        try:
+            result = self._execute_case_logic(case)
+            self._result['outcome'] = OUTCOME_PASSED
+            return result
+        except pytest.skip.Exception:
+            self._result['outcome'] = OUTCOME_SKIPPED
+            raise
+        except (pytest.fail.Exception, AssertionError) as e:
+            self._result['outcome'] = OUTCOME_FAILED
+            self._result['failure'] = str(e)
+            raise
+        except Exception as e:
+            self._result['failure'] = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            self._result['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            if self.result_store is not None:
+                self.result_store.record(self._result)
+            if self.write_back is not None and self._result['outcome'] != OUTCOME_SKIPPED:
+                self.write_back.record(case, self._result['outcome'] == OUTCOME_PASSED,
+                                       self._result.get('response_text'))
+            self._result = None
+
+    def _record_response(self, method, url, response):
+        """记录响应的状态码、耗时、重试次数和响应体哈希"""
+        result = self._result
+        result['endpoint'] = EndpointTimings.endpoint_key(method, url)
+        if response is None:
+            return
+        result['status_code'] = response.status_code
+        elapsed = getattr(response, 'elapsed', None)
+        if elapsed is not None:
+            result['elapsed_ms'] = round(elapsed.total_seconds() * 1000, 2)
+        result['timings'] = getattr(response, 'timings', None)
+        retry_info = getattr(response, 'retry_info', None)
+        result['retries'] = retry_info['retries'] if retry_info else 0
+        # 流式读取时 content 只是保留的前缀，完整响应体的哈希在读取时已边读边计算
+        stream_info = getattr(response, 'stream_info', None)
+        if stream_info:
+            result['body_sha256'] = stream_info['sha256']
+        else:
+            content = getattr(response, 'content', None)
+            if isinstance(content, bytes):
+                result['body_sha256'] = hashlib.sha256(content).hexdigest()
+        if self.write_back is not None:
+            result['response_text'] = get_response_text(response)
 
     def _execute_case_logic(self, case):
         """
@@ -41,6 +114,111 @@ class TestExecutor:
         Args:
             case (dict): 测试用例数据
         """
+        # stream 列在加载用例时校验，格式错误时不发送请求
+        if case.get('stream_error'):
+            logger.error(case['stream_error'])
+            pytest.fail(case['stream_error'])
+
+        url, headers, params, body, content_type = self._build_request(case)
+
+        # 登录用例：凭证缓存未过期时直接恢复认证变量，不再发送登录请求
+        login_user = None
+        if (self.credential_cache is not None and self.credential_cache.is_login_case(url)
+                and self.credential_cache.extracts_credentials(case)):
+            login_user = self.credential_cache.user_of(body)
+            self.credential_cache.remember_login_case(login_user, case)
+            if self._restore_cached_credentials(login_user):
+                return
+
+        response = self._send_case_request(case, url, headers, params, body, content_type)
+
+        # 使用缓存凭证的请求返回401：刷新凭证后重新发送一次
+        if response is not None and response.status_code == 401 and self._refresh_credentials(case):
+            url, headers, params, body, content_type = self._build_request(case)
+            response = self._send_case_request(case, url, headers, params, body, content_type)
+
+        # 如果没有收到有效响应，则直接失败
+        if response is None:
+            cause = self.request_handler.get_last_error()
+            message = f"请求发送失败，未收到有效响应: {cause}" if cause else "请求发送失败，未收到有效响应"
+            logger.error(message)
+            pytest.fail(message)
+
+        self._verify_and_extract(case, response)
+
+        if login_user is not None:
+            self._store_credentials(login_user, case)
+
+        # 在Allure报告中显示当前变量状态（如果可用）
+        all_vars = self.data_handler.get_all_variables()
+        if all_vars and hasattr(allure, 'attach'):
+            allure.attach(
+                json.dumps(all_vars, ensure_ascii=False, indent=2),
+                "当前变量",
+                allure.attachment_type.JSON
+            )
+
+        logger.info(f"测试用例执行完成: {case['case_id']} - {case['case_name']}")
+
+    def _restore_cached_credentials(self, user):
+        """
+        从凭证缓存恢复登录用例提取的变量
+
+        Returns:
+            bool: 是否命中缓存
+        """
+        cached = self.credential_cache.get(user)
+        if cached is None:
+            self.credential_cache.active_user = user
+            self.credential_cache.active_from_cache = False
+            return False
+        for key, value in cached.items():
+            self.data_handler.set_variable(key, value)
+        self.credential_cache.active_user = user
+        self.credential_cache.active_from_cache = True
+        logger.info(f"使用缓存的登录凭证，跳过登录请求: 用户={user}, 变量={list(cached)}")
+        if hasattr(allure, 'attach'):
+            allure.attach(json.dumps(list(cached), ensure_ascii=False), "使用缓存的登录凭证",
+                          allure.attachment_type.TEXT)
+        return True
+
+    def _store_credentials(self, user, case):
+        """登录用例执行成功后缓存它提取到的全部变量"""
+        names = list(self.credential_cache.variables)
+        names += [name for name in self.credential_cache.extracted_names(case) if name not in names]
+        values = {name: self.data_handler.get_variable(name) for name in names}
+        self.credential_cache.put(user, values)
+        self.credential_cache.active_user = user
+        self.credential_cache.active_from_cache = False
+
+    def _refresh_credentials(self, case):
+        """
+        请求使用了缓存的凭证却返回401时，清除缓存并执行刷新用例
+
+        Returns:
+            bool: 是否已刷新凭证，需要重新发送请求
+        """
+        cache = self.credential_cache
+        if cache is None or not cache.active_from_cache or not cache.references_credentials(case):
+            return False
+        user = cache.active_user
+        refresh_case = cache.refresh_case(user)
+        if refresh_case is None:
+            logger.warning(f"缓存的凭证已失效，但没有可用的刷新用例: 用户={user}")
+            return False
+        logger.info(f"缓存的凭证已失效(401)，执行刷新用例: {refresh_case['case_id']} - {refresh_case['case_name']}")
+        cache.invalidate(user)
+        cache.stats['refreshed'] += 1
+        self._execute_case_logic(refresh_case)
+        return True
+
+    def _build_request(self, case):
+        """
+        替换变量并解析请求参数
+
+        Returns:
+            tuple: (url, headers, params, body, content_type)
+        """
         # 替换请求中的变量
         logger.debug("开始处理请求参数中的变量替换")
         url = self.data_handler.replace_variables(case['url'])
@@ -87,7 +265,10 @@ class TestExecutor:
                     logger.warning(f"body JSON解析失败: {e}, 使用空字典")
 
         logger.debug("请求参数变量替换完成")
+        return url, headers, params, body, content_type
 
+    def _send_case_request(self, case, url, headers, params, body, content_type):
+        """发送用例请求，返回响应（失败时为None）"""
         # 发送请求
         logger.info(f"发送 {case['method']} 请求到 {url}")
         # 根据Content-Type决定使用哪个参数发送body
@@ -97,7 +278,8 @@ class TestExecutor:
                 url=url,
                 headers=headers,
                 params=params,
-                plain_text=body
+                plain_text=body,
+                stream_mode=case.get('stream')
             )
         else:
             response = self.request_handler.send_request(
@@ -105,55 +287,50 @@ class TestExecutor:
                 url=url,
                 headers=headers,
                 params=params,
-                json_data=body
+                json_data=body,
+                stream_mode=case.get('stream')
             )
+        if self._result is not None:
+            self._record_response(case['method'], url, response)
+        return response
 
-        # 断言状态码内容
-        if case['expected_status']:
-            logger.info(f"执行状态码断言: 期望 {case['expected_status']} 实际 {response.status_code}")
-        try:
-            self.assert_handler.assert_content_contains(response.status_code, case['expected_status'])
-        except AssertionError as e:
-            logger.error(f"状态码断言失败: {str(e)}")
-            pytest.fail(f"状态码断言失败: {str(e)}")
-        except Exception as e:
-            logger.error(f"状态码断言异常: {str(e)}")
-            pytest.fail(f"状态码断言异常: {str(e)}")
-
-        # 如果没有收到有效响应且需要断言内容，则失败
-        if response is None:
-            logger.error("请求发送失败，未收到有效响应")
-            pytest.fail("请求发送失败，未收到有效响应")
-
-        # 断言响应内容
-        if case['expected_content']:
-            logger.info(f"执行内容包含断言: 期望包含 '{case['expected_content']}'")
+    def _verify_and_extract(self, case, response):
+        """执行断言并提取变量"""
+        # 执行断言计划：所有检查共享同一个响应视图，失败项统一收集后一次性报告
+        view = ResponseView(response)
+        plan = case.get('assertion_plan')
+        if plan is None:
+            plan = AssertionPlan.compile(case)
+        failures = plan.run(view, self.assert_handler)
+        if case.get('snapshot') and self.snapshot_store is not None:
+            logger.info(f"执行快照断言: {self.snapshot_store.snapshot_name(case)}")
             try:
-                self.assert_handler.assert_content_contains(response, case['expected_content'])
+                self.snapshot_store.check(case, view)
             except AssertionError as e:
-                logger.error(f"内容断言失败: {str(e)}")
-                pytest.fail(f"内容断言失败: {str(e)}")
+                failures.append((None, f"快照断言失败: {str(e)}", getattr(e, 'diff', None)))
             except Exception as e:
-                logger.error(f"内容断言异常: {str(e)}")
-                pytest.fail(f"内容断言异常: {str(e)}")
-
-        # 断言JSON值
-        if case['json_path'] and case['expected_json_value']:
-            logger.info(f"执行JSON值断言: 路径 {case['json_path']}, 期望值 {case['expected_json_value']}")
-            try:
-                self.assert_handler.assert_json_value(response, case['json_path'], case['expected_json_value'])
-            except AssertionError as e:
-                logger.error(f"JSON值断言失败: {str(e)}")
-                pytest.fail(f"JSON值断言失败: {str(e)}")
-            except Exception as e:
-                logger.error(f"JSON值断言异常: {str(e)}")
-                pytest.fail(f"JSON值断言异常: {str(e)}")
+                failures.append((None, f"快照断言异常: {str(e)}", None))
+        total = len(plan) + (1 if case.get('snapshot') and self.snapshot_store is not None else 0)
+        if self._result is not None:
+            self._result['assertions'] = total
+            self._result['failed_assertions'] = len(failures)
+        if failures:
+            failure_msg = "\n".join(reason for _, reason, _ in failures)
+            logger.error(f"共 {len(failures)}/{total} 项断言失败:\n{failure_msg}")
+            if hasattr(allure, 'attach'):
+                allure.attach(failure_msg, "断言失败汇总", allure.attachment_type.TEXT)
+                # JSON比较失败时附上结构化的差异列表，HTML报告中可直接查看
+                for check, _, diff in failures:
+                    if diff is not None:
+                        allure.attach(json.dumps(diff.to_dict(), ensure_ascii=False, indent=2),
+                                      f"JSON差异: {check.name if check is not None else '快照断言'}",
+                                      allure.attachment_type.JSON)
+            pytest.fail(failure_msg)
 
         # 提取变量
         if case['extract_key'] and case['save_var_name']:
             logger.info(f"开始提取变量: 键={case['extract_key']}, 保存为={case['save_var_name']}")
             try:
-                response_json = response.json()
                 # 特殊处理类似 "token=json.token" 的格式
                 extract_key = case['extract_key']
                 if '=' in extract_key and not extract_key.startswith(('json.', 'regex:')):
@@ -162,7 +339,7 @@ class TestExecutor:
                     # 如果json_path以"json."开头，则去掉前缀
                     if json_path.startswith('json.'):
                         json_path = json_path[5:]  # 去掉"json."前缀
-                    extracted_value = self.data_handler.extract_value(response_json, json_path)
+                    extracted_value = self.data_handler.extract_from_response(view, json_path)
                     if isinstance(extracted_value, dict):
                         # 多值提取结果，分别存储每个变量
                         for key, value in extracted_value.items():
@@ -189,7 +366,7 @@ class TestExecutor:
                         logger.warning(f"变量提取失败，未提取到值: {extract_key}")
                 else:
                     # 原有逻辑
-                    extracted_value = self.data_handler.extract_value(response_json, extract_key)
+                    extracted_value = self.data_handler.extract_from_response(view, extract_key)
                     if isinstance(extracted_value, dict):
                         # 多值提取结果，分别存储每个变量
                         for key, value in extracted_value.items():
@@ -225,7 +402,6 @@ class TestExecutor:
             # 处理只有extract_key没有save_var_name的情况（如token=json.token格式）
             logger.info(f"开始提取变量（简化格式）: 键={case['extract_key']}")
             try:
-                response_json = response.json()
                 extract_key = case['extract_key']
                 if '=' in extract_key and not extract_key.startswith(('json.', 'regex:')):
                     # 处理 "变量名=提取路径" 格式，如 "token=json.token"
@@ -233,7 +409,7 @@ class TestExecutor:
                     # 如果json_path以"json."开头，则去掉前缀
                     if json_path.startswith('json.'):
                         json_path = json_path[5:]  # 去掉"json."前缀
-                    extracted_value = self.data_handler.extract_value(response_json, json_path)
+                    extracted_value = self.data_handler.extract_from_response(view, json_path)
                     if isinstance(extracted_value, dict):
                         # 多值提取结果，分别存储每个变量
                         for key, value in extracted_value.items():
@@ -267,14 +443,3 @@ class TestExecutor:
                 if hasattr(allure, 'attach'):
                     allure.attach(str(e), "变量提取异常", allure.attachment_type.TEXT)
                 pytest.fail(error_msg)
-
-        # 在Allure报告中显示当前变量状态（如果可用）
-        all_vars = self.data_handler.get_all_variables()
-        if all_vars and hasattr(allure, 'attach'):
-            allure.attach(
-                json.dumps(all_vars, ensure_ascii=False, indent=2),
-                "当前变量",
-                allure.attachment_type.JSON
-            )
-
-        logger.info(f"测试用例执行完成: {case['case_id']} - {case['case_name']}")
@@ -0,0 +1,297 @@
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.wait import wait_for_read
+
+from utils.logger import logger
+
+
+class ConnectionStats:
+    """
+    连接池统计（线程安全）
+
+    计数项：
+        requests: 从连接池取连接的次数
+        reused: 复用了已建立的长连接
+        new_connections: 新建的连接对象
+        reconnects: 池中连接已断开，需要重新建立TCP连接
+        idle_closed: 超过空闲超时被主动关闭的连接
+        discarded: 连接池已满，用完后直接关闭丢弃的连接
+        warmed: 预热时建立的连接
+    """
+
+    _FIELDS = ('requests', 'reused', 'new_connections', 'reconnects', 'idle_closed', 'discarded', 'warmed')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self._FIELDS, 0)
+
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def snapshot(self) -> Dict[str, float]:
+        """返回计数快照，附带复用率"""
+        with self._lock:
+            data = dict(self._counters)
+        data['reuse_ratio'] = round(data['reused'] / data['requests'], 4) if data['requests'] else 0.0
+        return data
+
+
+# 当前线程正在发送的请求的分阶段耗时，由TimingConnection写入
+_timing_local = threading.local()
+
+# 耗时分解的阶段：DNS解析、TCP建连、TLS握手、发送请求、等待首字节、下载响应体
+TIMING_PHASES = ('dns', 'connect', 'tls', 'send', 'ttfb', 'download')
+
+
+def _add_timing(phase: str, seconds: float):
+    record = getattr(_timing_local, 'record', None)
+    if record is not None:
+        record[phase] = record.get(phase, 0.0) + seconds
+
+
+class _TimingMixin:
+    """记录建连和收发各阶段耗时的连接类"""
+
+    def _new_conn(self):
+        dns_host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror:
+            # 解析失败交给urllib3按原逻辑抛出NameResolutionError
+            addresses = []
+        _add_timing('dns', time.perf_counter() - start)
+        # 只有一个地址时直接连接解析结果，使建连耗时不再包含第二次解析；多个地址仍交给urllib3依次尝试
+        if len(addresses) == 1:
+            self._dns_host = addresses[0][4][0]
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+            _add_timing('connect', time.perf_counter() - start)
+
+    def connect(self):
+        record = getattr(_timing_local, 'record', None)
+        before = sum(record.get(p, 0.0) for p in ('dns', 'connect')) if record is not None else 0.0
+        start = time.perf_counter()
+        super().connect()
+        if record is not None and isinstance(self, HTTPSConnection):
+            elapsed = time.perf_counter() - start
+            socket_time = sum(record.get(p, 0.0) for p in ('dns', 'connect')) - before
+            _add_timing('tls', max(elapsed - socket_time, 0.0))
+
+    def request(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            _add_timing('send', time.perf_counter() - start)
+
+    def getresponse(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().getresponse(*args, **kwargs)
+        finally:
+            _add_timing('ttfb', time.perf_counter() - start)
+
+
+class PooledHTTPSConnection(HTTPSConnection):
+    """
+    能正确判断空闲TLS长连接是否可用的连接类
+
+    TLS 1.3 服务端在握手完成后会发送会话票据，空闲连接因此变为可读，
+    urllib3 会误判为连接已断开并重新建连，预热的HTTPS连接也就全部失效
+    """
+
+    @property
+    def is_connected(self) -> bool:
+        if self.sock is None:
+            return False
+        if not wait_for_read(self.sock, timeout=0.0):
+            return True
+        if not isinstance(self.sock, ssl.SSLSocket):
+            return False
+        # 非阻塞读取一次：只有握手消息时抛出SSLWantReadError，连接仍然可用
+        timeout = self.sock.gettimeout()
+        try:
+            self.sock.setblocking(False)
+            self.sock.recv(1)
+        except ssl.SSLWantReadError:
+            return True
+        except OSError:
+            return False
+        finally:
+            self.sock.settimeout(timeout)
+        # 读到EOF或意外的数据，连接不能再复用
+        return False
+
+
+class TimingHTTPConnection(_TimingMixin, HTTPConnection):
+    pass
+
+
+class TimingHTTPSConnection(_TimingMixin, PooledHTTPSConnection):
+    pass
+
+
+def _counting_pool_class(base, stats: ConnectionStats, keep_alive: bool, idle_timeout: float,
+                         connection_cls: Optional[type] = None):
+    """生成带统计、空闲超时和长连接开关的连接池类"""
+
+    class CountingConnectionPool(base):
+        # 预热期间取连接不计入请求统计
+        warming = False
+        ConnectionCls = connection_cls or base.ConnectionCls
+
+        def _new_conn(self):
+            conn = super()._new_conn()
+            conn._pool_fresh = True
+            stats.incr('new_connections')
+            return conn
+
+        def _get_conn(self, timeout=None):
+            conn = super()._get_conn(timeout=timeout)
+            if self.warming:
+                return conn
+            stats.incr('requests')
+            if getattr(conn, '_pool_fresh', False):
+                conn._pool_fresh = False
+                return conn
+
+            idle_since = getattr(conn, '_pool_idle_since', None)
+            if (conn.sock is not None and idle_timeout and idle_since is not None
+                    and time.monotonic() - idle_since > idle_timeout):
+                conn.close()
+                stats.incr('idle_closed')
+
+            if conn.sock is None:
+                stats.incr('reconnects')
+            else:
+                stats.incr('reused')
+            return conn
+
+        def _put_conn(self, conn):
+            if conn is not None:
+                if not keep_alive:
+                    conn.close()
+                conn._pool_idle_since = time.monotonic()
+                if self.pool is not None and self.pool.full():
+                    stats.incr('discarded')
+            super()._put_conn(conn)
+
+    CountingConnectionPool.__name__ = f"Counting{base.__name__}"
+    return CountingConnectionPool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    可配置连接池的传输适配器
+
+    在requests默认适配器的基础上支持：长连接开关、空闲超时、连接预热，
+    并统计连接复用和重建次数，用于判断连接池大小是否合适。
+    开启 record_timings 后，每个响应的 timings 属性记录各阶段耗时（毫秒）
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, idle_timeout: float = 0, record_timings: bool = False, **kwargs):
+        """
+        Args:
+            pool_connections (int): 缓存的连接池个数（按主机区分）
+            pool_maxsize (int): 每个连接池保存的最大连接数
+            pool_block (bool): 连接耗尽时是否等待空闲连接，False 时新建临时连接，用完丢弃
+            keep_alive (bool): 是否复用长连接，False 时每个请求后关闭连接
+            idle_timeout (float): 连接空闲超过该秒数后不再复用，0 表示不限制
+            record_timings (bool): 是否记录DNS、建连、TLS、首字节和下载的分阶段耗时
+            **kwargs: 传给HTTPAdapter的其他参数（如max_retries）
+        """
+        self.stats = ConnectionStats()
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self.record_timings = record_timings
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                         pool_block=pool_block, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        timing = self.record_timings
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, self.stats, self.keep_alive, self.idle_timeout,
+                                         TimingHTTPConnection if timing else None),
+            'https': _counting_pool_class(HTTPSConnectionPool, self.stats, self.keep_alive, self.idle_timeout,
+                                          TimingHTTPSConnection if timing else PooledHTTPSConnection),
+        }
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if not self.record_timings:
+            return super().send(request, stream=stream, timeout=timeout, verify=verify,
+                                cert=cert, proxies=proxies)
+
+        record = {}
+        _timing_local.record = record
+        start = time.perf_counter()
+        try:
+            response = super().send(request, stream=stream, timeout=timeout, verify=verify,
+                                    cert=cert, proxies=proxies)
+            if not stream:
+                # 在这里读取响应体，才能把下载耗时和等待首字节的耗时区分开
+                download_start = time.perf_counter()
+                response.content
+                record['download'] = time.perf_counter() - download_start
+        finally:
+            _timing_local.record = None
+        total = time.perf_counter() - start
+
+        timings = {phase: round(record.get(phase, 0.0) * 1000, 3) for phase in TIMING_PHASES}
+        timings['total'] = round(total * 1000, 3)
+        timings['reused'] = 'connect' not in record
+        response.timings = timings
+        return response
+
+    def warmup(self, url: str, connections: int, verify: bool = True) -> int:
+        """
+        预先建立到目标主机的连接并放回连接池
+
+        Args:
+            url (str): 目标地址（通常为base_url）
+            connections (int): 预热的连接数，不超过连接池大小
+            verify (bool): 与发送请求时的verify参数一致，两者不同会对应不同的连接池
+
+        Returns:
+            int: 成功建立的连接数
+        """
+        # 与发送请求时取连接池的方式保持一致，否则预热的连接会落在另一个连接池中
+        if hasattr(self, 'get_connection_with_tls_context'):
+            pool = self.get_connection_with_tls_context(requests.Request('GET', url).prepare(), verify=verify)
+        else:
+            pool = self.get_connection(url)
+        count = min(connections, self._pool_maxsize)
+        conns = []
+        pool.warming = True
+        try:
+            for _ in range(count):
+                conn = pool._get_conn()
+                conns.append(conn)
+                if conn.sock is None:
+                    conn.connect()
+                # 预热的连接在第一次使用时计为复用
+                conn._pool_fresh = False
+        except Exception as e:
+            logger.warning(f"连接预热失败: {url}: {str(e)}")
+        finally:
+            pool.warming = False
+            for conn in conns:
+                pool._put_conn(conn)
+        warmed = sum(1 for conn in conns if conn.sock is not None)
+        self.stats.incr('warmed', warmed)
+        logger.info(f"连接预热完成: {url}, 建立 {warmed} 个连接")
+        return warmed
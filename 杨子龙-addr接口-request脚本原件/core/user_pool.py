@@ -0,0 +1,184 @@
+import csv
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from core.data_handler import DataHandler
+from core.request_handler import get_response_json
+from utils.logger import logger
+
+
+def load_users(file_path: str) -> List[Dict[str, str]]:
+    """
+    读取用户凭证文件（CSV或JSON数组），每行/每个对象为一个用户，字段会覆盖登录用例请求体中的同名字段
+
+    Args:
+        file_path (str): 用户文件路径
+
+    Returns:
+        list: 用户字段字典列表
+    """
+    if file_path.lower().endswith('.json'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            users = json.load(f)
+    else:
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            users = list(csv.DictReader(f))
+    return [{str(k).strip(): v for k, v in user.items() if k} for user in users]
+
+
+class PooledUser:
+    """池中的一个已登录用户"""
+
+    def __init__(self, fields: Dict[str, str], user_field: str = 'username'):
+        self.fields = fields
+        self.name = str(fields.get(user_field, ''))
+        self.variables: Dict[str, str] = {}
+        self.expires_at = 0.0
+        self.logins = 0
+        self._lock = threading.Lock()
+
+    def update(self, variables: Dict[str, str], ttl: float):
+        with self._lock:
+            self.variables = dict(variables)
+            self.expires_at = time.time() + ttl
+            self.logins += 1
+
+    def get_variables(self) -> Dict[str, str]:
+        """返回当前认证变量的副本（后台刷新可能随时替换）"""
+        with self._lock:
+            return dict(self.variables)
+
+
+class UserPool:
+    """
+    预登录用户池（线程安全）
+
+    启动时通过现有的登录用例并发登录用户文件中的全部用户，虚拟用户通过 lease() 独占租用一个用户，
+    用完归还；后台线程在凭证到期前 refresh_margin 秒重新登录，把登录从被测量的路径中移除
+    """
+
+    def __init__(self, request_handler, login_case: dict, users: List[Dict[str, str]],
+                 ttl: float = 3600, refresh_margin: float = 300, login_concurrency: int = 8,
+                 user_field: str = 'username'):
+        """
+        Args:
+            request_handler (RequestHandler): 请求处理器
+            login_case (dict): 登录用例，提供请求方法、URL、请求头、请求体模板和 extract_key
+            users (list): 用户字段列表（见 load_users）
+            ttl (float): 凭证有效期（秒）
+            refresh_margin (float): 距离到期还有多少秒时后台重新登录
+            login_concurrency (int): 并发登录的线程数
+            user_field (str): 表示用户名的字段
+        """
+        self.request_handler = request_handler
+        self.login_case = login_case
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.login_concurrency = max(login_concurrency, 1)
+        self.users = [PooledUser(fields, user_field) for fields in users]
+        self._available: 'queue.Queue[PooledUser]' = queue.Queue()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._extractor = DataHandler()
+
+    def _login(self, user: PooledUser) -> bool:
+        """使用登录用例登录单个用户，成功时更新认证变量"""
+        case = self.login_case
+        headers = json.loads(case['headers']) if case.get('headers') else {}
+        body = json.loads(case['body']) if case.get('body') else {}
+        if isinstance(body, dict):
+            body.update({key: value for key, value in user.fields.items() if key in body})
+        response = self.request_handler.send_request(case['method'], case['url'], headers=headers,
+                                                     json_data=body)
+        if response is None or response.status_code >= 400:
+            status = response.status_code if response is not None else self.request_handler.get_last_error()
+            logger.error(f"用户池登录失败: 用户={user.name}, 结果={status}")
+            return False
+
+        variables = {}
+        response_json = get_response_json(response)
+        for item in case.get('extract_key', '').split(';'):
+            if not item.strip():
+                continue
+            name, _, path = item.partition('=')
+            path = (path or name).strip()
+            if path.startswith('json.'):
+                path = path[5:]
+            value = self._extractor.extract_value(response_json, path)
+            if value:
+                variables[name.strip()] = value
+        if not variables:
+            logger.error(f"用户池登录未提取到认证变量: 用户={user.name}, extract_key={case.get('extract_key')}")
+            return False
+        user.update(variables, self.ttl)
+        return True
+
+    def start(self) -> int:
+        """
+        并发登录全部用户并启动后台刷新线程
+
+        Returns:
+            int: 登录成功的用户数
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.login_concurrency) as executor:
+            results = list(executor.map(self._login, self.users))
+        for user, ok in zip(self.users, results):
+            if ok:
+                self._available.put(user)
+        ready = sum(results)
+        logger.info(f"用户池登录完成: {ready}/{len(self.users)} 个用户，耗时 {time.perf_counter() - start:.2f}秒")
+
+        if ready and self.refresh_margin > 0:
+            self._refresher = threading.Thread(target=self._refresh_loop, name='user-pool-refresher', daemon=True)
+            self._refresher.start()
+        return ready
+
+    def _refresh_loop(self):
+        # 检查间隔不超过刷新提前量的一半，保证在到期前至少检查到一次
+        interval = max(min(self.refresh_margin / 2, 30.0), 0.05)
+        while not self._stop.wait(interval):
+            due = [user for user in self.users
+                   if user.logins and user.expires_at - time.time() <= self.refresh_margin]
+            if not due:
+                continue
+            with ThreadPoolExecutor(max_workers=self.login_concurrency) as executor:
+                results = list(executor.map(self._login, due))
+            logger.info(f"用户池凭证已刷新: {sum(results)}/{len(due)} 个用户")
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """
+        独占租用一个已登录用户，退出上下文时归还
+
+        Args:
+            timeout (float): 等待空闲用户的最长秒数，None 表示一直等待
+
+        Yields:
+            PooledUser: 已登录的用户
+
+        Raises:
+            TimeoutError: 等待超时
+        """
+        try:
+            user = self._available.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"等待空闲用户超时（{timeout}秒），用户池大小: {len(self.users)}")
+        try:
+            yield user
+        finally:
+            self._available.put(user)
+
+    def available(self) -> int:
+        return self._available.qsize()
+
+    def close(self):
+        """停止后台刷新线程"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
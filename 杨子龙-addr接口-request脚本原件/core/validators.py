@@ -0,0 +1,247 @@
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, Callable, List
+
+from config.config import Config
+from core.json_path import MISSING, compile_path, resolve_path
+from core.schema_validator import SchemaOptions, compile_schema
+
+# 单条校验表达式：<校验对象> <运算符> <期望值>
+_EXPRESSION_PATTERN = re.compile(
+    r'^(?P<target>(?:len|type)\(\s*[^()]*?\s*\)|[^\s=!<>~]+)\s*'
+    r'(?P<op>==|!=|>=|<=|~=|=|>|<|\s(?:not\s+in|in|matches|contains|conforms)\s)\s*'
+    r'(?P<value>.*)$',
+    re.S
+)
+
+# 函数形式的校验对象，如 len(json.data)、type(json.data)
+_FUNCTION_PATTERN = re.compile(r'^(len|type)\(\s*(.*?)\s*\)$')
+
+# 表达式分隔符：分号或换行，"\;" 表示表达式内的字面分号
+_SEPARATOR_PATTERN = re.compile(r'(?<!\\);|\n')
+
+# type() 的返回值名称
+_TYPE_NAMES = {
+    type(None): 'null',
+    bool: 'boolean',
+    int: 'integer',
+    float: 'number',
+    str: 'string',
+    list: 'array',
+    dict: 'object',
+}
+
+
+@lru_cache(maxsize=256)
+def compile_regex(pattern: str):
+    """编译正则表达式，结果在用例之间缓存"""
+    return re.compile(pattern)
+
+
+@lru_cache(maxsize=None)
+def _default_schema_options() -> SchemaOptions:
+    """conforms 运算使用的结构校验参数，取自 test_data_config.ini 的 [schema] 部分"""
+    return SchemaOptions.from_config(Config())
+
+
+@lru_cache(maxsize=64)
+def _load_schema_file(path: str) -> Any:
+    """读取结构文件，相对路径基于测试数据目录"""
+    if not os.path.isabs(path):
+        path = os.path.join(Config().get_data_dir(), path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def json_type_name(value: Any) -> str:
+    """返回值对应的JSON类型名称"""
+    return _TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _parse_literal(text: str) -> Any:
+    """把期望值解析为JSON字面量，无法解析时按普通字符串处理"""
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        if len(text) >= 2 and text[0] == text[-1] == "'":
+            return text[1:-1]
+        return text
+
+
+def _values_equal(actual: Any, expected: Any) -> bool:
+    """按JSON语义比较相等，布尔值与数字不互相等同"""
+    if isinstance(actual, bool) or isinstance(expected, bool):
+        return actual is expected
+    return actual == expected
+
+
+def _to_number(value: Any, expression: str) -> float:
+    """把实际值转换为数字用于大小比较"""
+    if isinstance(value, bool):
+        raise AssertionError(f"{expression}: 实际值 {value!r} 不是数字")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise AssertionError(f"{expression}: 实际值 {value!r} 不是数字")
+
+
+def _compile_target(target: str) -> Callable[[Any], Any]:
+    """把校验对象编译为取值函数"""
+    match = _FUNCTION_PATTERN.match(target)
+    if match:
+        func_name, inner = match.groups()
+        getter = _compile_target(inner)
+        if func_name == 'len':
+            def get_len(view):
+                value = getter(view)
+                if value is MISSING:
+                    return MISSING
+                if not hasattr(value, '__len__'):
+                    raise AssertionError(f"len({inner}) 不支持 {json_type_name(value)} 类型")
+                return len(value)
+            return get_len
+
+        def get_type(view):
+            value = getter(view)
+            return MISSING if value is MISSING else json_type_name(value)
+        return get_type
+
+    if target in ('status_code', 'status'):
+        return lambda view: view.status_code
+
+    if target.startswith('stream.'):
+        field = target[len('stream.'):]
+
+        def get_stream_field(view):
+            if view.stream_info is None:
+                raise AssertionError(f"{target}: 用例未开启流式模式（stream 列）")
+            return view.stream_info.get(field, MISSING)
+        return get_stream_field
+
+    if target in ('json', '$'):
+        return lambda view: view.json()
+
+    if target.startswith(('json.', '$.', '$[')):
+        tokens = compile_path(target)
+        return lambda view: resolve_path(view.json(), tokens)
+
+    raise ValueError(f"不支持的校验对象: {target}")
+
+
+def _compile_operator(op: str, expected: Any, expression: str) -> Callable[[Any], None]:
+    """把运算符和期望值编译为判断函数，判断失败时抛出AssertionError"""
+
+    def fail(actual):
+        raise AssertionError(f"{expression}: 实际值 {actual!r}")
+
+    if op in ('==', '='):
+        def check(actual):
+            if not _values_equal(actual, expected):
+                fail(actual)
+    elif op == '!=':
+        def check(actual):
+            if _values_equal(actual, expected):
+                fail(actual)
+    elif op in ('>', '>=', '<', '<='):
+        if isinstance(expected, bool) or not isinstance(expected, (int, float)):
+            raise ValueError(f"{expression}: 比较运算的期望值必须是数字")
+        bound = float(expected)
+        compare = {
+            '>': lambda a: a > bound,
+            '>=': lambda a: a >= bound,
+            '<': lambda a: a < bound,
+            '<=': lambda a: a <= bound,
+        }[op]
+
+        def check(actual):
+            if not compare(_to_number(actual, expression)):
+                fail(actual)
+    elif op in ('~=', 'matches'):
+        regex = compile_regex(str(expected))
+
+        def check(actual):
+            if not regex.search(actual if isinstance(actual, str) else json.dumps(actual, ensure_ascii=False)):
+                fail(actual)
+    elif op in ('in', 'not in'):
+        if not isinstance(expected, (list, str)):
+            raise ValueError(f"{expression}: in 运算的期望值必须是数组或字符串")
+        negate = op == 'not in'
+
+        def check(actual):
+            if isinstance(expected, str):
+                found = isinstance(actual, str) and actual in expected
+            else:
+                found = any(_values_equal(actual, item) for item in expected)
+            if found == negate:
+                fail(actual)
+    elif op == 'contains':
+        def check(actual):
+            if isinstance(actual, str):
+                found = isinstance(expected, str) and expected in actual
+            elif isinstance(actual, list):
+                found = any(_values_equal(item, expected) for item in actual)
+            elif isinstance(actual, dict):
+                found = expected in actual
+            else:
+                found = False
+            if not found:
+                fail(actual)
+    elif op == 'conforms':
+        try:
+            schema = _load_schema_file(expected) if isinstance(expected, str) else expected
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"{expression}: 读取结构文件失败: {e}")
+        compiled = compile_schema(schema)
+        options = _default_schema_options()
+
+        def check(actual):
+            mismatch = compiled.find_mismatch(actual, options)
+            if mismatch:
+                pointer, reason = mismatch
+                raise AssertionError(f"{expression}: 路径 '{pointer or '/'}' {reason}")
+    else:
+        raise ValueError(f"不支持的运算符: {op}")
+    return check
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> Callable[[Any], None]:
+    """
+    把单条校验表达式编译为校验闭包，相同表达式在用例之间共享编译结果
+
+    Args:
+        expression (str): 校验表达式，如 "json.data[0].id == 3"
+
+    Returns:
+        callable: 接收ResponseView的校验函数，不通过时抛出AssertionError
+
+    Raises:
+        ValueError: 表达式语法错误
+    """
+    match = _EXPRESSION_PATTERN.match(expression.strip())
+    if not match:
+        raise ValueError(f"无法解析的校验表达式: {expression}")
+    target = match.group('target')
+    op = ' '.join(match.group('op').split())
+    expected = _parse_literal(match.group('value'))
+
+    getter = _compile_target(target)
+    check = _compile_operator(op, expected, expression)
+
+    def validator(view):
+        actual = getter(view)
+        if actual is MISSING:
+            raise AssertionError(f"{expression}: {target} 不存在")
+        check(actual)
+
+    return validator
+
+
+def split_expressions(validate: str) -> List[str]:
+    """按分号或换行拆分 validate 列中的多条表达式"""
+    return [part.strip().replace('\\;', ';')
+            for part in _SEPARATOR_PATTERN.split(validate) if part.strip()]
+
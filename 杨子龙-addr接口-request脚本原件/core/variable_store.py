@@ -0,0 +1,128 @@
+import threading
+from typing import Any, Dict, Optional
+
+# 变量作用域，由外到内：全局 -> 环境 -> 调用链 -> 单次迭代
+SCOPE_GLOBAL = 'global'
+SCOPE_ENV = 'env'
+SCOPE_CHAIN = 'chain'
+SCOPE_ITERATION = 'iteration'
+
+_MISSING = object()
+
+
+class VariableContext:
+    """
+    分层变量上下文
+
+    每一层只保存本层写入的变量，读取时由内向外逐层查找；创建子上下文只记录父节点，代价为O(1)。
+    写入采用写时复制：先复制本层字典再整体替换引用，读取不加锁也只会看到完整的旧字典或新字典。
+    并行的调用链各自持有独立的 chain 层，互不覆盖 token 等变量
+    """
+
+    __slots__ = ('scope', 'name', 'parent', '_vars', '_lock')
+
+    def __init__(self, scope: str = SCOPE_GLOBAL, parent: Optional['VariableContext'] = None, name: str = ''):
+        self.scope = scope
+        self.name = name
+        self.parent = parent
+        self._vars: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def child(self, scope: str = SCOPE_ITERATION, name: str = '') -> 'VariableContext':
+        """创建子上下文，子上下文的写入不影响父上下文"""
+        return VariableContext(scope, self, name)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """由内向外查找变量（不加锁）"""
+        context = self
+        while context is not None:
+            value = context._vars.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            context = context.parent
+        return default
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def _find_scope(self, scope: Optional[str]) -> 'VariableContext':
+        if scope is None:
+            return self
+        context = self
+        while context is not None:
+            if context.scope == scope:
+                return context
+            context = context.parent
+        raise KeyError(f"当前上下文链中没有作用域: {scope}")
+
+    def set(self, key: str, value: Any, scope: Optional[str] = None):
+        """
+        写入变量
+
+        Args:
+            key (str): 变量名
+            value: 变量值
+            scope (str): 写入哪一层作用域，默认为当前层
+        """
+        target = self._find_scope(scope)
+        with target._lock:
+            variables = dict(target._vars)
+            variables[key] = value
+            target._vars = variables
+
+    def update(self, values: Dict[str, Any], scope: Optional[str] = None):
+        """批量写入变量，只复制一次字典"""
+        target = self._find_scope(scope)
+        with target._lock:
+            variables = dict(target._vars)
+            variables.update(values)
+            target._vars = variables
+
+    def clear(self, scope: Optional[str] = None):
+        """清空指定作用域（默认当前层）的变量，外层变量不受影响"""
+        target = self._find_scope(scope)
+        with target._lock:
+            target._vars = {}
+
+    def local_items(self) -> Dict[str, Any]:
+        """返回本层变量（只读快照）"""
+        return dict(self._vars)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """合并所有层的变量，内层覆盖外层，返回新字典"""
+        layers = []
+        context = self
+        while context is not None:
+            layers.append(context._vars)
+            context = context.parent
+        result = {}
+        for layer in reversed(layers):
+            result.update(layer)
+        return result
+
+
+_global_context = VariableContext(SCOPE_GLOBAL, name='global')
+_env_contexts: Dict[str, VariableContext] = {}
+_env_lock = threading.Lock()
+
+
+def global_context() -> VariableContext:
+    """进程内共享的全局作用域"""
+    return _global_context
+
+
+def env_context(env: str = 'default') -> VariableContext:
+    """按环境名返回共享的环境作用域（全局作用域的子上下文）"""
+    context = _env_contexts.get(env)
+    if context is None:
+        with _env_lock:
+            context = _env_contexts.get(env)
+            if context is None:
+                context = _global_context.child(SCOPE_ENV, env)
+                _env_contexts[env] = context
+    return context
+
+
+def new_chain_context(env: str = 'default') -> VariableContext:
+    """为一条调用链创建独立的 chain 作用域"""
+    return env_context(env).child(SCOPE_CHAIN)
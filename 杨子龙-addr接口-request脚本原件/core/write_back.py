@@ -0,0 +1,181 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.common_utils import CommonUtils
+from utils.logger import logger
+
+# 写回的列
+COLUMN_RESPONSE = 'actual_response'
+COLUMN_RESULT = 'pass_or_not'
+COLUMN_DATE = 'last_run_date'
+WRITE_BACK_COLUMNS = (COLUMN_RESPONSE, COLUMN_RESULT, COLUMN_DATE)
+
+RESULT_PASS = 'pass'
+RESULT_FAIL = 'fail'
+
+# 按引用保存的响应体在单元格中的前缀
+REFERENCE_PREFIX = 'ref:'
+
+
+class ResultWriteBack:
+    """
+    把执行结果写回用例文件的 actual_response、pass_or_not、last_run_date 列
+
+    执行过程中只在内存中收集结果，flush() 时每个文件只读写一次并原子替换，
+    不对整个工作簿做逐条用例的读-改-写；超过 inline_limit 个字符的响应体保存到
+    body_dir 下（按内容哈希命名），单元格中只写引用
+    """
+
+    def __init__(self, base_dir: str, body_dir: str, inline_limit: int = 1000):
+        """
+        Args:
+            base_dir (str): 项目根目录，响应体引用为相对该目录的路径
+            body_dir (str): 大响应体的保存目录
+            inline_limit (int): 直接写入单元格的响应体最大字符数
+        """
+        self.base_dir = base_dir
+        self.body_dir = body_dir
+        self.inline_limit = inline_limit
+        self._lock = threading.Lock()
+        # 用例文件 -> 行号 -> 写回的列
+        self._pending: Dict[str, Dict[int, Dict[str, str]]] = {}
+
+    def __len__(self):
+        return sum(len(rows) for rows in self._pending.values())
+
+    def record(self, case: dict, passed: bool, response_text: Optional[str] = None):
+        """
+        记录一条用例的执行结果（只写内存）
+
+        Args:
+            case (dict): 测试用例（需要 source_file、source_row，由用例读取器填充）
+            passed (bool): 是否通过
+            response_text (str): 响应体文本，没有响应时为None
+        """
+        source_file = case.get('source_file')
+        source_row = case.get('source_row')
+        if not source_file or source_row is None:
+            return
+        values = {
+            COLUMN_RESPONSE: self._response_cell(response_text),
+            COLUMN_RESULT: RESULT_PASS if passed else RESULT_FAIL,
+            COLUMN_DATE: time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with self._lock:
+            self._pending.setdefault(source_file, {})[source_row] = values
+
+    def _response_cell(self, text: Optional[str]) -> str:
+        if not text:
+            return ''
+        if len(text) <= self.inline_limit:
+            return text
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.body_dir, f"{digest}.txt")
+        if not os.path.exists(path):
+            CommonUtils.write_atomic(path, data)
+        return REFERENCE_PREFIX + os.path.relpath(path, self.base_dir).replace(os.sep, '/')
+
+    def flush(self) -> int:
+        """
+        把收集的结果写回用例文件，每个文件一次
+
+        Returns:
+            int: 写回的文件数
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        written = 0
+        for file_path, rows in pending.items():
+            try:
+                if file_path.endswith('.csv'):
+                    self._write_csv(file_path, rows)
+                elif file_path.endswith('.xlsx'):
+                    self._write_xlsx(file_path, rows)
+                elif file_path.endswith('.json'):
+                    self._write_json(file_path, rows)
+                else:
+                    logger.warning(f"不支持写回该格式的用例文件（.xls请另存为.xlsx）: {file_path}")
+                    continue
+            except Exception as e:
+                logger.error(f"结果写回失败: {file_path}: {str(e)}")
+                continue
+            written += 1
+            logger.info(f"已写回 {len(rows)} 条用例结果: {file_path}")
+        return written
+
+    @staticmethod
+    def _write_csv(file_path: str, rows: Dict[int, Dict[str, str]]):
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            content = f.read()
+        newline = '\r\n' if '\r\n' in content else '\n'
+        records = list(csv.reader(io.StringIO(content)))
+        if not records:
+            return
+        header = records[0]
+        for column in WRITE_BACK_COLUMNS:
+            if column not in header:
+                header.append(column)
+        positions = [header.index(column) for column in WRITE_BACK_COLUMNS]
+        # 行号与 pandas.read_csv 一致：跳过空行，从0开始
+        data_row = -1
+        for record in records[1:]:
+            if not record:
+                continue
+            data_row += 1
+            values = rows.get(data_row)
+            if values is None:
+                continue
+            if len(record) < len(header):
+                record.extend([''] * (len(header) - len(record)))
+            for column, position in zip(WRITE_BACK_COLUMNS, positions):
+                record[position] = values[column]
+
+        output = io.StringIO()
+        csv.writer(output, lineterminator=newline).writerows(records)
+        text = output.getvalue()
+        # 保持原文件末尾是否有换行
+        if not content.endswith(('\n', '\r')):
+            text = text[:-len(newline)]
+        CommonUtils.write_atomic(file_path, text)
+
+    @staticmethod
+    def _write_xlsx(file_path: str, rows: Dict[int, Dict[str, str]]):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path)
+        # pandas.read_excel 默认读取第一个工作表
+        sheet = workbook.worksheets[0]
+        header = [cell.value for cell in sheet[1]]
+        columns = {}
+        for column in WRITE_BACK_COLUMNS:
+            if column in header:
+                columns[column] = header.index(column) + 1
+            else:
+                header.append(column)
+                columns[column] = len(header)
+                sheet.cell(row=1, column=columns[column], value=column)
+        for data_row, values in rows.items():
+            for column, index in columns.items():
+                sheet.cell(row=data_row + 2, column=index, value=values[column])
+        CommonUtils.write_atomic(file_path, workbook.save)
+
+    @staticmethod
+    def _write_json(file_path: str, rows: Dict[int, Dict[str, str]]):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        data: Any = json.loads(content)
+        items: List[dict] = [data] if isinstance(data, dict) else data
+        for data_row, values in rows.items():
+            if 0 <= data_row < len(items) and isinstance(items[data_row], dict):
+                items[data_row].update(values)
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+        if content.endswith('\n'):
+            text += '\n'
+        CommonUtils.write_atomic(file_path, text)
@@ -19,7 +19,9 @@ from utils.logger import logger
 from config.config import Config
 
 
-def run_tests(test_path=None, test_type=None, env_names=None):
+def run_tests(test_path=None, test_type=None, env_names=None, cassette_mode=None, cassette=None,
+              cassette_match_host=False, update_snapshots=False, rerun_failed=False, record_results=False,
+              write_back=False):
     """
     运行测试
     
@@ -27,6 +29,13 @@ def run_tests(test_path=None, test_type=None, env_names=None):
         test_path (str): 指定测试文件路径
         test_type (str): 测试类型 (excel/csv/all)
         env_names (list): 环境名称列表
+        cassette_mode (str): 磁带模式 (record/replay)
+        cassette (str): 磁带文件路径
+        cassette_match_host (bool): 重放时同时匹配协议、主机和端口
+        update_snapshots (bool): 用本次响应更新快照
+        rerun_failed (bool): 只执行上次失败的用例
+        record_results (bool): 把本次执行结果写入结果库
+        write_back (bool): 执行结束后把结果写回用例文件
     """
     try:
         logger.info("开始执行API自动化测试")
@@ -53,6 +62,30 @@ def run_tests(test_path=None, test_type=None, env_names=None):
             for env_name in env_names:
                 cmd.extend(["--env", env_name])
 
+        # 添加磁带参数到pytest命令
+        if cassette_mode:
+            cmd.extend(["--cassette-mode", cassette_mode])
+        if cassette:
+            cmd.extend(["--cassette", cassette])
+        if cassette_match_host:
+            cmd.append("--cassette-match-host")
+
+        # 添加快照更新参数到pytest命令
+        if update_snapshots:
+            cmd.append("--update-snapshots")
+
+        # 只重跑失败用例
+        if rerun_failed:
+            cmd.append("--rerun-failed")
+
+        # 结果写入结果库
+        if record_results:
+            cmd.append("--record-results")
+
+        # 结果写回用例文件
+        if write_back:
+            cmd.append("--write-back")
+
         # 根据参数添加测试路径
         if test_path:
             cmd.insert(1, test_path)
@@ -233,15 +266,58 @@ def main():
         action="append",
         help="指定运行环境，可以多次使用以指定多个环境，如 --env dev --env prod"
     )
+    parser.add_argument(
+        "--cassette-mode",
+        choices=["record", "replay"],
+        help="磁带模式: record 录制所有请求/响应, replay 不访问网络直接重放"
+    )
+    parser.add_argument(
+        "--cassette",
+        help="磁带文件路径，默认 data/cassettes/default.cassette；"
+             "重放时按请求方法、路径、查询参数和请求体匹配，与 base_url 的协议、主机和端口无关"
+    )
+    parser.add_argument(
+        "--cassette-match-host",
+        action="store_true",
+        help="重放时同时匹配协议、主机和端口"
+    )
+    parser.add_argument(
+        "--update-snapshots",
+        action="store_true",
+        help="用本次响应更新（覆盖）用例的快照"
+    )
+    parser.add_argument(
+        "--record-results",
+        action="store_true",
+        help="把本次执行结果写入结果库"
+    )
+    parser.add_argument(
+        "--rerun-failed",
+        action="store_true",
+        help="只执行结果库中上次执行失败的用例"
+    )
+    parser.add_argument(
+        "--write-back",
+        action="store_true",
+        help="执行结束后把结果写回用例文件"
+    )
 
     args = parser.parse_args()
 
     logger.info("解析命令行参数完成")
     logger.info(
-        f"参数详情: serve_report={args.serve_report}, generate_report={args.generate_report}, type={args.type}, file={args.file}, env={args.env}")
+        f"参数详情: serve_report={args.serve_report}, generate_report={args.generate_report}, type={args.type}, file={args.file}, env={args.env}, "
+        f"cassette_mode={args.cassette_mode}, cassette={args.cassette}, "
+        f"cassette_match_host={args.cassette_match_host}, update_snapshots={args.update_snapshots}, "
+        f"rerun_failed={args.rerun_failed}, "
+        f"record_results={args.record_results}, write_back={args.write_back}")
 
     # 运行测试
-    exit_code = run_tests(test_path=args.file, test_type=args.type, env_names=args.env)
+    exit_code = run_tests(test_path=args.file, test_type=args.type, env_names=args.env,
+                          cassette_mode=args.cassette_mode, cassette=args.cassette,
+                          cassette_match_host=args.cassette_match_host,
+                          update_snapshots=args.update_snapshots, rerun_failed=args.rerun_failed,
+                          record_results=args.record_results, write_back=args.write_back)
 
     # 如果指定了--serve-report参数，则启动报告服务器
     if args.serve_report:
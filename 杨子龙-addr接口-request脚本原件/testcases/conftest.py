@@ -8,7 +8,12 @@
 import logging
 import os
 import pytest
+from core.credential_cache import CredentialCache
 from core.request_handler import RequestHandler
+from core.result_store import ResultStore, select_rerun_cases
+from core.snapshot_store import SnapshotStore
+from core.write_back import ResultWriteBack
+from core.user_pool import UserPool, load_users
 from core.data_handler import DataHandler
 
 # 设置环境变量以确保正确的字符编码
@@ -17,6 +22,19 @@ os.environ['LC_ALL'] = 'zh_CN.UTF-8'
 
 # 用于存储环境参数的全局变量
 ENV_NAMES = []
+# 磁带模式和磁带文件路径
+CASSETTE_MODE = None
+CASSETTE_PATH = None
+# 磁带重放时是否匹配主机
+CASSETTE_MATCH_HOST = False
+# 是否更新快照
+UPDATE_SNAPSHOTS = False
+# 是否只执行上次失败的用例
+RERUN_FAILED = False
+# 是否把结果写入结果库
+RECORD_RESULTS = False
+# 是否把结果写回用例文件
+WRITE_BACK = False
 
 
 def pytest_addoption(parser):
@@ -26,15 +44,101 @@ def pytest_addoption(parser):
         action="append",
         help="指定运行环境，可以多次使用以指定多个环境，如 --env dev --env prod"
     )
+    parser.addoption(
+        "--cassette-mode",
+        choices=["record", "replay"],
+        help="磁带模式：record 录制所有请求/响应，replay 不访问网络直接重放"
+    )
+    parser.addoption(
+        "--cassette",
+        help="磁带文件路径，默认 data/cassettes/default.cassette；"
+             "重放时按请求方法、路径、查询参数和请求体匹配，与 base_url 的协议、主机和端口无关"
+    )
+    parser.addoption(
+        "--cassette-match-host",
+        action="store_true",
+        default=False,
+        help="重放时同时匹配协议、主机和端口（同一磁带包含多个主机的同路径请求时使用）"
+    )
+    parser.addoption(
+        "--update-snapshots",
+        action="store_true",
+        default=False,
+        help="用本次响应更新用例的快照（snapshot 列）"
+    )
+    parser.addoption(
+        "--record-results",
+        action="store_true",
+        default=False,
+        help="把本次执行结果写入结果库（[results] enabled 关闭时临时开启）"
+    )
+    parser.addoption(
+        "--rerun-failed",
+        action="store_true",
+        default=False,
+        help="只执行结果库中上次执行失败的用例及其依赖的变量提取用例（上次没有失败的用例时执行全部用例），"
+             "本次结果同样写入结果库"
+    )
+    parser.addoption(
+        "--write-back",
+        action="store_true",
+        default=False,
+        help="执行结束后把结果写回用例文件（actual_response、pass_or_not、last_run_date 列）"
+    )
 
 
 def pytest_configure(config):
     """配置pytest"""
-    global ENV_NAMES
+    global ENV_NAMES, CASSETTE_MODE, CASSETTE_PATH, CASSETTE_MATCH_HOST, UPDATE_SNAPSHOTS, RERUN_FAILED, \
+        RECORD_RESULTS, WRITE_BACK
     ENV_NAMES = config.getoption("--env") or []
+    CASSETTE_MODE = config.getoption("--cassette-mode")
+    CASSETTE_PATH = config.getoption("--cassette")
+    CASSETTE_MATCH_HOST = config.getoption("--cassette-match-host")
+    UPDATE_SNAPSHOTS = config.getoption("--update-snapshots")
+    RERUN_FAILED = config.getoption("--rerun-failed")
+    RECORD_RESULTS = config.getoption("--record-results")
+    WRITE_BACK = config.getoption("--write-back")
     print(f"Pytest configured with envs: {ENV_NAMES}")  # 调试信息
 
 
+def pytest_collection_modifyitems(config, items):
+    """--rerun-failed：按结果库中上次执行的失败用例筛选"""
+    if not RERUN_FAILED:
+        return
+    from config.config import Config
+    options = Config(env_names=ENV_NAMES).get_result_store_options()
+    if not os.path.exists(options['db_file']):
+        logging.warning(f"结果库不存在，执行全部用例: {options['db_file']}")
+        return
+    failed = set(ResultStore(options['db_file']).failed_nodeids())
+    if not failed:
+        logging.warning("上次执行没有失败的用例，执行全部用例")
+        return
+    # 按测试节点匹配失败用例；按测试模块分组，每个模块内按收集顺序保留失败用例及其依赖的变量提取用例
+    groups = {}
+    for item in items:
+        case = getattr(item, 'callspec', None) and item.callspec.params.get('case')
+        if case:
+            groups.setdefault(item.nodeid.split('::', 1)[0], []).append((item, case))
+    keep = set()
+    dependencies = 0
+    for group in groups.values():
+        failed_flags = [item.nodeid in failed for item, _ in group]
+        flags = select_rerun_cases([case for _, case in group], failed_flags)
+        for (item, _), flag, was_failed in zip(group, flags, failed_flags):
+            if flag:
+                keep.add(id(item))
+                if not was_failed:
+                    dependencies += 1
+    selected = [item for item in items if id(item) in keep]
+    deselected = [item for item in items if id(item) not in keep]
+    logging.info(f"只执行上次失败的用例，共 {len(selected)} 条（含 {dependencies} 条提取变量的前置用例）")
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
 @pytest.fixture(scope="session")
 def request_handler():
     """请求处理器fixture"""
@@ -45,7 +149,137 @@ def request_handler():
     base_url = config.get_base_url()
     timeout = config.get_timeout()
     logging.info(f"Request handler base_url: {base_url}, timeout: {timeout}")  # 调试信息
-    return RequestHandler(base_url=base_url, timeout=timeout)
+    cassette_path = CASSETTE_PATH or os.path.join(config.data_dir, 'cassettes', 'default.cassette')
+    handler = RequestHandler(base_url=base_url, timeout=timeout,
+                             default_encoding=config.get_default_encoding(),
+                             detect_encoding=config.get_detect_encoding(),
+                             cassette_mode=CASSETTE_MODE, cassette_path=cassette_path,
+                             cassette_match_host=CASSETTE_MATCH_HOST,
+                             connect_timeout=config.get_connect_timeout(),
+                             record_timings=config.get_record_timings(),
+                             **config.get_pool_options(),
+                             **config.get_stream_options(),
+                             **config.get_flow_control_options(),
+                             **config.get_retry_options(),
+                             **config.get_circuit_breaker_options(),
+                             **config.get_response_cache_options())
+    yield handler
+    if len(handler.endpoint_timings):
+        timings_file = os.path.join(config.reports_dir, 'endpoint_timings.json')
+        handler.endpoint_timings.save(timings_file)
+        logging.info(f"接口耗时汇总已保存: {timings_file}")
+    if handler.retry_stats.total_retries:
+        retry_file = os.path.join(config.reports_dir, 'retry_stats.json')
+        handler.retry_stats.save(retry_file)
+        logging.info(f"接口重试统计已保存: {retry_file}")
+    handler.close()
+
+
+def _load_case(spec, base_dir):
+    """按 "用例文件#用例编号" 读取单条用例（刷新凭证、用户池登录等）"""
+    from utils.test_case_reader import DataHandler as CaseReader
+    file_path, _, case_id = spec.partition('#')
+    if not os.path.isabs(file_path):
+        file_path = os.path.join(base_dir, file_path)
+    for case in CaseReader().read_test_cases(file_path) or []:
+        if str(case['case_id']) == case_id.strip():
+            return case
+    logging.warning(f"未找到用例: {spec}")
+    return None
+
+
+@pytest.fixture(scope="session")
+def credential_cache():
+    """登录凭证缓存fixture，[auth] credential_cache 未开启时为None"""
+    from config.config import Config
+    config = Config(env_names=ENV_NAMES)
+    options = config.get_auth_options()
+    if not options['enabled']:
+        yield None
+        return
+    refresh_case = _load_case(options['refresh_case'], config.base_dir) if options['refresh_case'] else None
+    cache = CredentialCache(options['cache_file'], env=config.get_base_url(), ttl=options['ttl'],
+                            login_url=options['login_url'], variables=options['variables'],
+                            user_field=options['user_field'], refresh_case=refresh_case)
+    yield cache
+    logging.info(f"登录凭证缓存统计: {cache.stats}")
+
+
+@pytest.fixture(scope="session")
+def snapshot_store():
+    """快照存储fixture，用例 snapshot 列不为空时与快照比较"""
+    from config.config import Config
+    config = Config(env_names=ENV_NAMES)
+    options = config.get_snapshot_options()
+    store = SnapshotStore(options['dir'], ignore_paths=options['ignore_paths'], update=UPDATE_SNAPSHOTS)
+    yield store
+    if any(store.stats.values()):
+        logging.info(f"快照统计: {store.stats}")
+
+
+@pytest.fixture(scope="session")
+def result_store():
+    """结构化结果库fixture，[results] enabled、--record-results 或 --rerun-failed 开启时可用，否则为None"""
+    from config.config import Config
+    config = Config(env_names=ENV_NAMES)
+    options = config.get_result_store_options()
+    if not (options['enabled'] or RECORD_RESULTS or RERUN_FAILED):
+        yield None
+        return
+    store = ResultStore(options['db_file'], env=','.join(ENV_NAMES) or 'default',
+                        batch_size=options['batch_size'], flush_interval=options['flush_interval'])
+    store.start()
+    yield store
+    summary = store.close()
+    logging.info(f"执行结果已写入结果库: {store.db_file}（{store.run_id}）{summary}")
+
+
+@pytest.fixture(autouse=True)
+def result_store_nodeid(request, result_store):
+    """把当前测试节点告诉结果库，--rerun-failed 按节点匹配上次失败的用例"""
+    if result_store is not None:
+        result_store.current_nodeid = request.node.nodeid
+    yield
+
+
+@pytest.fixture(scope="session")
+def write_back():
+    """结果写回fixture，[write_back] enabled 或 --write-back 开启时可用，否则为None"""
+    from config.config import Config
+    config = Config(env_names=ENV_NAMES)
+    options = config.get_write_back_options()
+    if not (options['enabled'] or WRITE_BACK):
+        yield None
+        return
+    writer = ResultWriteBack(config.base_dir, options['body_dir'], inline_limit=options['inline_limit'])
+    yield writer
+    count = len(writer)
+    files = writer.flush()
+    logging.info(f"结果写回完成: {count} 条用例，{files} 个文件")
+
+
+@pytest.fixture(scope="session")
+def user_pool(request_handler):
+    """
+    预登录用户池fixture（[user_pool] enabled 开启时可用），供并发/压测用例租用不同的用户：
+
+        with user_pool.lease() as user:
+            token = user.get_variables()['token']
+    """
+    from config.config import Config
+    config = Config(env_names=ENV_NAMES)
+    options = config.get_user_pool_options()
+    if not options['enabled']:
+        pytest.skip("未开启用户池（[user_pool] enabled = false）")
+    login_case = _load_case(options['login_case'], config.base_dir)
+    if login_case is None:
+        pytest.fail(f"用户池登录用例不存在: {options['login_case']}")
+    pool = UserPool(request_handler, login_case, load_users(options['users_file']), ttl=options['ttl'],
+                    refresh_margin=options['refresh_margin'], login_concurrency=options['login_concurrency'])
+    if not pool.start():
+        pytest.fail("用户池中没有登录成功的用户")
+    yield pool
+    pool.close()
 
 
 @pytest.fixture(scope="session")
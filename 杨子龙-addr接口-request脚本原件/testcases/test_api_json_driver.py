@@ -67,15 +67,21 @@ class TestAllDrivers:
 
     @allure.story("JSON测试用例执行")
     @pytest.mark.parametrize("case", all_test_cases, ids=test_case_ids)
-    def test_api_case(self, case, request_handler):
+    def test_api_case(self, case, request_handler, credential_cache, snapshot_store, result_store, write_back):
         """
         执行所有格式的API测试用例
 
         Args:
             case (dict): 测试用例数据
             request_handler: 请求处理器fixture
+            credential_cache: 登录凭证缓存fixture（未启用时为None）
+            snapshot_store: 快照存储fixture
+            result_store: 结构化结果库fixture（未启用时为None）
+            write_back: 结果写回fixture（未启用时为None）
         """
         self.assert_handler = AssertHandler()
         # 创建测试执行器实例
-        self.test_executor = TestExecutor(request_handler, data_handler, self.assert_handler)
+        self.test_executor = TestExecutor(request_handler, data_handler, self.assert_handler,
+                                          credential_cache=credential_cache, snapshot_store=snapshot_store,
+                                          result_store=result_store, write_back=write_back)
         self.test_executor.execute_test_case(case)
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+磁带录制/重放单元测试：流式读取（stream 列）与磁带的组合、跨环境重放
+"""
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.cassette import MODE_RECORD, MODE_REPLAY, Cassette, request_key, strip_host
+from core.request_handler import RequestHandler
+
+BIG_BODY = b'{"data": "' + b'x' * 300000 + b'"}'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    calls = 0
+    flaky_calls = 0
+
+    def do_GET(self):
+        _Handler.calls += 1
+        if self.path == '/flaky':
+            _Handler.flaky_calls += 1
+            if _Handler.flaky_calls == 1:
+                self._reply(503, b'{"message": "busy"}')
+                return
+        self._reply(200, BIG_BODY)
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.calls = _Handler.flaky_calls = 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _handler(base_url, mode, path):
+    return RequestHandler(base_url=base_url, cassette_mode=mode, cassette_path=path, retry_base_delay=0.01,
+                          retry_max_delay=0.05)
+
+
+def test_stream_record_and_replay(server, tmp_path):
+    """流式响应录制时边读边写入磁带，重放时同样可以流式读取"""
+    cassette = str(tmp_path / 'stream.cassette')
+    recorder = _handler(server, MODE_RECORD, cassette)
+    recorded = recorder.send_request('GET', '/big', stream_mode='bounded:1024')
+    recorder.close()
+    assert recorded.stream_info['bytes'] == len(BIG_BODY)
+    assert recorded.stream_info['kept_bytes'] == 1024
+    assert recorded.stream_info['sha256'] == hashlib.sha256(BIG_BODY).hexdigest()
+
+    calls = _Handler.calls
+    player = _handler(server, MODE_REPLAY, cassette)
+    replayed = player.send_request('GET', '/big', stream_mode='bounded:1024')
+    player.close()
+    assert replayed is not None
+    assert _Handler.calls == calls
+    assert replayed.stream_info == dict(recorded.stream_info, download_seconds=replayed.stream_info['download_seconds'],
+                                        bytes_per_sec=replayed.stream_info['bytes_per_sec'])
+    assert replayed.content == BIG_BODY[:1024]
+
+
+def test_replay_full_body_without_stream(server, tmp_path):
+    """流式录制的记录在非流式读取时返回完整响应体"""
+    cassette = str(tmp_path / 'full.cassette')
+    recorder = _handler(server, MODE_RECORD, cassette)
+    recorder.send_request('GET', '/big', stream_mode='full')
+    recorder.close()
+
+    player = _handler(server, MODE_REPLAY, cassette)
+    replayed = player.send_request('GET', '/big')
+    player.close()
+    assert replayed.content == BIG_BODY
+
+
+def test_stream_retry_is_recorded(server, tmp_path):
+    """被重试丢弃的流式响应也会录制，重放时得到相同的重试过程"""
+    cassette = str(tmp_path / 'flaky.cassette')
+    recorder = _handler(server, MODE_RECORD, cassette)
+    recorded = recorder.send_request('GET', '/flaky', stream_mode='bounded')
+    recorder.close()
+    assert recorded.status_code == 200
+    assert recorded.retry_info['retries'] == 1
+
+    player = _handler(server, MODE_REPLAY, cassette)
+    replayed = player.send_request('GET', '/flaky', stream_mode='bounded')
+    player.close()
+    assert replayed.status_code == 200
+    assert replayed.retry_info['retries'] == 1
+    assert replayed.stream_info['bytes'] == len(BIG_BODY)
+
+
+def test_strip_host():
+    key = request_key('get', 'HTTPS://Example.com:443/api/addr?b=2&a=1', b'')
+    assert key.startswith('GET https://example.com/api/addr?a=1&b=2 ')
+    assert strip_host(key) == strip_host(request_key('GET', 'http://127.0.0.1:6666/api/addr?a=1&b=2', ''))
+    assert strip_host(key).startswith('GET /api/addr?a=1&b=2 ')
+
+
+def test_replay_under_other_host(server, tmp_path):
+    """在一个 base_url 下录制的磁带可以在其他 base_url 下重放"""
+    cassette = str(tmp_path / 'env.cassette')
+    recorder = _handler(server, MODE_RECORD, cassette)
+    recorder.send_request('GET', '/big?b=2&a=1')
+    recorder.close()
+
+    player = _handler('http://127.0.0.1:1', MODE_REPLAY, cassette)
+    replayed = player.send_request('GET', '/big?a=1&b=2')
+    player.close()
+    assert replayed.content == BIG_BODY
+
+
+def test_replay_match_host(server, tmp_path):
+    """match_host=True 时按完整URL匹配，主机不同视为未录制"""
+    cassette = str(tmp_path / 'host.cassette')
+    recorder = _handler(server, MODE_RECORD, cassette)
+    recorder.send_request('GET', '/big')
+    recorder.close()
+
+    strict = Cassette(cassette, MODE_REPLAY, match_host=True)
+    try:
+        assert strict.lookup(request_key('GET', server + '/big', b'')) is not None
+        assert strict.lookup(request_key('GET', 'http://127.0.0.1:1/big', b'')) is None
+    finally:
+        strict.close()
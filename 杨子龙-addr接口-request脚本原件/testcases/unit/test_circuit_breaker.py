@@ -0,0 +1,94 @@
+"""
+熔断器单元测试：关闭 -> 打开 -> 半开 -> 关闭/重新打开
+"""
+import time
+
+import pytest
+import requests
+
+from core.circuit_breaker import (STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker,
+                                  CircuitBreakerRegistry, CircuitOpenError)
+from core.request_handler import RequestHandler
+
+RECOVERY = 0.05
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_request()
+        breaker.record_failure(requests.exceptions.ConnectionError('refused'))
+
+
+def test_open_half_open_close():
+    breaker = CircuitBreaker('api:80', failure_threshold=2, recovery_timeout=RECOVERY)
+    breaker.before_request()
+    breaker.record_failure(requests.exceptions.ConnectionError('refused'))
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure(requests.exceptions.ConnectionError('refused'))
+    assert breaker.state == STATE_OPEN
+    assert breaker.opened == 1
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    assert breaker.rejected == 1
+
+    time.sleep(RECOVERY * 1.5)
+    # 半开状态只放行一个探测请求
+    breaker.before_request()
+    assert breaker.state == STATE_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == 0
+    breaker.before_request()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker('api:80', failure_threshold=2, recovery_timeout=RECOVERY)
+    _open(breaker)
+    time.sleep(RECOVERY * 1.5)
+    breaker.before_request()
+    breaker.record_failure(requests.exceptions.ConnectionError('still down'))
+    assert breaker.state == STATE_OPEN
+    # 从半开重新打开不计入打开次数
+    assert breaker.opened == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_cancelled_probe_allows_next_probe():
+    breaker = CircuitBreaker('api:80', failure_threshold=1, recovery_timeout=RECOVERY)
+    _open(breaker)
+    time.sleep(RECOVERY * 1.5)
+    breaker.before_request()
+    breaker.cancel_probe()
+    breaker.before_request()
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_registry_per_host():
+    registry = CircuitBreakerRegistry(failure_threshold=1, recovery_timeout=RECOVERY)
+    first = registry.get('http://A.example:8080/api/login')
+    assert registry.get('http://a.example:8080/api/list') is first
+    assert registry.get('http://b.example/api') is not first
+    _open(first)
+    assert registry.snapshot()['a.example:8080']['state'] == STATE_OPEN
+    assert registry.snapshot()['b.example']['state'] == STATE_CLOSED
+    assert CircuitBreakerRegistry(failure_threshold=0).get('http://a.example') is None
+
+
+def test_request_handler_fails_fast_when_open():
+    """主机不可达时熔断器打开，之后的请求不再建连"""
+    handler = RequestHandler(base_url='http://127.0.0.1:1', retries=0, circuit_failure_threshold=2,
+                             circuit_recovery_timeout=60)
+    for _ in range(2):
+        assert handler.send_request('GET', '/api') is None
+        assert 'NewConnectionError' in handler.get_last_error()
+    breaker = handler.circuit_breakers.get('http://127.0.0.1:1/api')
+    assert breaker.state == STATE_OPEN
+    assert handler.send_request('GET', '/api') is None
+    assert '熔断器已打开' in handler.get_last_error()
+    assert breaker.rejected == 1
+    handler.close()
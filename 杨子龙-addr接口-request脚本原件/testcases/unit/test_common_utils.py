@@ -0,0 +1,60 @@
+"""
+通用工具单元测试：原子写文件
+"""
+import os
+import threading
+
+import pytest
+
+from utils.common_utils import CommonUtils
+
+
+def test_write_atomic_bytes_and_text(tmp_path):
+    path = str(tmp_path / 'sub' / 'data.txt')
+    CommonUtils.write_atomic(path, b'\x00\x01')
+    with open(path, 'rb') as f:
+        assert f.read() == b'\x00\x01'
+    CommonUtils.write_atomic(path, '中文\r\n')
+    with open(path, 'rb') as f:
+        assert f.read() == '中文\r\n'.encode('utf-8')
+    assert os.listdir(str(tmp_path / 'sub')) == ['data.txt']
+
+
+def test_write_atomic_failure_keeps_original(tmp_path):
+    path = str(tmp_path / 'data.txt')
+    CommonUtils.write_atomic(path, 'original')
+
+    def broken(tmp):
+        with open(tmp, 'w') as f:
+            f.write('half')
+        raise OSError('disk full')
+
+    with pytest.raises(OSError):
+        CommonUtils.write_atomic(path, broken)
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == 'original'
+    assert os.listdir(str(tmp_path)) == ['data.txt']
+
+
+def test_write_atomic_concurrent_writers(tmp_path):
+    """多个线程同时写同一文件，临时文件互不覆盖，最终内容是某一次完整的写入"""
+    path = str(tmp_path / 'data.txt')
+    contents = [str(i) * 10000 for i in range(8)]
+    errors = []
+
+    def writer(text):
+        try:
+            for _ in range(20):
+                CommonUtils.write_atomic(path, text)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(text,)) for text in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    with open(path, encoding='utf-8') as f:
+        assert f.read() in contents
+    assert os.listdir(str(tmp_path)) == ['data.txt']
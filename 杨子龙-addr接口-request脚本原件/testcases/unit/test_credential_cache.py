@@ -0,0 +1,90 @@
+"""
+登录凭证缓存单元测试：命中缓存跳过登录请求时恢复登录用例提取的全部变量
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.assert_handler import AssertHandler
+from core.credential_cache import CredentialCache
+from core.data_handler import DataHandler
+from core.request_handler import RequestHandler
+from core.test_executor import TestExecutor as Executor
+
+
+class _Handler(BaseHTTPRequestHandler):
+    logins = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        _Handler.logins += 1
+        body = json.dumps({'token': 'abc', 'data': {'user_id': 42}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.logins = 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _login_case(extract_key):
+    return {'case_id': '1', 'case_name': '登录', 'method': 'POST', 'url': '/api/login',
+            'headers': '{"Content-Type": "application/json"}', 'params': '', 'body': '{"username": "main"}',
+            'expected_status': '200', 'expected_content': '', 'json_path': '', 'expected_json_value': '',
+            'extract_key': extract_key, 'save_var_name': '', 'validate': '', 'stream': '', 'snapshot': ''}
+
+
+def _run_login(base_url, cache_file, case):
+    data_handler = DataHandler()
+    handler = RequestHandler(base_url=base_url, retries=0)
+    cache = CredentialCache(cache_file, env=base_url)
+    try:
+        Executor(handler, data_handler, AssertHandler(), credential_cache=cache)._execute_case_logic(case)
+    finally:
+        handler.close()
+    return data_handler, cache
+
+
+def test_cache_hit_restores_all_extracted_variables(server, tmp_path):
+    cache_file = str(tmp_path / 'credentials.json')
+    case = _login_case('token=token; user_id=data.user_id')
+    _run_login(server, cache_file, case)
+    with open(cache_file, encoding='utf-8') as f:
+        assert list(json.load(f).values())[0]['variables'] == {'token': 'abc', 'user_id': '42'}
+
+    # 新的会话命中缓存，不发送登录请求，但用户ID等其他提取变量同样恢复
+    data_handler, cache = _run_login(server, cache_file, case)
+    assert _Handler.logins == 1
+    assert cache.stats['hits'] == 1
+    assert data_handler.replace_variables('${token}/${user_id}') == 'abc/42'
+
+
+def test_extracted_names():
+    assert CredentialCache.extracted_names(_login_case('token=token; user_id=data.user_id')) == ['token', 'user_id']
+    assert CredentialCache.extracted_names(dict(_login_case('data.token'), save_var_name='token')) == ['data.token',
+                                                                                                       'token']
+    cache = CredentialCache('unused.json', env='api')
+    assert not cache.extracts_credentials(_login_case('user_id=data.user_id'))
+
+
+def test_put_requires_credential_variable(tmp_path):
+    cache = CredentialCache(str(tmp_path / 'credentials.json'), env='api')
+    cache.put('main', {'user_id': 42})
+    assert cache.get('main') is None
+    cache.put('main', {'token': 'abc', 'user_id': 42, 'empty': ''})
+    assert cache.get('main') == {'token': 'abc', 'user_id': 42}
@@ -0,0 +1,48 @@
+"""
+JSON结构化比较单元测试
+"""
+from core.json_diff import ADDED, CHANGED, REMOVED, diff_json, preview_value
+
+
+def _ops(diff):
+    return [(change.op, change.pointer) for change in diff.changes]
+
+
+def test_no_difference():
+    document = {'a': [1, {'b': None}], 'c': '中文'}
+    assert not diff_json(document, {'a': [1, {'b': None}], 'c': '中文'})
+
+
+def test_changes_in_document_order():
+    expected = {'code': 0, 'data': [{'id': 1, 'name': 'a'}, {'id': 2}], 'a/b': True, 'gone': 1}
+    actual = {'code': 1, 'data': [{'id': 1, 'name': 'b'}, {'id': 2}, {'id': 3}], 'a/b': 1, 'extra': []}
+    diff = diff_json(expected, actual)
+    assert _ops(diff) == [
+        (REMOVED, '/gone'), (ADDED, '/extra'), (CHANGED, '/code'), (ADDED, '/data/2'),
+        (CHANGED, '/data/0/name'), (CHANGED, '/a~1b'),
+    ]
+    assert diff.counts == {CHANGED: 3, ADDED: 2, REMOVED: 1}
+    assert diff.format().splitlines()[0] == '共 6 处差异（变更 3，缺少 1，多出 2）'
+
+
+def test_subset_mode_ignores_extra_members():
+    expected = {'data': [{'id': 1}]}
+    actual = {'data': [{'id': 1, 'name': 'x'}, {'id': 2}], 'total': 2}
+    assert not diff_json(expected, actual, subset=True)
+    assert _ops(diff_json({'data': [{'id': 2}]}, actual, subset=True)) == [(CHANGED, '/data/0/id')]
+
+
+def test_limits_keep_report_bounded():
+    expected = list(range(1000))
+    actual = [-1] * 1000
+    diff = diff_json(expected, actual, max_changes=10)
+    assert diff.total == 1000 and len(diff.changes) == 10
+    assert diff.format(max_lines=5).splitlines()[-1] == '…另有 995 处差异未列出'
+    partial = diff_json(expected, actual, max_nodes=100)
+    assert not partial.complete and partial.nodes == 100
+    assert '只比较了前 100 个节点' in partial.summary()
+
+
+def test_preview_value_is_truncated():
+    assert preview_value({'a': 'x' * 1000}, limit=20) == '{"a": "xxxxxxxxxxxxx…'
+    assert preview_value([1, 2]) == '[1, 2]'
@@ -0,0 +1,95 @@
+"""
+增量JSON提取单元测试：与 json.loads 的结果一致、找到全部路径后提前结束
+"""
+import json
+import random
+
+import pytest
+
+from core.json_stream import IncompleteJSONError, extract_paths
+
+_MISSING = object()
+_KEYS = ['a', 'b', 'id', 'data', 'name', '中文', 'x"y', 'a\\b', '']
+
+
+def _random_value(rng, depth):
+    kind = rng.randrange(9 if depth < 4 else 6)
+    if kind == 0:
+        return None
+    if kind == 1:
+        return rng.random() < 0.5
+    if kind == 2:
+        return rng.randint(-10 ** 6, 10 ** 6)
+    if kind == 3:
+        return rng.uniform(-1e6, 1e6)
+    if kind in (4, 5):
+        return ''.join(rng.choice('ab c"\\/\n\t中 {}[],:') for _ in range(rng.randrange(8)))
+    if kind in (6, 7):
+        return {rng.choice(_KEYS): _random_value(rng, depth + 1) for _ in range(rng.randrange(5))}
+    return [_random_value(rng, depth + 1) for _ in range(rng.randrange(5))]
+
+
+def _collect_paths(value, prefix, paths):
+    paths.append(prefix)
+    if isinstance(value, dict):
+        for key, child in value.items():
+            _collect_paths(child, prefix + (key,), paths)
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            _collect_paths(child, prefix + (index,), paths)
+
+
+def _resolve(document, path):
+    value = document
+    for part in path:
+        if isinstance(part, int) and isinstance(value, list) and part < len(value):
+            value = value[part]
+        elif isinstance(part, str) and isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def test_extract_paths_matches_json_loads():
+    rng = random.Random(20240601)
+    for _ in range(3000):
+        document = {rng.choice(_KEYS): _random_value(rng, 1) for _ in range(rng.randrange(1, 5))}
+        text = json.dumps(document, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 2]))
+        paths = []
+        _collect_paths(document, (), paths)
+        chosen = rng.sample(paths[1:], min(len(paths) - 1, 3)) if len(paths) > 1 else []
+        # 不存在的路径：多一级、越界下标、不存在的键
+        chosen.append(rng.choice(paths) + ('missing',))
+        chosen.append(rng.choice(paths) + (99,))
+        expected = {}
+        for path in chosen:
+            value = _resolve(document, path)
+            if value is not _MISSING:
+                expected[path] = value
+        assert extract_paths(text, chosen) == expected, text
+
+
+def test_extract_paths_bytes_and_bom():
+    text = '\ufeff{"data": {"token": "中文"}}'
+    assert extract_paths(text, [('data', 'token')]) == {('data', 'token'): '中文'}
+    assert extract_paths(text.encode('utf-8'), [('data',)]) == {('data',): {'token': '中文'}}
+
+
+def test_extract_paths_stops_after_last_path():
+    """全部路径找到后不再扫描：之后被截断或不合法的内容不影响结果"""
+    text = '{"code": 0, "token": "abc", "data": [' + '{"id": 1}, ' * 1000
+    assert extract_paths(text, [('token',), ('code',)]) == {('code',): 0, ('token',): 'abc'}
+    assert extract_paths('[1, 2, {"a": true}, not json', [(2, 'a')]) == {(2, 'a'): True}
+
+
+def test_extract_paths_incomplete():
+    text = '{"code": 0, "data": [{"id": 1}, {"id": 2'
+    with pytest.raises(IncompleteJSONError):
+        extract_paths(text, [('data', 1, 'id'), ('missing',)])
+    with pytest.raises(IncompleteJSONError):
+        extract_paths('{"a": 1} trailing', [('b',)])
+
+
+def test_extract_paths_empty_paths():
+    assert extract_paths('not json at all', []) == {}
@@ -0,0 +1,162 @@
+"""
+响应缓存单元测试：单飞合并、TTL过期、LRU淘汰、非幂等请求失效和流式请求绕过
+"""
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from core.response_cache import CachingAdapter, ResponseCache
+
+THREADS = 10
+
+
+class _FakeAdapter(BaseAdapter):
+    """记录请求次数的传输适配器，第一次请求可以阻塞或返回指定的失败"""
+
+    def __init__(self, first=None):
+        super().__init__()
+        self.first = first
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        with self._lock:
+            self.calls.append((request.method, request.url))
+            first = len(self.calls) == 1
+        if first:
+            self.release.wait(5)
+            if self.first == 'error':
+                raise requests.exceptions.ConnectionError('connection reset')
+        response = requests.Response()
+        response.status_code = 500 if first and self.first == 'server_error' else 200
+        response.reason = 'OK'
+        response._content = f"{request.method} {request.url} #{len(self.calls)}".encode('utf-8')
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(0)
+        return response
+
+    def close(self):
+        pass
+
+
+def _session(inner, **kwargs):
+    cache = ResponseCache(**kwargs)
+    session = requests.Session()
+    session.mount('http://', CachingAdapter(cache, inner))
+    return session, cache
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline, '等待超时'
+        time.sleep(0.005)
+
+
+def _concurrent_get(session, inner, cache, url):
+    """第一个请求发出后阻塞，直到其余线程都加入进行中的请求"""
+    inner.release.clear()
+    results = [None] * THREADS
+
+    def worker(index):
+        try:
+            results[index] = session.get(url)
+        except requests.exceptions.RequestException as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.stats['coalesced'] == THREADS - 1)
+    inner.release.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_single_flight_coalesces_concurrent_requests():
+    inner = _FakeAdapter()
+    session, cache = _session(inner)
+    results = _concurrent_get(session, inner, cache, 'http://api.example/list')
+    assert len(inner.calls) == 1
+    assert len({response.content for response in results}) == 1
+    assert sum(bool(getattr(response, 'from_cache', False)) for response in results) == THREADS - 1
+    assert cache.snapshot()['entries'] == 1
+
+
+@pytest.mark.parametrize('first', ['error', 'server_error'])
+def test_waiters_resend_after_failed_leader(first):
+    """发送请求的线程失败或得到>=400的响应时，等待的线程各自重新发送，失败的响应不进入缓存"""
+    inner = _FakeAdapter(first=first)
+    session, cache = _session(inner)
+    results = _concurrent_get(session, inner, cache, 'http://api.example/list')
+    assert len(inner.calls) == THREADS
+    failed = [r for r in results if isinstance(r, Exception) or r.status_code >= 400]
+    assert len(failed) == 1
+    assert all(not getattr(r, 'from_cache', False) for r in results if r not in failed)
+    assert cache.snapshot()['entries'] == 0
+
+
+def test_ttl_expiry():
+    inner = _FakeAdapter()
+    session, cache = _session(inner, ttl=0.05)
+    first = session.get('http://api.example/list')
+    assert session.get('http://api.example/list').from_cache
+    time.sleep(0.1)
+    refreshed = session.get('http://api.example/list')
+    assert not getattr(refreshed, 'from_cache', False)
+    assert refreshed.content != first.content
+    assert len(inner.calls) == 2
+
+
+def test_lru_eviction():
+    inner = _FakeAdapter()
+    session, cache = _session(inner, max_entries=2)
+    for path in ('a', 'b', 'a', 'c'):
+        session.get(f'http://api.example/{path}')
+    # a 最近被使用过，淘汰的是 b
+    assert cache.stats['evictions'] == 1
+    assert session.get('http://api.example/a').from_cache
+    assert not getattr(session.get('http://api.example/b'), 'from_cache', False)
+    assert len(inner.calls) == 4
+
+
+def test_cache_key_includes_query_and_auth_headers():
+    inner = _FakeAdapter()
+    session, cache = _session(inner)
+    session.get('http://api.example/list', params={'b': '2', 'a': '1'})
+    assert session.get('http://api.example/list?a=1&b=2').from_cache
+    assert not getattr(session.get('http://api.example/list?a=1&b=2', headers={'Authorization': 't'}),
+                       'from_cache', False)
+    assert len(inner.calls) == 2
+
+
+def test_non_idempotent_request_invalidates_host():
+    inner = _FakeAdapter()
+    session, cache = _session(inner)
+    session.get('http://api.example/list')
+    session.get('http://other.example/list')
+    session.post('http://api.example/list', json={'name': 'x'})
+    assert cache.stats['invalidations'] == 1
+    assert not getattr(session.get('http://api.example/list'), 'from_cache', False)
+    assert session.get('http://other.example/list').from_cache
+    assert [method for method, _ in inner.calls] == ['GET', 'GET', 'POST', 'GET']
+
+
+def test_stream_requests_bypass_cache():
+    inner = _FakeAdapter()
+    session, cache = _session(inner)
+    for _ in range(2):
+        response = session.get('http://api.example/video', stream=True)
+        assert not getattr(response, 'from_cache', False)
+    assert len(inner.calls) == 2
+    assert cache.snapshot() == {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'invalidations': 0,
+                                'entries': 0}
@@ -0,0 +1,91 @@
+"""
+结果库单元测试：写入与失败用例查询、--rerun-failed 的依赖用例选择
+"""
+import hashlib
+import sqlite3
+from types import SimpleNamespace
+
+from core.result_store import OUTCOME_FAILED, OUTCOME_PASSED, ResultStore, select_rerun_cases
+from core.template_functions import compile_template
+from core.test_executor import TestExecutor as Executor
+
+
+def _case(case_id, name, body='', extract_key='', save_var_name='', headers=''):
+    return {'case_id': case_id, 'case_name': name, 'url': '/api', 'headers': headers, 'params': '',
+            'body': body, 'extract_key': extract_key, 'save_var_name': save_var_name}
+
+
+def test_template_variables():
+    template = compile_template('{"t": "{{token}}", "u": "${ user }", "s": "${__md5($secret)}", "id": "${__uuid()}"}')
+    assert template.variables() == ['token', 'user', 'secret']
+
+
+def test_rerun_keeps_login_case():
+    cases = [
+        _case(1, '登录', body='{"username": "main"}', extract_key='token=token'),
+        _case(2, '地址列表验证', body='{"token": "{{token}}"}'),
+        _case(3, '传参缺失验证', body='{"username": "main"}'),
+    ]
+    assert select_rerun_cases(cases, [False, True, False]) == [True, True, False]
+    assert select_rerun_cases(cases, [False, False, True]) == [False, False, True]
+
+
+def test_rerun_keeps_nearest_provider_transitively():
+    cases = [
+        _case(1, '旧登录', extract_key='token=token'),
+        _case(2, '登录', body='{"code": "${code}"}', extract_key='token=token'),
+        _case(3, '验证码', extract_key='code=data.code'),
+        _case(4, '无关用例', extract_key='other=data.id'),
+        _case(5, '查询', headers='{"Authorization": "${token}"}', body='{"id": "${__uuid()}"}'),
+    ]
+    # token 只保留离引用处最近的提取用例2；用例2引用的 code 在它之前没有提取用例
+    assert select_rerun_cases(cases, [False] * 4 + [True]) == [False, True, False, False, True]
+    # 用例2引用的 code 只能由它之前的用例提供，之后的用例3不算依赖
+    cases.insert(0, _case(0, '取验证码', save_var_name='code', extract_key='data.code'))
+    assert select_rerun_cases(cases, [False] * 5 + [True]) == [True, False, True, False, False, True]
+
+
+def test_store_failed_cases(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.sqlite3'), batch_size=2, flush_interval=0.01)
+    store.start()
+    store.current_nodeid = 'testcases/test_api_csv_driver.py::TestAllDrivers::test_api_case[1 - 登录]'
+    store.record({'case_id': '1', 'case_name': '登录', 'outcome': OUTCOME_PASSED})
+    store.current_nodeid = 'testcases/test_api_csv_driver.py::TestAllDrivers::test_api_case[2 - 查询]'
+    store.record({'case_id': '2', 'case_name': '查询', 'outcome': OUTCOME_FAILED, 'failure': 'boom'})
+    store.close()
+    reader = ResultStore(str(tmp_path / 'results.sqlite3'))
+    assert reader.failed_cases() == [('2', '查询')]
+    assert reader.failed_nodeids() == ['testcases/test_api_csv_driver.py::TestAllDrivers::test_api_case[2 - 查询]']
+    assert reader.runs()[0]['failed'] == 1
+
+
+def test_store_adds_missing_columns(tmp_path):
+    """旧版本的结果库（没有 nodeid 列）打开时自动补列"""
+    db_file = str(tmp_path / 'old.sqlite3')
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE case_results (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, env TEXT, "
+                 "case_id TEXT, case_name TEXT, method TEXT, endpoint TEXT, status_code INTEGER, outcome TEXT, "
+                 "failure TEXT, started_at REAL, duration_ms REAL, elapsed_ms REAL, timings TEXT, retries INTEGER, "
+                 "assertions INTEGER, failed_assertions INTEGER, body_sha256 TEXT)")
+    conn.close()
+    store = ResultStore(db_file, flush_interval=0.01)
+    store.start()
+    store.current_nodeid = 'test_x.py::test_case[1]'
+    store.record({'case_id': '1', 'case_name': '查询', 'outcome': OUTCOME_FAILED})
+    store.close()
+    assert ResultStore(db_file).failed_nodeids() == ['test_x.py::test_case[1]']
+
+
+def test_body_hash_of_streamed_response():
+    """流式读取只保留了前缀时，结果库中记录完整响应体的哈希"""
+    executor = Executor(None, None, None)
+    body = b'x' * 4096
+    full = SimpleNamespace(status_code=200, content=body)
+    streamed = SimpleNamespace(status_code=200, content=body[:64],
+                               stream_info={'sha256': hashlib.sha256(body).hexdigest(), 'truncated': True})
+    hashes = []
+    for response in (full, streamed):
+        executor._result = {}
+        executor._record_response('GET', 'http://api/data', response)
+        hashes.append(executor._result['body_sha256'])
+    assert hashes == [hashlib.sha256(body).hexdigest()] * 2
@@ -0,0 +1,147 @@
+"""
+重试单元测试：Retry-After 解析、退避上限、重试预算，以及 RequestHandler 中的重试过程
+"""
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from core.cassette import CassetteMissError
+from core.request_handler import RequestHandler
+from core.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+
+class _Handler(BaseHTTPRequestHandler):
+    calls = {}
+
+    def do_GET(self):
+        calls = _Handler.calls[self.path] = _Handler.calls.get(self.path, 0) + 1
+        if self.path == '/retry-after-zero' and calls == 1:
+            self._reply(503, {'Retry-After': '0'})
+        elif self.path == '/retry-after-long':
+            self._reply(503, {'Retry-After': '120'})
+        elif self.path == '/always-503':
+            self._reply(503)
+        else:
+            self._reply(200)
+
+    do_POST = do_GET
+
+    def _reply(self, status, headers=None):
+        body = b'{}'
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.calls = {}
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(' 0 ') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+    assert 25 < parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+
+
+def test_next_delay_is_bounded():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    delay = 0.0
+    for _ in range(50):
+        previous = delay
+        delay = policy.next_delay(previous)
+        assert 0.5 <= delay <= min(4.0, max(previous * 3, 0.5))
+    assert RetryPolicy(base_delay=10, max_delay=2).next_delay(0) == 2
+
+
+def test_retry_reason():
+    policy = RetryPolicy()
+    response = requests.Response()
+    response.status_code = 503
+    assert policy.retry_reason('GET', response) == '状态码 503'
+    # 非幂等方法不按状态码和读取失败重试
+    assert policy.retry_reason('POST', response) is None
+    assert policy.retry_reason('POST', error=requests.exceptions.ReadTimeout()) is None
+    assert policy.retry_reason('GET', error=requests.exceptions.ReadTimeout()) is not None
+    assert policy.retry_reason('GET', error=CassetteMissError('miss')) is None
+    response.status_code = 404
+    assert policy.retry_reason('GET', response) is None
+
+
+def test_retry_budget():
+    budget = RetryBudget(ratio=0.5, min_retries=2)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    assert budget.snapshot() == {'requests': 2, 'retries': 3, 'denied': 2}
+
+
+def _handler(base_url, **kwargs):
+    options = dict(base_url=base_url, retries=2, retry_base_delay=0.01, retry_max_delay=0.05)
+    options.update(kwargs)
+    return RequestHandler(**options)
+
+
+def test_retry_after_is_used_instead_of_backoff(server):
+    # 退避下限远大于 Retry-After：按 Retry-After 等待时几乎不耗时
+    handler = _handler(server, retry_base_delay=5, retry_max_delay=10)
+    started = time.monotonic()
+    response = handler.send_request('GET', '/retry-after-zero')
+    handler.close()
+    assert time.monotonic() - started < 2
+    assert response.status_code == 200
+    assert response.retry_info['retries'] == 1
+    assert response.retry_info['wait_seconds'] == 0
+
+
+def test_retry_after_over_limit_gives_up(server):
+    handler = _handler(server)
+    response = handler.send_request('GET', '/retry-after-long')
+    handler.close()
+    assert response.status_code == 503
+    assert response.retry_info['retries'] == 0
+    assert _Handler.calls['/retry-after-long'] == 1
+
+
+def test_retries_stop_at_max_retries_and_budget(server):
+    handler = _handler(server, retry_budget_ratio=0, retry_budget_min=3)
+    first = handler.send_request('GET', '/always-503')
+    assert first.retry_info['retries'] == 2
+    assert first.retry_info['attempts'] == 3
+    # 预算只剩1次重试
+    second = handler.send_request('GET', '/always-503')
+    handler.close()
+    assert second.retry_info['retries'] == 1
+    assert second.retry_info['budget_denied']
+    assert handler.retry_budget.snapshot() == {'requests': 2, 'retries': 3, 'denied': 1}
+    assert _Handler.calls['/always-503'] == 5
+
+
+def test_post_is_not_retried_on_status(server):
+    handler = _handler(server)
+    response = handler.send_request('POST', '/always-503', json_data={})
+    handler.close()
+    assert response.status_code == 503
+    assert response.retry_info['attempts'] == 1
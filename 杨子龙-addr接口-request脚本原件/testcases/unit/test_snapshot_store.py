@@ -0,0 +1,147 @@
+"""
+快照存储单元测试：忽略路径、哈希一致时的快速路径、新建/更新快照和不一致时的差异
+"""
+import json
+import os
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+from core.json_diff import CHANGED, REMOVED, JsonMismatchError
+from core.response_view import ResponseView
+from core.snapshot_store import SnapshotStore, compile_ignore_path, normalize
+
+IGNORE = ['$..created_at', 'data[*].updated_at']
+
+
+def _view(document):
+    text = document if isinstance(document, str) else json.dumps(document, ensure_ascii=False)
+    return ResponseView(SimpleNamespace(status_code=200, decoded_text=text))
+
+
+def _document(**changes):
+    document = {'code': 0, 'created_at': '2024-06-01 10:00:00',
+                'data': [{'id': 1, 'name': '地址1', 'updated_at': 100, 'meta': {'created_at': 1}},
+                         {'id': 2, 'name': '地址2', 'updated_at': 200}]}
+    document.update(changes)
+    return document
+
+
+def _objects(root):
+    return sorted(name for _, _, files in os.walk(os.path.join(root, 'objects')) for name in files)
+
+
+def test_compile_ignore_path():
+    assert compile_ignore_path('$..created_at') == ('..', 'created_at')
+    assert compile_ignore_path('data[*].updated_at') == ('data', '*', 'updated_at')
+    assert compile_ignore_path(' data.*.id ') == ('data', '*', 'id')
+    assert compile_ignore_path('data[0].tags[1]') == ('data', 0, 'tags', 1)
+
+
+def test_normalize_removes_ignored_fields():
+    document = _document(tags=['a', 'b'], list=[10, 20, 30])
+    original = json.loads(json.dumps(document))
+    normalized = normalize(document, IGNORE + ['list[1]', 'tags[*]', 'list[9]', 'missing.key', ' '])
+    assert normalized == {'code': 0, 'data': [{'id': 1, 'name': '地址1', 'meta': {}}, {'id': 2, 'name': '地址2'}],
+                          'tags': [], 'list': [10, 30]}
+    # 返回副本，不修改原文档；没有忽略路径时原样返回
+    assert document == original
+    assert normalize(document, []) is document
+
+
+def test_recursive_path_inside_lists():
+    document = [{'created_at': 1, 'items': [{'created_at': 2, 'id': 1}]}, {'id': 2}]
+    assert normalize(document, ['$..created_at']) == [{'items': [{'id': 1}]}, {'id': 2}]
+    assert normalize(document, ['[*].items[0]']) == [{'created_at': 1, 'items': []}, {'id': 2}]
+
+
+def test_snapshot_name():
+    assert SnapshotStore.snapshot_name({'case_id': '7', 'snapshot': 'True'}) == 'case_7'
+    assert SnapshotStore.snapshot_name({'case_id': '7', 'snapshot': ' address_list '}) == 'address_list'
+
+
+def test_create_then_match(tmp_path):
+    root = str(tmp_path / 'snapshots')
+    store = SnapshotStore(root, ignore_paths=IGNORE)
+    store.check({'case_id': '1', 'snapshot': '1'}, _view(_document()))
+    assert store.stats['created'] == 1
+    assert store.names() == ['case_1']
+    digest = store._index['case_1']['sha256']
+    with open(store._object_path(digest), encoding='utf-8') as f:
+        assert 'created_at' not in f.read()
+
+    # 重新加载索引；键顺序和被忽略字段不同的响应仍然一致
+    reloaded = SnapshotStore(root, ignore_paths=IGNORE)
+    changed = _document(created_at='2025-01-01 00:00:00')
+    changed['data'][1]['updated_at'] = 999
+    reloaded.check({'case_id': '1', 'snapshot': '1'}, _view(dict(reversed(list(changed.items())))))
+    assert reloaded.stats == {'matched': 1, 'mismatched': 0, 'created': 0, 'updated': 0}
+
+
+def test_hash_match_does_not_read_snapshot(tmp_path):
+    """哈希一致时直接通过，不读取快照文件"""
+    root = str(tmp_path / 'snapshots')
+    store = SnapshotStore(root, ignore_paths=IGNORE)
+    store.check({'case_id': '1', 'snapshot': 'list'}, _view(_document()))
+    shutil.rmtree(os.path.join(root, 'objects'))
+    store.check({'case_id': '1', 'snapshot': 'list'}, _view(_document()))
+    assert store.stats['matched'] == 1
+
+
+def test_identical_content_stored_once(tmp_path):
+    root = str(tmp_path / 'snapshots')
+    store = SnapshotStore(root)
+    store.check({'case_id': '1', 'snapshot': 'first'}, _view({'code': 0}))
+    store.check({'case_id': '2', 'snapshot': 'second'}, _view({'code': 0}))
+    assert store.names() == ['first', 'second']
+    assert len(_objects(root)) == 1
+
+
+def test_mismatch_reports_diff(tmp_path):
+    root = str(tmp_path / 'snapshots')
+    case = {'case_id': '1', 'snapshot': '1'}
+    store = SnapshotStore(root, ignore_paths=IGNORE)
+    store.check(case, _view(_document()))
+    digest = store._index['case_1']['sha256']
+
+    changed = _document(code=1)
+    del changed['data'][1]['name']
+    with pytest.raises(JsonMismatchError) as info:
+        store.check(case, _view(changed))
+    assert [(change.op, change.pointer) for change in info.value.diff.changes] == [
+        (CHANGED, '/code'), (REMOVED, '/data/1/name')]
+    assert 'case_1' in str(info.value) and '--update-snapshots' in str(info.value)
+    assert store.stats['mismatched'] == 1
+    # 不一致时不修改快照
+    assert store._index['case_1']['sha256'] == digest
+    assert len(_objects(root)) == 1
+
+
+def test_update_mode_overwrites(tmp_path):
+    root = str(tmp_path / 'snapshots')
+    case = {'case_id': '1', 'snapshot': '1'}
+    SnapshotStore(root).check(case, _view({'code': 0}))
+    updater = SnapshotStore(root, update=True)
+    updater.check(case, _view({'code': 1}))
+    assert updater.stats['updated'] == 1
+
+    store = SnapshotStore(root)
+    store.check(case, _view({'code': 1}))
+    assert store.stats['matched'] == 1
+    with pytest.raises(JsonMismatchError):
+        store.check(case, _view({'code': 0}))
+    # 旧内容的对象仍然保留，其他快照可能引用它
+    assert len(_objects(root)) == 2
+
+
+def test_text_response(tmp_path):
+    """非JSON响应按文本保存和比较"""
+    store = SnapshotStore(str(tmp_path / 'snapshots'), ignore_paths=IGNORE)
+    case = {'case_id': '1', 'snapshot': 'page'}
+    store.check(case, _view('<html>首页</html>'))
+    store.check(case, _view('<html>首页</html>'))
+    assert store.stats['matched'] == 1
+    with pytest.raises(JsonMismatchError) as info:
+        store.check(case, _view('<html>错误页</html>'))
+    assert [(change.op, change.pointer) for change in info.value.diff.changes] == [(CHANGED, '')]
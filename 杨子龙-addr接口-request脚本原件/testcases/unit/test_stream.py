@@ -0,0 +1,76 @@
+"""
+流式读取单元测试：stream 列的解析与加载时校验、截断响应上的内容断言
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from core.assert_handler import AssertHandler
+from core.request_handler import STREAM_BOUNDED, STREAM_FULL, RequestHandler, parse_stream_mode
+from core.response_view import ResponseView
+from core.test_executor import TestExecutor as Executor
+from utils.test_case_reader import DataHandler
+
+
+def test_parse_stream_mode():
+    assert parse_stream_mode('') == (None, None)
+    assert parse_stream_mode(' False ') == (None, None)
+    assert parse_stream_mode('true') == (STREAM_BOUNDED, None)
+    assert parse_stream_mode('bounded') == (STREAM_BOUNDED, None)
+    assert parse_stream_mode('Bounded: 1024 ') == (STREAM_BOUNDED, 1024)
+    assert parse_stream_mode('full') == (STREAM_FULL, None)
+
+
+@pytest.mark.parametrize('value', ['bounded:64k', 'bounded:-5', 'bounded:0', 'bounded:1.5', 'chunked'])
+def test_parse_stream_mode_rejects_invalid(value):
+    with pytest.raises(ValueError) as info:
+        parse_stream_mode(value)
+    assert value in str(info.value)
+
+
+def test_invalid_stream_column_fails_case(tmp_path):
+    """stream 列格式错误时加载不中断，该用例执行时给出明确的失败原因且不发送请求"""
+    path = str(tmp_path / 'cases.csv')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('case_id,case_name,method,url,stream\n'
+                '1,下载,GET,/big,bounded:64k\n'
+                '2,分片,GET,/big,bounded:-5\n'
+                '3,正常,GET,/big,bounded:1024\n')
+    cases = DataHandler().read_test_cases(path)
+    assert [case['case_id'] for case in cases] == ['1', '2', '3']
+    assert '前缀字节数必须是正整数' in cases[0]['stream_error']
+    assert '前缀字节数必须是正整数' in cases[1]['stream_error']
+    assert 'stream_error' not in cases[2]
+
+    handler = RequestHandler(base_url='http://127.0.0.1:1', retries=0)
+    executor = Executor(handler, None, None)
+    with pytest.raises(pytest.fail.Exception) as info:
+        executor._execute_case_logic(cases[0])
+    assert 'bounded:64k' in str(info.value)
+    assert handler.get_last_error() is None
+    handler.close()
+
+
+def test_request_handler_rejects_invalid_stream_mode():
+    handler = RequestHandler(base_url='http://127.0.0.1:1', retries=0)
+    assert handler.send_request('GET', '/big', stream_mode='bounded:-5') is None
+    assert '前缀字节数必须是正整数' in handler.get_last_error()
+    handler.close()
+
+
+def _streamed(body, kept, truncated):
+    return SimpleNamespace(status_code=200, decoded_text=body[:kept],
+                           stream_info={'bytes': len(body), 'kept_bytes': kept, 'truncated': truncated})
+
+
+def test_content_contains_on_truncated_json():
+    """截断的响应不退回前缀上的文本比较，而是提示改用 full"""
+    body = '{"code": 0, "data": [' + ', '.join(['{"id": %d}' % i for i in range(100)]) + ']}'
+    view = ResponseView(_streamed(body, 64, True))
+    with pytest.raises(ValueError) as info:
+        AssertHandler.assert_content_contains(view, '{"code": 0}')
+    assert '响应体已截断' in str(info.value) and 'full' in str(info.value)
+
+    # 未截断时照常按JSON子集匹配；非JSON期望内容照常按前缀文本比较
+    assert AssertHandler.assert_content_contains(ResponseView(_streamed(body, len(body), False)), '{"code": 0}')
+    assert AssertHandler.assert_content_contains(view, '"code": 0')
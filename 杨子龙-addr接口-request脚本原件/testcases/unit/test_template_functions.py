@@ -0,0 +1,52 @@
+"""
+模板编译与内置函数单元测试
+"""
+import hashlib
+import re
+
+from core.template_functions import compile_template
+
+_UUID = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$')
+
+
+def _lookup(variables):
+    return lambda name: variables.get(name, '')
+
+
+def test_render_variables_and_missing():
+    template = compile_template('{"token": "{{token}}", "user": "${user}", "other": "${other}"}')
+    text, missing = template.render(_lookup({'token': 't1', 'user': '张三'}))
+    assert text == '{"token": "t1", "user": "张三", "other": "${other}"}'
+    assert missing == ['other']
+    assert compile_template('no placeholders').render(_lookup({})) == ('no placeholders', [])
+
+
+def test_render_functions():
+    lookup = _lookup({'secret': 'abc'})
+    text, missing = compile_template('${__md5($secret)}|${__rand_int(5, 5)}|${__uuid()}').render(lookup)
+    md5, number, value = text.split('|')
+    assert not missing
+    assert md5 == hashlib.md5(b'abc').hexdigest()
+    assert number == '5'
+    assert _UUID.match(value)
+    # 未注册的函数按普通变量处理
+    assert compile_template('${__unknown()}').render(lookup) == ('${__unknown()}', ['__unknown()'])
+
+
+def test_render_batch():
+    template = compile_template('{"id": "${__uuid()}", "n": ${__seq(batch_test)}, "t": "{{token}}"}')
+    rows = template.render_batch(_lookup({'token': 't'}), 50)
+    assert len(rows) == 50
+    ids = [re.search(r'"id": "([^"]+)"', row).group(1) for row in rows]
+    assert len(set(ids)) == 50 and all(_UUID.match(value) for value in ids)
+    numbers = [int(re.search(r'"n": (\d+)', row).group(1)) for row in rows]
+    assert numbers == list(range(numbers[0], numbers[0] + 50))
+    assert all(row.endswith('"t": "t"}') for row in rows)
+
+
+def test_unique_name_does_not_repeat():
+    template = compile_template('${__unique_name(buyer)}')
+    names = {template.render(_lookup({}))[0] for _ in range(20)}
+    names.update(template.render_batch(_lookup({}), 20))
+    assert len(names) == 40
+    assert all(name.startswith('buyer_') for name in names)
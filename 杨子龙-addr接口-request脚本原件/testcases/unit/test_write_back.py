@@ -0,0 +1,159 @@
+"""
+结果写回单元测试：CSV/XLSX/JSON 用例文件的读取 -> 写回 -> 再读取
+"""
+import csv
+import io
+import json
+import os
+
+from openpyxl import Workbook, load_workbook
+
+from core.write_back import REFERENCE_PREFIX, RESULT_FAIL, RESULT_PASS, ResultWriteBack
+from utils.test_case_reader import DataHandler
+
+LONG_BODY = '{"data": "' + '长' * 50 + '"}'
+
+
+def _writer(tmp_path, inline_limit=20):
+    return ResultWriteBack(str(tmp_path), str(tmp_path / 'responses'), inline_limit=inline_limit)
+
+
+def _read_reference(tmp_path, cell):
+    assert cell.startswith(REFERENCE_PREFIX)
+    with open(os.path.join(str(tmp_path), cell[len(REFERENCE_PREFIX):]), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_csv_round_trip_keeps_layout(tmp_path):
+    path = str(tmp_path / 'cases.csv')
+    content = ('id,name,method,url,body,enabled\r\n'
+               '1,登录,POST,/api/login,"{""a"": ""x,y""}",1\r\n'
+               '\r\n'
+               '2,禁用,GET,/a,,0\r\n'
+               '3,"多\r\n行",GET,/b,,1')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(content)
+    cases = {case['case_id']: case for case in DataHandler().read_test_cases(path)}
+    assert sorted(cases) == ['1', '3']
+
+    writer = _writer(tmp_path)
+    writer.record(cases['1'], True, 'ok')
+    writer.record(cases['3'], False, LONG_BODY)
+    assert writer.flush() == 1
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        written = f.read()
+    # 换行风格、空行、末尾没有换行都保持不变
+    assert '\n' not in written.replace('\r\n', '')
+    assert '\r\n\r\n' in written
+    assert not written.endswith('\r\n')
+    records = [record for record in csv.reader(io.StringIO(written)) if record]
+    header = records[0]
+    assert header == ['id', 'name', 'method', 'url', 'body', 'enabled',
+                      'actual_response', 'pass_or_not', 'last_run_date']
+    assert records[1][:6] == ['1', '登录', 'POST', '/api/login', '{"a": "x,y"}', '1']
+    assert records[1][6:8] == ['ok', RESULT_PASS]
+    # 未写回的行保持原样
+    assert records[2] == ['2', '禁用', 'GET', '/a', '', '0']
+    assert records[3][1] == '多\r\n行'
+    assert records[3][7] == RESULT_FAIL
+    assert _read_reference(tmp_path, records[3][6]) == LONG_BODY
+
+    # 再次写回只更新已有的列
+    writer.record(DataHandler().read_test_cases(path)[0], False, 'again')
+    writer.flush()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        records = [record for record in csv.reader(f) if record]
+    assert len(records[0]) == len(header)
+    assert records[1][6:8] == ['again', RESULT_FAIL]
+
+
+def test_csv_with_trailing_newline(tmp_path):
+    path = str(tmp_path / 'cases.csv')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('id,name,method,url,pass_or_not\n1,查询,GET,/a,\n2,查询2,GET,/b\n')
+    case = DataHandler().read_test_cases(path)[1]
+    writer = _writer(tmp_path)
+    writer.record(case, True, 'ok')
+    writer.flush()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        written = f.read()
+    assert written.endswith('\n') and not written.endswith('\n\n') and '\r' not in written
+    records = list(csv.reader(io.StringIO(written)))
+    assert records[0] == ['id', 'name', 'method', 'url', 'pass_or_not', 'actual_response', 'last_run_date']
+    assert records[1] == ['1', '查询', 'GET', '/a', '']
+    assert records[2][:6] == ['2', '查询2', 'GET', '/b', RESULT_PASS, 'ok']
+
+
+def test_xlsx_round_trip(tmp_path):
+    path = str(tmp_path / 'cases.xlsx')
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['case_id', 'case_name', 'method', 'url', 'pass_or_not', 'enabled'])
+    sheet.append(['1', '登录', 'POST', '/api/login', 'old', '1'])
+    sheet.append(['2', '查询', 'GET', '/api/list', 'old', '1'])
+    workbook.create_sheet('说明').append(['不写回的工作表'])
+    workbook.save(path)
+
+    cases = DataHandler().read_test_cases(path)
+    writer = _writer(tmp_path)
+    writer.record(cases[1], False, LONG_BODY)
+    assert writer.flush() == 1
+
+    workbook = load_workbook(path)
+    sheet = workbook.worksheets[0]
+    rows = [[cell.value for cell in row] for row in sheet.iter_rows()]
+    assert rows[0] == ['case_id', 'case_name', 'method', 'url', 'pass_or_not', 'enabled',
+                       'actual_response', 'last_run_date']
+    assert rows[1][:7] == ['1', '登录', 'POST', '/api/login', 'old', '1', None]
+    assert rows[2][4] == RESULT_FAIL
+    assert _read_reference(tmp_path, rows[2][6]) == LONG_BODY
+    assert rows[2][7]
+    assert workbook['说明']['A1'].value == '不写回的工作表'
+
+
+def test_json_round_trip(tmp_path):
+    path = str(tmp_path / 'cases.json')
+    data = [{'case_id': '1', 'case_name': '登录', 'method': 'POST', 'url': '/api/login', 'enabled': '1'},
+            {'case_id': '2', 'case_name': '查询', 'method': 'GET', 'url': '/api/list', 'enabled': '1'}]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, ensure_ascii=False, indent=2) + '\n')
+    cases = DataHandler().read_test_cases(path)
+    writer = _writer(tmp_path)
+    writer.record(cases[0], True, '{"token": "t"}')
+    writer.flush()
+
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    assert text.endswith('}\n]\n') and '登录' in text
+    written = json.loads(text)
+    assert written[0]['actual_response'] == '{"token": "t"}'
+    assert written[0]['pass_or_not'] == RESULT_PASS
+    assert written[1] == data[1]
+
+
+def test_json_single_object(tmp_path):
+    path = str(tmp_path / 'case.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'case_id': '1', 'case_name': '登录', 'method': 'GET', 'url': '/a', 'enabled': '1'}, f)
+    writer = _writer(tmp_path)
+    writer.record(DataHandler().read_test_cases(path)[0], False, None)
+    writer.flush()
+    with open(path, encoding='utf-8') as f:
+        written = json.load(f)
+    assert written['pass_or_not'] == RESULT_FAIL
+    assert written['actual_response'] == ''
+
+
+def test_unsupported_and_unknown_sources(tmp_path):
+    path = str(tmp_path / 'cases.xls')
+    with open(path, 'wb') as f:
+        f.write(b'xls')
+    writer = _writer(tmp_path)
+    writer.record({'case_id': '1'}, True, 'ok')
+    assert len(writer) == 0
+    writer.record({'case_id': '1', 'source_file': path, 'source_row': 0}, True, 'ok')
+    assert writer.flush() == 0
+    with open(path, 'rb') as f:
+        assert f.read() == b'xls'
+    assert sorted(os.listdir(str(tmp_path))) == ['cases.xls']
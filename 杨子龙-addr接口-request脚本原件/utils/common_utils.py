@@ -1,10 +1,39 @@
 import json
-from typing import Any, Dict
+import os
+import threading
+from typing import Any, Callable, Dict, Union
 
 
 class CommonUtils:
     """通用工具类"""
 
+    @staticmethod
+    def write_atomic(path: str, content: Union[bytes, str, Callable[[str], Any]], encoding: str = 'utf-8'):
+        """
+        原子写文件：先写同目录下的临时文件再替换目标文件，写入中途失败不会留下半个文件
+
+        临时文件名带进程号和线程号，多个会话或线程同时写同一文件时不会互相覆盖临时文件
+
+        Args:
+            path: 目标文件路径
+            content: 文件内容（bytes/str），或接收临时文件路径并写入内容的函数
+            encoding: content 为 str 时使用的编码
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if callable(content):
+                content(tmp_path)
+            else:
+                data = content.encode(encoding) if isinstance(content, str) else content
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     @staticmethod
     def parse_json_safely(text: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地桩服务：根据用例文件的期望响应或录制的磁带提供接口响应，用于离线压测和框架基准测试
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config.config import Config
+from core.cassette import MODE_REPLAY, Cassette, normalize_url
+from core.json_matcher import JsonMatcher
+from core.json_path import compile_path
+from utils.logger import logger
+from utils.test_case_reader import DataHandler
+
+# 用例请求体中的变量占位符
+_PLACEHOLDER_PATTERN = re.compile(r'\$\{[^}]+\}|\{\{[^}]+\}\}')
+# 占位符替换后的通配标记
+_WILDCARD = '__STUB_ANY__'
+_BARE_WILDCARD_PATTERN = re.compile(r'(?<!")' + _WILDCARD + r'(?!")')
+
+# 用例数据无法匹配时的响应
+_NOT_FOUND_BODY = json.dumps({"success": False, "message": "桩服务未找到匹配的用例"}, ensure_ascii=False)
+
+
+def _parse_body_template(body: str) -> Any:
+    """把用例请求体解析为匹配模板，变量占位符所在的值视为通配"""
+    if not body or not body.strip():
+        return None
+    text = _PLACEHOLDER_PATTERN.sub(_WILDCARD, body)
+    text = _BARE_WILDCARD_PATTERN.sub('"' + _WILDCARD + '"', text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def _match_template(template: Any, actual: Any) -> Optional[int]:
+    """
+    判断请求体是否符合模板
+
+    Returns:
+        int: 精确匹配的值个数（越大越具体）；不匹配时返回None
+    """
+    if isinstance(template, str) and _WILDCARD in template:
+        return 0
+    if isinstance(template, dict):
+        if not isinstance(actual, dict) or set(template) != set(actual):
+            return None
+        score = 0
+        for key, value in template.items():
+            child = _match_template(value, actual[key])
+            if child is None:
+                return None
+            score += child
+        return score
+    if isinstance(template, list):
+        if not isinstance(actual, list) or len(template) != len(actual):
+            return None
+        score = 0
+        for value, item in zip(template, actual):
+            child = _match_template(value, item)
+            if child is None:
+                return None
+            score += child
+        return score
+    return 1 if template == actual else None
+
+
+def _synthesize_extract_fields(extract_key: str, document: Any, seed: int) -> Any:
+    """用例需要从响应中提取变量时，在响应里补上对应路径的值，保证调用链能继续执行"""
+    if not extract_key or '=' not in extract_key:
+        return document
+    if document is None:
+        document = {}
+    if not isinstance(document, dict):
+        return document
+    for rule in (r.strip() for r in extract_key.split(';')):
+        if '=' not in rule:
+            continue
+        var_name, path = (part.strip() for part in rule.split('=', 1))
+        if path.startswith('regex:'):
+            continue
+        tokens = compile_path(path)
+        if not tokens or any(isinstance(token, int) for token in tokens):
+            continue
+        value = 1000 + seed if re.search(r'id\d*$', var_name) else f"stub-{var_name}-{seed}"
+        node = document
+        for token in tokens[:-1]:
+            node = node.setdefault(token, {})
+            if not isinstance(node, dict):
+                break
+        else:
+            node.setdefault(tokens[-1], value)
+    return document
+
+
+class StubRoute:
+    """由一条用例生成的桩路由"""
+
+    def __init__(self, method: str, path: str, body_template: Any, status: int,
+                 body: bytes, content_type: str, source: str):
+        self.method = method
+        self.path = path
+        self.body_template = body_template
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.source = source
+
+    @classmethod
+    def from_case(cls, case: dict, seed: int) -> Optional['StubRoute']:
+        url = case.get('url', '')
+        if not url or _PLACEHOLDER_PATTERN.search(url):
+            return None
+        path = urlsplit(url).path or '/'
+        status_text = str(case.get('expected_status', '')).strip()
+        status = int(status_text) if status_text.isdigit() else 200
+
+        expected = case.get('expected_content', '')
+        document = case.get('expected_content_json')
+        if document is None:
+            # 期望内容常写成对象片段（如 "success": true, "message": "..."），补上花括号后按JSON返回
+            document = JsonMatcher.parse_expected('{' + expected + '}') if expected else {}
+        if document is not None:
+            document = _synthesize_extract_fields(case.get('extract_key', ''), document, seed)
+            body = json.dumps(document, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        else:
+            body = expected.encode('utf-8')
+            content_type = 'text/plain; charset=utf-8'
+
+        return cls(case.get('method', 'GET').upper(), path, _parse_body_template(case.get('body', '')),
+                   status, body, content_type, f"{case.get('case_id')} - {case.get('case_name')}")
+
+
+class StubServer:
+    """
+    多线程本地桩服务
+
+    响应来源：
+        - 用例文件：按 请求方法 + 路径 + 请求体模板 匹配用例，返回 expected_content 和 expected_status
+        - 磁带文件：按 请求方法 + 路径 + 请求体哈希 精确匹配录制的响应，优先于用例
+    """
+
+    def __init__(self, routes: Optional[List[StubRoute]] = None, cassette: Optional[Cassette] = None,
+                 host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0, error_status: int = 500):
+        """
+        Args:
+            routes (list): 用例生成的路由
+            cassette (Cassette): 重放模式打开的磁带
+            host (str): 监听地址
+            port (int): 监听端口，0 表示随机分配
+            latency_ms (float): 每个响应的固定延迟（毫秒）
+            jitter_ms (float): 在固定延迟上叠加的随机抖动上限（毫秒）
+            error_rate (float): 注入错误响应的概率（0~1）
+            error_status (int): 注入错误时返回的状态码
+        """
+        self.routes: Dict[Tuple[str, str], List[StubRoute]] = {}
+        for route in routes or []:
+            self.routes.setdefault((route.method, route.path), []).append(route)
+        self.cassette = cassette
+        self.cassette_keys: Dict[Tuple[str, str, str], str] = {}
+        if cassette is not None:
+            for key in cassette.keys():
+                method, url, body_hash = key.split(' ', 2)
+                parts = urlsplit(url)
+                self.cassette_keys[(method, parts.path + ('?' + parts.query if parts.query else ''), body_hash)] = key
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stats = {'requests': 0, 'errors_injected': 0, 'not_found': 0}
+        self._stats_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @classmethod
+    def from_case_files(cls, file_paths: List[str], **kwargs) -> 'StubServer':
+        """从用例文件构建桩服务"""
+        routes = []
+        reader = DataHandler()
+        for file_path in file_paths:
+            for case in reader.read_test_cases(file_path):
+                route = StubRoute.from_case(case, seed=len(routes))
+                if route is not None:
+                    routes.append(route)
+        logger.info(f"桩服务从 {len(file_paths)} 个用例文件加载了 {len(routes)} 条路由")
+        return cls(routes=routes, **kwargs)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def resolve(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, List[Tuple[str, str]]]:
+        """
+        根据请求确定响应
+
+        Returns:
+            tuple: (状态码, 响应体, 响应头列表)
+        """
+        if self.cassette_keys:
+            parts = urlsplit(normalize_url('http://stub' + path))
+            lookup_path = parts.path + ('?' + parts.query if parts.query else '')
+            key = self.cassette_keys.get((method, lookup_path, hashlib.sha1(body).hexdigest()))
+            if key is not None:
+                record = self.cassette.lookup(key)
+                if record is not None:
+                    return record['status_code'], bytes(record['body']), [tuple(h) for h in record['headers']]
+
+        candidates = self.routes.get((method, urlsplit(path).path), [])
+        if candidates:
+            try:
+                actual = json.loads(body.decode('utf-8')) if body.strip() else None
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                actual = body.decode('utf-8', errors='replace')
+            best, best_score = None, -1
+            for route in candidates:
+                score = _match_template(route.body_template, actual)
+                if score is not None and score > best_score:
+                    best, best_score = route, score
+            if best is not None:
+                return best.status, best.body, [('Content-Type', best.content_type)]
+
+        self._count('not_found')
+        return 404, _NOT_FOUND_BODY.encode('utf-8'), [('Content-Type', 'application/json; charset=utf-8')]
+
+    def _make_handler(self):
+        server = self
+
+        class StubRequestHandler(BaseHTTPRequestHandler):
+            # 使用HTTP/1.1以支持长连接复用
+            protocol_version = 'HTTP/1.1'
+            # 响应头和响应体分两次写出，关闭Nagle算法避免与客户端的延迟确认叠加出40ms延迟
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                logger.debug(f"桩服务: {self.address_string()} {format % args}")
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                server._count('requests')
+
+                delay = server.latency_ms + (random.uniform(0, server.jitter_ms) if server.jitter_ms else 0)
+                if delay > 0:
+                    time.sleep(delay / 1000.0)
+
+                if server.error_rate and random.random() < server.error_rate:
+                    server._count('errors_injected')
+                    status = server.error_status
+                    payload = json.dumps({"success": False, "message": "桩服务注入的错误"},
+                                         ensure_ascii=False).encode('utf-8')
+                    headers = [('Content-Type', 'application/json; charset=utf-8')]
+                else:
+                    status, payload, headers = server.resolve(self.command, self.path, body)
+
+                self.send_response(status)
+                for name, value in headers:
+                    if name.lower() not in ('content-length', 'transfer-encoding', 'connection'):
+                        self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_HEAD = _handle
+
+        return StubRequestHandler
+
+    def start(self) -> 'StubServer':
+        """在后台线程启动桩服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-server', daemon=True)
+        self._thread.start()
+        logger.info(f"桩服务已启动: {self.url}")
+        return self
+
+    def serve_forever(self):
+        """在当前线程运行桩服务，直到被中断"""
+        logger.info(f"桩服务已启动: {self.url}")
+        self._server.serve_forever()
+
+    def stop(self):
+        """停止桩服务"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self.cassette is not None:
+            self.cassette.close()
+        logger.info(f"桩服务已停止，统计: {self.stats}")
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="根据用例文件或录制的磁带启动本地桩服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=6666, help="监听端口")
+    parser.add_argument("--file", action="append", help="用例文件，可多次指定，默认加载全部用例文件")
+    parser.add_argument("--cassette", help="录制的磁带文件，优先于用例文件匹配")
+    parser.add_argument("--latency-ms", type=float, default=0, help="每个响应的固定延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="随机抖动上限（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0, help="注入错误响应的概率（0~1）")
+    parser.add_argument("--error-status", type=int, default=500, help="注入错误时返回的状态码")
+    args = parser.parse_args()
+
+    config = Config()
+    files = args.file or (config.get_all_test_files() + config.get_json_test_files())
+    cassette = Cassette(args.cassette, MODE_REPLAY) if args.cassette else None
+    server = StubServer.from_case_files(
+        files, cassette=cassette, host=args.host, port=args.port, latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms, error_rate=args.error_rate, error_status=args.error_status)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,9 @@ import os
 import pandas as pd
 
 from config.config import Config
+from core.assertion_plan import AssertionPlan
+from core.json_matcher import JsonMatcher
+from core.request_handler import parse_stream_mode
 from utils.logger import logger
 
 
@@ -55,7 +58,7 @@ class DataHandler:
                 # 确保所有字段都存在
                 required_columns = ['case_id', 'case_name', 'method', 'url', 'headers', 'params', 'body',
                                     'expected_status', 'expected_content', 'json_path', 'expected_json_value',
-                                    'extract_key', 'save_var_name', 'validate', 'enabled']
+                                    'extract_key', 'save_var_name', 'validate', 'snapshot', 'enabled']
                 for col in required_columns:
                     if col not in df.columns:
                         df[col] = ''
@@ -105,8 +108,23 @@ class DataHandler:
                     'expected_json_value': str(row.get('expected_json_value', '')),
                     'extract_key': str(row.get('extract_key', row.get('extract', row.get('variable', '')))),
                     'save_var_name': str(row.get('save_var_name', '')),
-                    'validate': str(row.get('validate', ''))
+                    'validate': str(row.get('validate', '')),
+                    'stream': str(row.get('stream', '')),
+                    'snapshot': str(row.get('snapshot', '')),
+                    # 用例所在的文件和行号（从0开始的数据行），结果写回时定位单元格
+                    'source_file': file_path,
+                    'source_row': int(index)
                 }
+                # 加载时预解析JSON格式的期望内容，执行断言时不再重复解析
+                case['expected_content_json'] = JsonMatcher.parse_expected(case['expected_content'])
+                # 加载时校验 stream 列，格式错误不影响整个文件的加载，而是让该用例在执行时报告失败
+                try:
+                    parse_stream_mode(case['stream'])
+                except ValueError as e:
+                    logger.error(f"用例 {case_id} - {case_name}: {str(e)}")
+                    case['stream_error'] = str(e)
+                # 加载时把断言字段编译为断言计划
+                case['assertion_plan'] = AssertionPlan.compile(case)
                 test_cases.append(case)
                 logger.debug(f"添加测试用例: {case['case_id']} - {case['case_name']}")
 
@@ -1,9 +1,22 @@
 import re
 import json  # 新增：用于把 dict 转成 JSON 字符串（兜底）
+import logging
+from functools import lru_cache
 
+from core.html_extractor import compile_html_rule, extract_html, is_html_rule
 from utils.logger import logger
 
 
+# "变量名=规则" 中的变量名；正则、选择器自身包含的 = 不作为别名分隔符
+_ALIAS_RULE = re.compile(r'^\s*([^\s=:;\[\]\'"]+)\s*=(.*)$', re.S)
+
+
+@lru_cache(maxsize=512)
+def _compile_pattern(pattern):
+    # 同一条提取正则只编译一次
+    return re.compile(pattern, re.S)
+
+
 class DataHandler:
     """
     数据处理工具类
@@ -94,6 +107,9 @@ class DataHandler:
           - "var1=path[0].field; var2=path2.field"
           - "var1=regex:正则表达式"
           - "var1=regex:..., var2=..."
+          - "var1=css:li.playlist-item@id; var2=xpath://title/text()"
+
+        多条 css:/xpath: 规则只解析一次HTML，所有规则共用同一份待匹配文本
         """
         if not extract_key:
             logger.debug("提取键为空，返回空字符串")
@@ -103,43 +119,96 @@ class DataHandler:
         logger.debug(f"开始提取值，提取规则: {extract_key}")
 
         # 如果包含 ';' 或 '='，按多条规则处理，返回 dict
-        if ';' in extract_key or '=' in extract_key:
-            results = {}
+        if ';' in extract_key or _ALIAS_RULE.match(extract_key):
             # 多条规则用 ; 分隔，比如 "a=b; c=regex:xxx"
-            rules = [r.strip() for r in extract_key.split(';') if r.strip()]
-            for rule in rules:
-                if '=' in rule:
+            rules = []
+            for rule in (r.strip() for r in extract_key.split(';') if r.strip()):
+                alias_match = _ALIAS_RULE.match(rule)
+                if alias_match:
                     # 支持别名赋值，如 "list_id1=regex:..."
-                    alias, actual_key = rule.split('=', 1)
-                    alias = alias.strip()
-                    actual_key = actual_key.strip()
-                    value = self._extract_single_value(response_data, actual_key)
-                    if value != '':
-                        results[alias] = value
-                        logger.info(f"提取变量 {alias} = {value}")
-                    else:
-                        logger.warning(f"未能提取到变量 {alias} (规则: {actual_key})")
+                    rules.append((alias_match.group(1), alias_match.group(2).strip(), True))
                 else:
                     # 没有别名时，使用自身作为键名
-                    key = rule.strip()
-                    value = self._extract_single_value(response_data, key)
-                    if value != '':
-                        results[key] = value
-                        logger.info(f"提取变量 {key} = {value}")
-                    else:
-                        logger.warning(f"未能提取到变量 {key}")
+                    rules.append((rule, rule, False))
+
+            values = self._extract_many(response_data, [actual_key for _, actual_key, _ in rules])
+            results = {}
+            for (alias, actual_key, has_alias), value in zip(rules, values):
+                if value != '':
+                    results[alias] = value
+                    logger.info(f"提取变量 {alias} = {value}")
+                elif has_alias:
+                    logger.warning(f"未能提取到变量 {alias} (规则: {actual_key})")
+                else:
+                    logger.warning(f"未能提取到变量 {alias}")
             return results
         else:
             # 保持原有单值提取逻辑，返回一个字符串
             return self._extract_single_value(response_data, extract_key)
 
-    def _extract_single_value(self, response_data, extract_key):
+    def _extract_many(self, response_data, keys):
+        """
+        按多条规则提取，所有规则共享同一份待匹配文本
+
+        css: / xpath: 规则合并为一次HTML解析，正则规则使用缓存的编译结果，JSON路径规则逐条取值
+
+        Returns:
+            list: 与规则一一对应的提取结果，提取失败为空字符串
+        """
+        text = None
+        values = [''] * len(keys)
+        html_indexes = [i for i, key in enumerate(keys) if is_html_rule(key)]
+        if html_indexes or any(key.lower().startswith('regex:') for key in keys):
+            text = self._text_for_patterns(response_data)
+
+        # 无法解析的规则单独报错，不影响其他规则
+        for i in list(html_indexes):
+            try:
+                compile_html_rule(keys[i])
+            except ValueError as e:
+                logger.error(f"提取值失败: {str(e)}")
+                html_indexes.remove(i)
+
+        if html_indexes:
+            found = extract_html(text, [keys[i] for i in html_indexes])
+            for i, value in zip(html_indexes, found):
+                if value is not None:
+                    values[i] = str(value)
+                    logger.info(f"HTML规则提取成功: {keys[i]} -> {value}")
+                else:
+                    logger.warning(f"HTML规则 {keys[i]} 未匹配到内容")
+
+        for i, key in enumerate(keys):
+            if i not in html_indexes and not is_html_rule(key):
+                values[i] = self._extract_single_value(response_data, key, text=text)
+        return values
+
+    @staticmethod
+    def _text_for_patterns(response_data):
+        """
+        正则和HTML规则匹配的文本：优先使用 html 字段，否则为整个响应的JSON字符串
+        """
+        if isinstance(response_data, dict):
+            if 'html' in response_data and isinstance(response_data['html'], str):
+                # 这里拿到的就是你日志里那整段 HTML，没有 \n、\t 的转义问题
+                return response_data['html']
+            # 兜底：整个 dict 转成 JSON 字符串
+            try:
+                return json.dumps(response_data, ensure_ascii=False)
+            except Exception:
+                return str(response_data)
+        if isinstance(response_data, str):
+            return response_data
+        return str(response_data)
+
+    def _extract_single_value(self, response_data, extract_key, text=None):
         """
         从响应数据中提取值
 
         Args:
             response_data (dict|list|str): 响应数据（可以是 JSON 对象或字符串）
-            extract_key (str): 提取键 / 正则 或 JSON 路径
+            extract_key (str): 提取键 / 正则 / css: 或 xpath: 规则 / JSON 路径
+            text (str): 已准备好的正则匹配文本，多条规则共用时传入，避免重复生成
 
         Returns:
             str: 提取到的值（字符串），提取失败返回空字符串
@@ -149,7 +218,9 @@ class DataHandler:
             return ''
 
         logger.debug(f"开始提取值，提取键: {extract_key}")
-        logger.debug(f"响应数据: {response_data}")
+        # 大响应（如整页HTML）格式化代价很高，只在开启debug日志时输出
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"响应数据: {response_data}")
 
         try:
             # 处理正则表达式提取 (支持大小写 regex: / REGEX: 等)
@@ -158,23 +229,11 @@ class DataHandler:
                 logger.debug(f"使用正则表达式提取: {pattern}")
 
                 # ★★ 关键修复点：优先对 html 字段做正则匹配 ★★
-                if isinstance(response_data, dict):
-                    if 'html' in response_data and isinstance(response_data['html'], str):
-                        # 这里拿到的就是你日志里那整段 HTML，没有 \n、\t 的转义问题
-                        text = response_data['html']
-                    else:
-                        # 兜底：整个 dict 转成 JSON 字符串
-                        try:
-                            text = json.dumps(response_data, ensure_ascii=False)
-                        except Exception:
-                            text = str(response_data)
-                elif isinstance(response_data, str):
-                    text = response_data
-                else:
-                    text = str(response_data)
+                if text is None:
+                    text = self._text_for_patterns(response_data)
 
                 # 给个 DOTALL 标志，万一以后你用 .*
-                match = re.search(pattern, text, re.S)
+                match = _compile_pattern(pattern).search(text)
                 if match:
                     extracted_value = match.group(1) if match.groups() else match.group(0)
                     logger.info(f"正则表达式提取成功: {extract_key} -> {extracted_value}")
@@ -183,6 +242,17 @@ class DataHandler:
                     logger.warning(f"正则表达式 {pattern} 未匹配到内容")
                     return ''
 
+            # 处理 css: / xpath: 规则（单次解析HTML）
+            elif is_html_rule(extract_key):
+                if text is None:
+                    text = self._text_for_patterns(response_data)
+                extracted_value = extract_html(text, [extract_key])[0]
+                if extracted_value is None:
+                    logger.warning(f"HTML规则 {extract_key} 未匹配到内容")
+                    return ''
+                logger.info(f"HTML规则提取成功: {extract_key} -> {extracted_value}")
+                return str(extracted_value)
+
             # 处理 JSON 路径提取
             else:
                 logger.debug(f"使用JSON路径提取: {extract_key}")
@@ -0,0 +1,347 @@
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+
+# 没有结束标签的空元素
+VOID_ELEMENTS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                           'link', 'meta', 'param', 'source', 'track', 'wbr'])
+
+# 分块喂给解析器，所有规则都命中后不再解析剩余内容
+CHUNK_SIZE = 65536
+
+_CSS_TOKEN = re.compile(r'''
+    \s*(?P<combinator>>)\s*
+  | (?P<space>\s+)
+  | (?P<tag>[a-zA-Z][\w-]*|\*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w:-]+)\s*(?:(?P<op>[*^$~]?=)\s*(?P<value>"[^"]*"|'[^']*'|[^\]\s]+)\s*)?\]
+  | :contains\(\s*(?P<contains>"[^"]*"|'[^']*')\s*\)
+''', re.X)
+
+_XPATH_PREDICATE = re.compile(r'''
+    \[\s*(?:
+        @(?P<attr>[\w:-]+)\s*(?:=\s*(?P<value>"[^"]*"|'[^']*'))?
+      | contains\(\s*@(?P<cattr>[\w:-]+)\s*,\s*(?P<cvalue>"[^"]*"|'[^']*')\s*\)
+      | contains\(\s*(?:\.|text\(\))\s*,\s*(?P<text>"[^"]*"|'[^']*')\s*\)
+      | (?P<index>1)
+    )\s*\]
+''', re.X)
+
+_XPATH_NAME = re.compile(r'[a-zA-Z][\w-]*|\*')
+
+
+def _unquote(value):
+    if value and value[0] in '\'"' and value[-1] == value[0]:
+        return value[1:-1]
+    return value
+
+
+class _Step:
+    """
+    选择器中的一个元素条件
+
+    combinator 为与上一步的关系：descendant（后代）、child（子元素）；第一步为 root 时必须是根元素
+    """
+
+    __slots__ = ('tag', 'attrs', 'contains', 'combinator')
+
+    def __init__(self, combinator='descendant'):
+        self.tag = None
+        self.attrs = []
+        self.contains = None
+        self.combinator = combinator
+
+    def matches(self, tag, attrs):
+        if self.tag is not None and self.tag != tag:
+            return False
+        for name, op, expected in self.attrs:
+            actual = attrs.get(name)
+            if actual is None:
+                return False
+            if op == '=' and actual != expected:
+                return False
+            if op == '*=' and expected not in actual:
+                return False
+            if op == '^=' and not actual.startswith(expected):
+                return False
+            if op == '$=' and not actual.endswith(expected):
+                return False
+            if op == '~=' and expected not in actual.split():
+                return False
+        return True
+
+
+class HtmlRule:
+    """
+    编译后的HTML提取规则
+
+    css:  li.playlist-item[data-type=list]@id、div#main > a::text、li:contains("抓包视频")@id
+    xpath: //li[@class="playlist-item"]/@id、//a[contains(@href,"list")]/text()、//li[contains(., "抓包视频")]/@id
+
+    结果为文档顺序中第一个匹配元素的属性值或文本（默认取文本）
+    """
+
+    def __init__(self, expression, steps, output):
+        self.expression = expression
+        self.steps = steps
+        # None 表示取文本，否则为属性名
+        self.output = output
+        # 只有最后一步带文本条件时需要等元素结束才能判断
+        self.deferred = steps[-1].contains is not None
+
+    def matches(self, stack, tag, attrs):
+        """判断当前元素（祖先链为stack）是否匹配选择器"""
+        if not self.steps[-1].matches(tag, attrs):
+            return False
+        return self._match_ancestors(len(self.steps) - 2, stack, len(stack) - 1, self.steps[-1].combinator)
+
+    def _match_ancestors(self, step_index, stack, position, combinator):
+        if step_index < 0:
+            return combinator != 'root' or position == -1
+        step = self.steps[step_index]
+        if combinator == 'child':
+            if position < 0 or not step.matches(stack[position].tag, stack[position].attrs):
+                return False
+            return self._match_ancestors(step_index - 1, stack, position - 1, step.combinator)
+        # 后代关系：在祖先中向上查找，失败时继续尝试更外层的祖先
+        while position >= 0:
+            if step.matches(stack[position].tag, stack[position].attrs) and \
+                    self._match_ancestors(step_index - 1, stack, position - 1, step.combinator):
+                return True
+            position -= 1
+        return False
+
+
+def _parse_css(expression):
+    output = None
+    selector = expression.strip()
+    if selector.endswith('::text'):
+        selector = selector[:-len('::text')]
+    elif '@' in selector and not selector.endswith(']'):
+        selector, _, output = selector.rpartition('@')
+    steps = [_Step()]
+    pending = None
+    pos = 0
+    selector = selector.strip()
+    while pos < len(selector):
+        match = _CSS_TOKEN.match(selector, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"无法解析CSS选择器: {expression}（位置 {pos}）")
+        pos = match.end()
+        if match.group('combinator') or match.group('space'):
+            pending = 'child' if match.group('combinator') else (pending or 'descendant')
+            continue
+        if pending is not None:
+            steps.append(_Step(pending))
+            pending = None
+        step = steps[-1]
+        if match.group('tag'):
+            step.tag = None if match.group('tag') == '*' else match.group('tag').lower()
+        elif match.group('id'):
+            step.attrs.append(('id', '=', match.group('id')))
+        elif match.group('cls'):
+            step.attrs.append(('class', '~=', match.group('cls')))
+        elif match.group('attr'):
+            step.attrs.append((match.group('attr').lower(), match.group('op'), _unquote(match.group('value') or '')))
+        else:
+            step.contains = _unquote(match.group('contains'))
+    if any(step.contains is not None for step in steps[:-1]):
+        raise ValueError(f":contains() 只支持用在选择器的最后一个元素上: {expression}")
+    return HtmlRule(expression, steps, output)
+
+
+def _parse_xpath(expression):
+    path = expression.strip()
+    output = None
+    if path.endswith('/text()'):
+        path = path[:-len('/text()')]
+    else:
+        head, sep, attr = path.rpartition('/@')
+        if sep and re.fullmatch(r'[\w:-]+', attr):
+            path, output = head, attr.lower()
+    steps = []
+    pos = 0
+    while pos < len(path):
+        if path.startswith('//', pos):
+            combinator, pos = 'descendant', pos + 2
+        elif path.startswith('/', pos):
+            combinator, pos = ('child' if steps else 'root'), pos + 1
+        elif not steps:
+            combinator = 'descendant'
+        else:
+            raise ValueError(f"无法解析XPath: {expression}（位置 {pos}）")
+        match = _XPATH_NAME.match(path, pos)
+        if match is None:
+            raise ValueError(f"无法解析XPath: {expression}（位置 {pos}）")
+        step = _Step(combinator)
+        step.tag = None if match.group() == '*' else match.group().lower()
+        pos = match.end()
+        while pos < len(path) and path[pos] == '[':
+            predicate = _XPATH_PREDICATE.match(path, pos)
+            if predicate is None:
+                raise ValueError(f"不支持的XPath条件: {expression}（位置 {pos}）")
+            if predicate.group('attr'):
+                value = predicate.group('value')
+                step.attrs.append((predicate.group('attr').lower(), '=' if value else None, _unquote(value or '')))
+            elif predicate.group('cattr'):
+                step.attrs.append((predicate.group('cattr').lower(), '*=', _unquote(predicate.group('cvalue'))))
+            elif predicate.group('text'):
+                step.contains = _unquote(predicate.group('text'))
+            pos = predicate.end()
+        steps.append(step)
+    if not steps:
+        raise ValueError(f"XPath为空: {expression}")
+    if any(step.contains is not None for step in steps[:-1]):
+        raise ValueError(f"contains(., ...) 只支持用在最后一个元素上: {expression}")
+    return HtmlRule(expression, steps, output)
+
+
+@lru_cache(maxsize=512)
+def compile_html_rule(expression):
+    """
+    编译 css: / xpath: 提取规则（按表达式缓存）
+
+    Args:
+        expression (str): 带前缀的规则，如 css:li.item@id 或 xpath://li[@class="item"]/@id
+
+    Returns:
+        HtmlRule: 编译后的规则
+    """
+    prefix, _, body = expression.partition(':')
+    prefix = prefix.strip().lower()
+    if prefix == 'css':
+        return _parse_css(body)
+    if prefix == 'xpath':
+        return _parse_xpath(body)
+    raise ValueError(f"不支持的HTML提取规则: {expression}")
+
+
+def is_html_rule(expression):
+    return expression.lower().startswith(('css:', 'xpath:'))
+
+
+class _Element:
+    __slots__ = ('tag', 'attrs', 'captures')
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = attrs
+        self.captures = []
+
+
+class _Capture:
+    """匹配元素的文本收集器，元素结束时得到结果"""
+
+    __slots__ = ('state', 'order', 'parts')
+
+    def __init__(self, state, order):
+        self.state = state
+        self.order = order
+        self.parts = []
+
+
+class _RuleState:
+    __slots__ = ('rule', 'best', 'pending')
+
+    def __init__(self, rule):
+        self.rule = rule
+        # (文档顺序, 结果)
+        self.best = None
+        self.pending = set()
+
+    @property
+    def done(self):
+        return self.best is not None and all(order > self.best[0] for order in self.pending)
+
+
+class _ExtractingParser(HTMLParser):
+    def __init__(self, rules):
+        super().__init__(convert_charrefs=True)
+        self.states = [_RuleState(rule) for rule in rules]
+        self.stack = []
+        self.active = []
+        self.order = 0
+
+    def all_done(self):
+        return all(state.done for state in self.states)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: (value if value is not None else '') for name, value in attrs}
+        self.order += 1
+        element = _Element(tag, attrs)
+        for state in self.states:
+            # 已有结果的规则不再考虑文档中更靠后的元素
+            if state.best is not None or not state.rule.matches(self.stack, tag, attrs):
+                continue
+            rule = state.rule
+            if rule.output is not None and not rule.deferred:
+                state.best = (self.order, attrs.get(rule.output, ''))
+                continue
+            capture = _Capture(state, self.order)
+            state.pending.add(self.order)
+            element.captures.append(capture)
+            self.active.append(capture)
+        if tag in VOID_ELEMENTS:
+            self._close(element)
+        else:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self.stack and self.stack[-1].tag == tag:
+            self._close(self.stack.pop())
+
+    def handle_endtag(self, tag):
+        # 容错：结束标签对应的元素之内未闭合的元素一并结束；没有对应开始标签时忽略
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index].tag == tag:
+                while len(self.stack) > index:
+                    self._close(self.stack.pop())
+                return
+
+    def handle_data(self, data):
+        for capture in self.active:
+            capture.parts.append(data)
+
+    def _close(self, element):
+        for capture in element.captures:
+            self.active.remove(capture)
+            state = capture.state
+            state.pending.discard(capture.order)
+            rule = state.rule
+            text = ''.join(capture.parts)
+            if rule.steps[-1].contains is not None and rule.steps[-1].contains not in text:
+                continue
+            value = element.attrs.get(rule.output, '') if rule.output is not None else text.strip()
+            if state.best is None or capture.order < state.best[0]:
+                state.best = (capture.order, value)
+
+    def finish(self):
+        while self.stack:
+            self._close(self.stack.pop())
+
+
+def extract_html(html, expressions):
+    """
+    单次解析HTML，同时执行多条 css: / xpath: 规则
+
+    页面分块解析，所有规则都得到结果后立即停止，不再解析剩余内容
+
+    Args:
+        html (str): HTML文本
+        expressions (list): 带前缀的规则列表
+
+    Returns:
+        list: 与规则一一对应的结果，未匹配时为None
+    """
+    rules = [compile_html_rule(expression) for expression in expressions]
+    parser = _ExtractingParser(rules)
+    for start in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[start:start + CHUNK_SIZE])
+        if parser.all_done():
+            break
+    else:
+        parser.close()
+        parser.finish()
+    return [state.best[1] if state.best is not None else None for state in parser.states]
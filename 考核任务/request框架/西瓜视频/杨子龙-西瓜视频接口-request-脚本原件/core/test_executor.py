@@ -156,7 +156,7 @@ class TestExecutor:
                 response_json = response.json()
                 # 特殊处理类似 "token=json.token" 的格式
                 extract_key = case['extract_key']
-                if '=' in extract_key and not extract_key.startswith(('json.', 'regex:')):
+                if '=' in extract_key and not extract_key.startswith(('json.', 'regex:', 'css:', 'xpath:')):
                     # 处理 "变量名=提取路径" 格式，如 "token=json.token"
                     var_name, json_path = extract_key.split('=', 1)
                     # 如果json_path以"json."开头，则去掉前缀
@@ -227,7 +227,7 @@ class TestExecutor:
             try:
                 response_json = response.json()
                 extract_key = case['extract_key']
-                if '=' in extract_key and not extract_key.startswith(('json.', 'regex:')):
+                if '=' in extract_key and not extract_key.startswith(('json.', 'regex:', 'css:', 'xpath:')):
                     # 处理 "变量名=提取路径" 格式，如 "token=json.token"
                     var_name, json_path = extract_key.split('=', 1)
                     # 如果json_path以"json."开头，则去掉前缀
@@ -0,0 +1,151 @@
+"""
+HTML提取单元测试：css/xpath 规则子集、单次解析提前结束、多规则提取与别名解析
+"""
+import pytest
+
+from core import data_handler as data_handler_module
+from core import html_extractor
+from core.data_handler import DataHandler
+from core.html_extractor import compile_html_rule, extract_html
+
+PAGE = '''<!DOCTYPE html>
+<html><head><title>西瓜视频 - 合集</title></head>
+<body>
+<div id="main">
+  <ul class="playlist">
+    <li class="playlist-item active" data-type="list" id="p1"><a href="/list/1">默认合集</a></li>
+    <li class="playlist-item" data-type="video" id="p2"><span>抓包视频</span></li>
+    <li class="playlist-item" data-type="list" id="p3"><a href="/list/3">接口测试<br>第二行</a></li>
+  </ul>
+  <p class="desc">第一行<br/>第二行</p>
+  <img src="/cover.png" alt="封面">
+  <a href="/direct" id="direct">直接子元素</a>
+</div>
+</body></html>'''
+
+RULES = {
+    'css:title': '西瓜视频 - 合集',
+    'css:li.playlist-item@id': 'p1',
+    'css:li[data-type=video]@id': 'p2',
+    'css:li[data-type="list"] a::text': '默认合集',
+    'css:li[id^=p]@data-type': 'list',
+    'css:a[href$="/3"]::text': '接口测试第二行',
+    'css:a[href*=list]@href': '/list/1',
+    'css:li:contains("抓包视频")@id': 'p2',
+    'css:div#main > a@href': '/direct',
+    'css:div#main a@href': '/list/1',
+    'css:ul > li#p3 > a::text': '接口测试第二行',
+    'css:p.desc::text': '第一行第二行',
+    'css:img@alt': '封面',
+    'css:* > img@src': '/cover.png',
+    'css:table@id': None,
+    'xpath://li[@class="playlist-item"]/@id': 'p2',
+    'xpath://li[@data-type]/@id': 'p1',
+    'xpath://a[contains(@href,"list")]/text()': '默认合集',
+    'xpath://li[contains(., "抓包视频")]/@id': 'p2',
+    'xpath:/html/head/title/text()': '西瓜视频 - 合集',
+    'xpath:/body/div/a/@id': None,
+    'xpath://div[@id="main"]/a/@href': '/direct',
+    'xpath://ul/li[1]/a/@href': '/list/1',
+}
+
+
+def test_rules_in_one_pass():
+    assert extract_html(PAGE, list(RULES)) == list(RULES.values())
+
+
+@pytest.mark.parametrize('rule, expected', list(RULES.items()))
+def test_single_rule(rule, expected):
+    assert extract_html(PAGE, [rule]) == [expected]
+
+
+@pytest.mark.parametrize('rule', [
+    'css:li:contains(\'接口测试\') a@href',
+    'css:li ~ a',
+    'xpath://li[position()>1]/@id',
+    'xpath://li[contains(., "x")]/a',
+    'xpath:',
+    'html:li',
+])
+def test_invalid_rules(rule):
+    with pytest.raises(ValueError):
+        compile_html_rule(rule)
+
+
+def test_first_match_in_document_order():
+    """嵌套的匹配元素中，先开始的外层元素优先，即使内层元素先结束"""
+    html = '<div class="a">外<div class="a">内</div>尾</div><div class="a">后</div>'
+    assert extract_html(html, ['css:div.a::text']) == ['外内尾']
+    assert extract_html(html, ['css:div.a:contains("后")::text']) == ['后']
+
+
+def _count_feeds(monkeypatch):
+    feeds = []
+
+    class CountingParser(html_extractor._ExtractingParser):
+        def feed(self, data):
+            feeds.append(len(data))
+            super().feed(data)
+
+    monkeypatch.setattr(html_extractor, '_ExtractingParser', CountingParser)
+    return feeds
+
+
+def test_stops_after_all_rules_matched(monkeypatch):
+    feeds = _count_feeds(monkeypatch)
+    html = PAGE + '<p>填充</p>' * 30000
+    assert len(html) > html_extractor.CHUNK_SIZE * 3
+    assert extract_html(html, ['css:title', 'css:li.playlist-item@id']) == ['西瓜视频 - 合集', 'p1']
+    assert len(feeds) == 1
+
+    # 有规则未匹配时解析整个页面
+    del feeds[:]
+    assert extract_html(html, ['css:title', 'css:table@id']) == ['西瓜视频 - 合集', None]
+    assert len(feeds) == -(-len(html) // html_extractor.CHUNK_SIZE)
+
+
+def test_text_across_chunks(monkeypatch):
+    """取文本的规则要等元素结束才有结果，元素跨越分块时不会提前结束"""
+    monkeypatch.setattr(html_extractor, 'CHUNK_SIZE', 16)
+    feeds = _count_feeds(monkeypatch)
+    html = '<title>' + '长' * 100 + '</title>' + '<p>x</p>' * 100
+    assert extract_html(html, ['css:title']) == ['长' * 100]
+    assert len(feeds) == 8
+
+
+def test_extract_value_aliases():
+    handler = DataHandler()
+    response = {'code': 0, 'html': PAGE}
+    assert handler.extract_value(response, 'first=css:li.playlist-item@id; video = css:li[data-type=video]@id; '
+                                           'title=xpath://title/text(); code=code') == {
+        'first': 'p1', 'video': 'p2', 'title': '西瓜视频 - 合集', 'code': '0'}
+    assert handler.extract_value(response, 'list_id=regex:data-type="list" id="(p\\d+)"') == {'list_id': 'p1'}
+    # 没有别名的规则以自身作为键名，未匹配的规则不出现在结果中
+    assert handler.extract_value(response, 'code; css:title; missing=css:table@id') == {
+        'code': '0', 'css:title': '西瓜视频 - 合集'}
+
+
+def test_extract_value_equals_inside_rule():
+    """规则自身包含 = 时不再被拆成别名"""
+    handler = DataHandler()
+    response = {'html': PAGE}
+    assert handler.extract_value(response, 'css:li[data-type=video]@id') == 'p2'
+    assert handler.extract_value(response, 'regex:id="(p\\d+)"') == 'p1'
+    assert handler.extract_value(response, 'xpath://li[@class="playlist-item"]/@id') == 'p2'
+    assert handler.extract_value(response, 'a=regex:data-type="video" id="(p\\d+)"; b=css:li[id=p3] a@href') == {
+        'a': 'p2', 'b': '/list/3'}
+
+
+def test_extract_many_parses_once(monkeypatch):
+    calls = []
+
+    def counting_extract_html(html, expressions):
+        calls.append(list(expressions))
+        return extract_html(html, expressions)
+
+    monkeypatch.setattr(data_handler_module, 'extract_html', counting_extract_html)
+    result = DataHandler().extract_value(
+        {'html': PAGE}, 'a=css:title; b=xpath://li/@id; c=regex:<img src="([^"]+)"; d=css:li:contains("x") a')
+    # 无法解析的规则单独报错，不影响其他规则
+    assert result == {'a': '西瓜视频 - 合集', 'b': 'p1', 'c': '/cover.png'}
+    assert calls == [['css:title', 'xpath://li/@id']]